@@ -1,79 +1,185 @@
-from .converter import convert_to_tree
-from .scorm_builder import build_scorm_package, html_to_hierarchical_tree, build_scorm_wrapper_package
-from .html_builder import build_html
 import os
+import importlib
 from .config import DEFAULT_CONFIG
+from .pagination import DEFAULT_VIEWPORT
+from .instrumentation import traced, stage
+from .conversion_cache import cache_settings, cache_key, get_cached, put_cached
 
 from typing import List
 
+# Las dependencias pesadas (mammoth, python-docx, lxml, Pillow, BeautifulSoup) se cargan
+# sólo en las funciones que las usan: importar el paquete o generar un wrapper no las necesita.
+_LAZY_EXPORTS = {
+    "convert_to_tree": ".converter",
+    "build_scorm_package": ".scorm_builder",
+    "html_to_hierarchical_tree": ".scorm_builder",
+    "build_scorm_wrapper_package": ".scorm_builder",
+    "build_html": ".html_builder",
+    "save_images": ".images",
+    "TreeNode": ".tree",
+}
+
+
+def __getattr__(name):
+    # Compatibilidad con "from docs2scorm import build_html" y similares
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
+
 
 def doc_to_scorm(file_path, output_zip, config=None):
     """
     Convierte un archivo .docx, .dotx o .odt en un paquete SCORM.
 
     :param file_path: Ruta al archivo de entrada.
-    :param output_zip: Ruta donde se guardará el paquete SCORM .zip.
+    :param output_zip: Ruta donde se guardará el paquete SCORM .zip (o fichero binario abierto / BytesIO).
     :param config: Diccionario con configuración opcional:
         - split_level (int): Encabezado para dividir secciones (1 = <h1>, 2 = <h2>, etc.)
         - course_title (str): Título del curso SCORM
+        - external_images (bool): Guardar las imágenes como archivos images/<sha256>.<ext>
+        - zip_stored_extensions (list): Extensiones que se guardan sin comprimir en el ZIP
+        - zip_compresslevel (int): Nivel de deflate para el resto de archivos
+        - shared_resources (bool): CSS/JS comunes en course.css/course.js
+        - prepaginate (bool) / slide_viewport ([ancho, alto]): Partir las diapositivas al generar
+        - single_page (bool): Un único index.html que carga cada sección bajo demanda
+        - html_parser (str): Backend de BeautifulSoup (None = lxml si está instalado, si no html.parser)
+        - incremental (bool): Sólo re-renderizar las secciones cambiadas (estado en <zip>.state.json)
+        - reproducible (bool): Paquete idéntico byte a byte para la misma entrada y configuración
+        - streaming_docx (bool): Leer el .docx en streaming (con external_images, memoria acotada)
+        - build_workers (int): Hilos que renderizan y comprimen las entradas del ZIP (None = todos los núcleos)
+        - conversion_cache (bool) / conversion_cache_dir (str): Reutilizar la lectura del documento
+          entre llamadas (ver conversion_cache; no se aplica con streaming_docx)
+        - trace_callback / trace_file / trace_memory: Traza por etapas (ver instrumentation.traced)
     """
+    from .converter import convert_to_tree
+    from .scorm_builder import build_scorm_package
+
     config = config or DEFAULT_CONFIG
     split_tags = config.get("split_tags", ["h1", "h2", "h3"])
+    # Las imágenes de un .odt se escriben siempre como archivos del paquete
+    is_odt = os.path.splitext(file_path)[1].lower() == ".odt"
+    image_store = {} if config.get("external_images") or is_odt else None
     try:
-        data = convert_to_tree(file_path, split_tags=split_tags)
-        build_scorm_package(data, output_zip, course_title=config.get("course_title", "Curso"))
+        with traced(config, "doc_to_scorm", input=file_path):
+            data = convert_to_tree(file_path, split_tags=split_tags, image_store=image_store, parser=config.get("html_parser"),
+                                   streaming=config.get("streaming_docx", False), cache=cache_settings(config))
+            build_scorm_package(
+                data,
+                output_zip,
+                course_title=config.get("course_title", "Curso"),
+                image_store=image_store,
+                stored_extensions=config.get("zip_stored_extensions"),
+                compresslevel=config.get("zip_compresslevel"),
+                shared_resources=config.get("shared_resources", False),
+                slide_viewport=config.get("slide_viewport", DEFAULT_VIEWPORT) if config.get("prepaginate") else None,
+                single_page=config.get("single_page", False),
+                incremental=config.get("incremental", False),
+                reproducible=config.get("reproducible", False),
+                workers=config.get("build_workers", 1),
+                html_parser=config.get("html_parser")
+            )
         return True
     except Exception as e:
         print(f"Error en doc_to_scorm: {e}")
         return None
 
-def doc_to_html(file_path, output_path=None):
+def doc_to_html(file_path, output_path=None, config=None):
     """
     Convierte un archivo .docx a html (ACTUALMENTE SOLO SOPORTA DOCX).
 
     :param file_path: Ruta al archivo de entrada.
     :param output_path: Ruta del html generado.
+    :param config: Diccionario con configuración opcional:
+        - external_images (bool): Guardar las imágenes junto al html en images/<sha256>.<ext>
+          (sólo si se indica output_path; sin él se incrustan en base64)
+        - image_max_width, image_quality, image_format: Transformación de las imágenes
+        - image_cache_dir (str): Caché persistente de imágenes ya procesadas
+        - image_workers (int): Procesos usados para transformar las imágenes
+        - conversion_cache (bool) / conversion_cache_dir (str): Reutilizar el html generado
+          (y sus imágenes procesadas) mientras no cambien el archivo ni los ajustes
+        - trace_callback / trace_file / trace_memory: Traza por etapas (ver instrumentation.traced)
     """
+    from .html_builder import build_html
+    from .images import save_images
+
+    config = config or {}
+    image_store = {} if config.get("external_images") and output_path else None
+    cache = cache_settings(config)
     try:
-        return build_html(file_path, output_path)
+        with traced(config, "doc_to_html", input=file_path):
+            cached = None
+            if cache is not None:
+                key = cache_key(file_path, "build_html", image_store is not None,
+                                *(config.get(name) for name in ("image_max_width", "image_quality", "image_format")))
+                cached = get_cached(key, cache)
+            if cached is not None:
+                html = cached["html"]
+                if image_store is not None:
+                    image_store.update(cached["images"])
+                if output_path:
+                    with open(output_path, "w", encoding="utf-8") as f:
+                        f.write(html)
+            else:
+                with stage("build_html") as record:
+                    html = build_html(file_path, output_path, image_store=image_store, config=config)
+                    record["bytes_out"] = len(html)
+                if cache is not None:
+                    put_cached(key, {"html": html, "images": dict(image_store or {})}, cache)
+            if image_store:
+                with stage("save_images", images=len(image_store)):
+                    save_images(image_store, os.path.dirname(os.path.abspath(output_path)))
+        return html
     except Exception as e:
         print(e)
         return None
 
 def html_to_scorm(html_files: List[str], output_zip: str, config=None, assets: List[str] = None):
+    from .scorm_builder import build_scorm_package, html_to_hierarchical_tree
+
     config = config or DEFAULT_CONFIG
     course_title = config.get("course_title", "Curso SCORM")
     split_tags = [t.lower() for t in config.get("split_tags", ["h1", "h2", "h3"])]
 
     try:
-        full_tree = []
-        global_resources = {"css": "", "js": ""}
+        with traced(config, "html_to_scorm", inputs=list(html_files)):
+            full_tree = []
+            global_resources = {"css": "", "js": ""}
 
-        for html_input in html_files:
-            if not os.path.exists(html_input): 
-                print(f"⚠️ Archivo no encontrado: {html_input}")
-                continue
-            
-            with open(html_input, "r", encoding="utf-8") as f:
-                html_content = f.read()
+            for html_input in html_files:
+                if not os.path.exists(html_input): 
+                    print(f"⚠️ Archivo no encontrado: {html_input}")
+                    continue
+                
+                with open(html_input, "r", encoding="utf-8") as f:
+                    html_content = f.read()
 
-            # Convertimos y paginamos
-            tree_nodes, resources = html_to_hierarchical_tree(html_content, split_tags=split_tags)
+                # Convertimos y paginamos
+                tree_nodes, resources = html_to_hierarchical_tree(html_content, split_tags=split_tags, parser=config.get("html_parser"))
+                
+                full_tree.extend(tree_nodes)
+                
+                if resources:
+                    global_resources["css"] += resources["css"] + "\n"
+                    global_resources["js"] += resources["js"] + "\n"
             
-            full_tree.extend(tree_nodes)
+            print(f"✅ Procesando {len(full_tree)} nodos raíz (con sub-paginación strong aplicada).")
             
-            if resources:
-                global_resources["css"] += resources["css"] + "\n"
-                global_resources["js"] += resources["js"] + "\n"
-        
-        print(f"✅ Procesando {len(full_tree)} nodos raíz (con sub-paginación strong aplicada).")
-        
-        build_scorm_package(
-            (full_tree, global_resources), 
-            output_zip, 
-            course_title=course_title,
-            assets_paths=assets
-        )
+            build_scorm_package(
+                (full_tree, global_resources), 
+                output_zip, 
+                course_title=course_title,
+                assets_paths=assets,
+                stored_extensions=config.get("zip_stored_extensions"),
+                compresslevel=config.get("zip_compresslevel"),
+                shared_resources=config.get("shared_resources", False),
+                slide_viewport=config.get("slide_viewport", DEFAULT_VIEWPORT) if config.get("prepaginate") else None,
+                single_page=config.get("single_page", False),
+                incremental=config.get("incremental", False),
+                reproducible=config.get("reproducible", False),
+                workers=config.get("build_workers", 1),
+                html_parser=config.get("html_parser")
+            )
         return True
     except Exception as e:
         print(f"❌ Error en html_to_scorm: {e}")
@@ -85,6 +191,8 @@ def build_scorm_wrapper(curso_id: str, output_zip: str, config=None, extra_param
     """
     Punto de entrada para generar SCORMs conectados a la nube.
     """
+    from .scorm_builder import build_scorm_wrapper_package
+
     config = config or {}
     course_title = config.get("course_title", "Curso Online")
 
@@ -92,13 +200,15 @@ def build_scorm_wrapper(curso_id: str, output_zip: str, config=None, extra_param
     visor_url = config.get("visor_url", "http://localhost:5173")
     
     try:
-        build_scorm_wrapper_package(
-            output_zip_path=output_zip,
-            course_title=course_title,
-            curso_id=curso_id,
-            visor_url_base=visor_url,
-            extra_params=extra_params
-        )
+        with traced(config, "build_scorm_wrapper", curso_id=curso_id):
+            build_scorm_wrapper_package(
+                output_zip_path=output_zip,
+                course_title=course_title,
+                curso_id=curso_id,
+                visor_url_base=visor_url,
+                extra_params=extra_params,
+                reproducible=config.get("reproducible", False)
+            )
         return True
     except Exception as e:
         print(f"❌ Error generando Cloud SCORM: {e}")
@@ -0,0 +1,458 @@
+import os
+import io
+import sys
+import json
+import math
+import time
+import zipfile
+import argparse
+import platform
+import tempfile
+import contextlib
+from html import escape
+
+from . import doc_to_scorm, doc_to_html, html_to_scorm, build_scorm_wrapper
+from .cli import load_config
+
+# Banco de pruebas de rendimiento: genera documentos sintéticos (.docx, .odt, .html) del tamaño
+# indicado, mide cada punto de entrada de principio a fin y por etapas (instrumentation) y guarda
+# el resultado en JSON para compararlo con una ejecución anterior.
+#
+#   python -m docs2scorm.benchmark -p medium --scales 1,2,4 -o bench.json
+#   python -m docs2scorm.benchmark -p medium -o new.json --baseline bench.json
+
+# Tamaños de documento. paragraphs: párrafos en total; heading_every: un encabezado cada N
+# párrafos (densidad de encabezados); depth: niveles de encabezado usados (h1..hN) y, en HTML,
+# contenedores <div> anidados alrededor de cada sección; tables: tablas de table_rows x table_cols;
+# images: imágenes distintas de image_width x image_height píxeles.
+PROFILES = {
+    "small": {
+        "paragraphs": 200, "heading_every": 10, "depth": 2,
+        "tables": 5, "table_rows": 5, "table_cols": 4,
+        "images": 5, "image_width": 320, "image_height": 240,
+    },
+    "medium": {
+        "paragraphs": 2000, "heading_every": 10, "depth": 3,
+        "tables": 40, "table_rows": 10, "table_cols": 5,
+        "images": 40, "image_width": 800, "image_height": 600,
+    },
+    "large": {
+        "paragraphs": 10000, "heading_every": 8, "depth": 3,
+        "tables": 200, "table_rows": 20, "table_cols": 6,
+        "images": 150, "image_width": 1600, "image_height": 1200,
+    },
+}
+
+# Claves del perfil que crecen con la escala (el resto se mantiene)
+_SCALED_KEYS = ("paragraphs", "tables", "images")
+
+# Caso -> (formato del documento generado, punto de entrada, configuración adicional)
+CASES = {
+    "doc_to_scorm[docx]": ("docx", "doc_to_scorm", {}),
+    "doc_to_scorm[docx-streaming]": ("docx", "doc_to_scorm", {"streaming_docx": True, "external_images": True}),
+    "doc_to_scorm[odt]": ("odt", "doc_to_scorm", {}),
+    "doc_to_html[docx]": ("docx", "doc_to_html", {}),
+    "html_to_scorm[html]": ("html", "html_to_scorm", {}),
+    "build_scorm_wrapper": (None, "build_scorm_wrapper", {}),
+}
+
+_WORDS = ("contenido formación módulo evaluación actividad objetivo práctica lectura recurso unidad "
+          "competencia tema ejemplo ejercicio resumen").split()
+
+
+def scaled_profile(profile, scale):
+    """Copia del perfil con los tamaños multiplicados por scale."""
+    spec = dict(profile)
+    for key in _SCALED_KEYS:
+        spec[key] = max(0, int(round(spec[key] * scale)))
+    return spec
+
+
+def _sentence(index, words=24):
+    return " ".join(_WORDS[(index * 7 + i) % len(_WORDS)] for i in range(words)).capitalize() + "."
+
+
+def _heading_level(index, spec):
+    return index % max(1, min(spec["depth"], 6)) + 1
+
+
+def _layout(spec):
+    """
+    Reparte el contenido del documento: genera ("h", nivel, texto), ("p", texto),
+    ("table", n) e ("image", n) en orden, con tablas e imágenes espaciadas entre los párrafos.
+    """
+    paragraphs = spec["paragraphs"]
+    every = max(1, spec["heading_every"])
+    tables = {paragraphs * (n + 1) // (spec["tables"] + 1) for n in range(spec["tables"])}
+    images = {paragraphs * (n + 1) // (spec["images"] + 1) for n in range(spec["images"])}
+    table_index = image_index = heading_index = 0
+    for index in range(paragraphs):
+        if index % every == 0:
+            yield "h", _heading_level(heading_index, spec), f"Sección {heading_index + 1}"
+            heading_index += 1
+        yield "p", _sentence(index)
+        if index in tables:
+            yield "table", table_index
+            table_index += 1
+        if index in images:
+            yield "image", image_index
+            image_index += 1
+
+
+def make_image(index, width, height):
+    """PNG de width x height con ruido (no se comprime como un color liso) distinto para cada index."""
+    from PIL import Image
+    noise = Image.effect_noise((width, height), 32 + index % 64).convert("RGB")
+    tint = Image.new("RGB", (width, height), ((index * 53) % 256, (index * 97) % 256, (index * 151) % 256))
+    buffer = io.BytesIO()
+    Image.blend(noise, tint, 0.5).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _table_cell(table, row, col):
+    return f"T{table + 1} fila {row + 1} col {col + 1}"
+
+
+def make_docx(path, spec):
+    """Genera un .docx sintético con python-docx."""
+    from docx import Document
+    from docx.shared import Inches
+
+    doc = Document()
+    for block in _layout(spec):
+        kind = block[0]
+        if kind == "h":
+            doc.add_heading(block[2], block[1])
+        elif kind == "p":
+            paragraph = doc.add_paragraph(block[1][:60] + " ")
+            paragraph.add_run("texto destacado").bold = True
+            paragraph.add_run(" " + block[1][60:])
+        elif kind == "table":
+            table = doc.add_table(rows=spec["table_rows"], cols=spec["table_cols"])
+            for row_index, row in enumerate(table.rows):
+                for col_index, cell in enumerate(row.cells):
+                    cell.text = _table_cell(block[1], row_index, col_index)
+        else:
+            data = make_image(block[1], spec["image_width"], spec["image_height"])
+            doc.add_picture(io.BytesIO(data), width=Inches(4))
+    doc.save(path)
+
+
+_ODT_NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0" '
+    'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0" '
+    'xmlns:svg="urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" office:version="1.2"'
+)
+
+
+def make_odt(path, spec):
+    """Genera un .odt sintético escribiendo directamente content.xml, styles.xml y el manifest."""
+    body, pictures = [], []
+    for block in _layout(spec):
+        kind = block[0]
+        if kind == "h":
+            body.append(f'<text:h text:outline-level="{block[1]}">{escape(block[2])}</text:h>')
+        elif kind == "p":
+            body.append(f'<text:p>{escape(block[1][:60])} <text:span text:style-name="B">texto destacado</text:span> '
+                        f'{escape(block[1][60:])}</text:p>')
+        elif kind == "table":
+            rows = "".join(
+                "<table:table-row>" + "".join(
+                    f'<table:table-cell><text:p>{_table_cell(block[1], row, col)}</text:p></table:table-cell>'
+                    for col in range(spec["table_cols"])) + "</table:table-row>"
+                for row in range(spec["table_rows"]))
+            body.append(f'<table:table table:name="T{block[1] + 1}">'
+                        f'<table:table-column table:number-columns-repeated="{spec["table_cols"]}"/>{rows}</table:table>')
+        else:
+            name = f"Pictures/image{block[1] + 1}.png"
+            pictures.append((name, make_image(block[1], spec["image_width"], spec["image_height"])))
+            body.append(f'<text:p><draw:frame draw:name="img{block[1] + 1}" text:anchor-type="as-char" svg:width="10cm" '
+                        f'svg:height="7.5cm"><draw:image xlink:href="{name}" xlink:type="simple"/></draw:frame></text:p>')
+
+    content = (f'<?xml version="1.0" encoding="UTF-8"?><office:document-content {_ODT_NAMESPACES}>'
+               '<office:automatic-styles><style:style style:name="B" style:family="text">'
+               '<style:text-properties fo:font-weight="bold"/></style:style></office:automatic-styles>'
+               f'<office:body><office:text>{"".join(body)}</office:text></office:body></office:document-content>')
+    styles = (f'<?xml version="1.0" encoding="UTF-8"?><office:document-styles {_ODT_NAMESPACES}>'
+              '<office:styles/></office:document-styles>')
+    manifest = ('<?xml version="1.0" encoding="UTF-8"?><manifest:manifest '
+                'xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+                '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.text"/>'
+                '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+                '<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+                + "".join(f'<manifest:file-entry manifest:full-path="{name}" manifest:media-type="image/png"/>'
+                          for name, _ in pictures)
+                + '</manifest:manifest>')
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        # mimetype: primera entrada y sin comprimir
+        zf.writestr("mimetype", "application/vnd.oasis.opendocument.text", compress_type=zipfile.ZIP_STORED)
+        zf.writestr("content.xml", content)
+        zf.writestr("styles.xml", styles)
+        zf.writestr("META-INF/manifest.xml", manifest)
+        for name, data in pictures:
+            zf.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+
+
+def make_html(path, spec, image_dir=None):
+    """
+    Genera un .html sintético. Cada sección va dentro de depth contenedores <div> anidados.
+    Las imágenes se guardan en image_dir (junto al html) y se enlazan con rutas relativas.
+    """
+    depth = max(1, spec["depth"])
+    image_dir = image_dir or os.path.dirname(os.path.abspath(path))
+    parts = ["<!DOCTYPE html><html><head><meta charset=\"UTF-8\"><title>Benchmark</title>",
+             "<style>table { border-collapse: collapse; }</style></head><body>"]
+    open_section = False
+    for block in _layout(spec):
+        kind = block[0]
+        if kind == "h":
+            if open_section:
+                parts.append("</div>" * depth)
+            parts.append("<div class=\"section\">" * depth)
+            open_section = True
+            parts.append(f"<h{block[1]}>{escape(block[2])}</h{block[1]}>")
+        elif kind == "p":
+            parts.append(f"<p>{escape(block[1][:60])} <strong>texto destacado</strong> {escape(block[1][60:])}</p>")
+        elif kind == "table":
+            rows = "".join(
+                "<tr>" + "".join(f"<td>{_table_cell(block[1], row, col)}</td>" for col in range(spec["table_cols"])) + "</tr>"
+                for row in range(spec["table_rows"]))
+            parts.append(f"<table>{rows}</table>")
+        else:
+            name = f"image{block[1] + 1}.png"
+            with open(os.path.join(image_dir, name), "wb") as f:
+                f.write(make_image(block[1], spec["image_width"], spec["image_height"]))
+            parts.append(f'<p><img src="{name}" alt=""></p>')
+    if open_section:
+        parts.append("</div>" * depth)
+    parts.append("</body></html>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+
+_GENERATORS = {"docx": make_docx, "odt": make_odt, "html": make_html}
+
+
+def _run_case(entry_point, input_path, work_dir, config):
+    """Ejecuta un punto de entrada una vez con la traza activa. Devuelve (ok, traza)."""
+    traces = []
+    config = dict(config, trace_callback=traces.append)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if entry_point == "doc_to_scorm":
+            ok = doc_to_scorm(input_path, io.BytesIO(), config)
+        elif entry_point == "doc_to_html":
+            ok = doc_to_html(input_path, None, config) is not None
+        elif entry_point == "html_to_scorm":
+            ok = html_to_scorm([input_path], io.BytesIO(), config)
+        else:
+            ok = build_scorm_wrapper("benchmark", os.path.join(work_dir, "wrapper.zip"), config)
+    return bool(ok), traces[0] if traces else None
+
+
+def run_benchmark(profile, cases=None, scales=(1,), repeat=3, config=None, work_dir=None, progress=print):
+    """
+    Genera los documentos de cada escala y mide los casos indicados.
+
+    :param profile: Perfil de tamaños (ver PROFILES).
+    :param cases: Nombres de CASES a medir (None = todos).
+    :param scales: Multiplicadores de los tamaños del perfil; con varias escalas se calcula el
+        exponente de crecimiento de cada caso (~1 lineal, ~2 cuadrático).
+    :param repeat: Repeticiones por caso; se guarda la más rápida.
+    :param config: Configuración base de la conversión.
+    :param work_dir: Directorio para los documentos generados (None = temporal).
+    :param progress: Función que recibe cada línea de progreso (None = sin progreso).
+    :return: Resultado serializable en JSON.
+    """
+    from .config import DEFAULT_CONFIG
+
+    cases = list(cases or CASES)
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        raise ValueError(f"Casos desconocidos: {', '.join(unknown)}")
+    base_config = dict(config or DEFAULT_CONFIG)
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "profile": profile,
+        "scales": list(scales),
+        "repeat": repeat,
+        "cases": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        if work_dir is None:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="docs2scorm-bench-"))
+        os.makedirs(work_dir, exist_ok=True)
+
+        for scale in scales:
+            spec = scaled_profile(profile, scale)
+            scale_dir = os.path.join(work_dir, f"x{scale}")
+            os.makedirs(scale_dir, exist_ok=True)
+            inputs = {}
+            for name in cases:
+                kind = CASES[name][0]
+                if kind and kind not in inputs:
+                    inputs[kind] = os.path.join(scale_dir, f"bench.{kind}")
+                    started = time.perf_counter()
+                    _GENERATORS[kind](inputs[kind], spec)
+                    if progress:
+                        progress(f"📄 {os.path.basename(inputs[kind])} x{scale}: "
+                                 f"{os.path.getsize(inputs[kind]) / 1024:.0f} KB en {time.perf_counter() - started:.2f}s")
+
+            for name in cases:
+                kind, entry_point, extra = CASES[name]
+                input_path = inputs.get(kind)
+                runs = [_run_case(entry_point, input_path, scale_dir, dict(base_config, **extra)) for _ in range(repeat)]
+                ok = all(run_ok for run_ok, _ in runs)
+                traces = [trace for _, trace in runs if trace is not None]
+                best = min(traces, key=lambda trace: trace["wall"]) if traces else None
+                results["cases"][f"{name}@{scale}"] = {
+                    "case": name,
+                    "scale": scale,
+                    "ok": ok,
+                    "input_size": os.path.getsize(input_path) if input_path else None,
+                    "wall": best["wall"] if best else None,
+                    "cpu": best["cpu"] if best else None,
+                    "wall_runs": [trace["wall"] for trace in traces],
+                    "peak_rss_kb": best["peak_rss_kb"] if best else None,
+                    "stages": best["stages"] if best else {},
+                }
+                if progress:
+                    status = "✅" if ok else "❌"
+                    wall = f"{best['wall']:.3f}s" if best else "-"
+                    progress(f"{status} {name} x{scale}: {wall}")
+
+    if len(scales) > 1:
+        results["growth"] = growth_exponents(results)
+    return results
+
+
+def growth_exponents(results):
+    """
+    Exponente de crecimiento de cada caso entre la escala menor y la mayor:
+    log(t_max / t_min) / log(escala_max / escala_min). ~1 es lineal, ~2 cuadrático.
+    """
+    by_case = {}
+    for entry in results["cases"].values():
+        if entry["wall"]:
+            by_case.setdefault(entry["case"], []).append((entry["scale"], entry["wall"]))
+    growth = {}
+    for name, points in by_case.items():
+        (low_scale, low_wall), (high_scale, high_wall) = min(points), max(points)
+        if high_scale > low_scale:
+            growth[name] = round(math.log(high_wall / low_wall) / math.log(high_scale / low_scale), 2)
+    return growth
+
+
+def compare_results(current, baseline, threshold=1.25, min_seconds=0.005):
+    """
+    Compara dos resultados caso a caso y etapa a etapa.
+
+    :param threshold: Cociente tiempo actual / tiempo base a partir del cual se marca regresión.
+    :param min_seconds: Tiempo base mínimo para marcar regresión (por debajo domina el ruido).
+    :return: Lista de filas {case, stage, baseline, current, ratio, regression}; stage es None
+        para el tiempo total del caso.
+    """
+    rows = []
+    for key, entry in current["cases"].items():
+        base = baseline.get("cases", {}).get(key)
+        if not base or not base.get("wall") or not entry.get("wall"):
+            continue
+        pairs = [(None, base["wall"], entry["wall"])]
+        for stage_name, stats in entry["stages"].items():
+            base_stats = base.get("stages", {}).get(stage_name)
+            if base_stats and base_stats.get("wall"):
+                pairs.append((stage_name, base_stats["wall"], stats["wall"]))
+        for stage_name, base_wall, wall in pairs:
+            ratio = wall / base_wall
+            rows.append({
+                "case": key, "stage": stage_name, "baseline": base_wall, "current": wall,
+                "ratio": round(ratio, 3), "regression": ratio > threshold and base_wall >= min_seconds,
+            })
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m docs2scorm.benchmark",
+        description="Mide el rendimiento de la conversión con documentos sintéticos.",
+    )
+    parser.add_argument("-p", "--profile", default="small", choices=sorted(PROFILES), help="Tamaño de los documentos (por defecto: small)")
+    parser.add_argument("--set", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="Cambiar un tamaño del perfil (p. ej. --set images=0 --set depth=5)")
+    parser.add_argument("--cases", help=f"Casos separados por comas (por defecto todos: {', '.join(CASES)})")
+    parser.add_argument("--scales", default="1", help="Escalas del perfil separadas por comas (p. ej. 1,2,4)")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Repeticiones por caso (se guarda la más rápida)")
+    parser.add_argument("-c", "--config", help="Archivo JSON con claves de configuración (ver config.py)")
+    parser.add_argument("-o", "--output", help="Ruta del JSON de resultados")
+    parser.add_argument("-b", "--baseline", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Cociente con la base que se considera regresión (por defecto: 1.25)")
+    parser.add_argument("--work-dir", help="Conservar los documentos generados en este directorio")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    profile = dict(PROFILES[args.profile])
+    for item in args.set:
+        key, _, value = item.partition("=")
+        if key not in profile or not value.isdigit():
+            print(f"❌ --set inválido: {item} (claves: {', '.join(profile)})")
+            return 2
+        profile[key] = int(value)
+    try:
+        scales = [float(s) if "." in s else int(s) for s in args.scales.split(",")]
+    except ValueError:
+        print(f"❌ --scales inválido: {args.scales}")
+        return 2
+
+    try:
+        results = run_benchmark(
+            profile,
+            cases=args.cases.split(",") if args.cases else None,
+            scales=scales,
+            repeat=max(1, args.repeat),
+            config=load_config(args.config),
+            work_dir=args.work_dir,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    for name, exponent in results.get("growth", {}).items():
+        marker = "⚠️" if exponent >= 1.5 else "  "
+        print(f"{marker} {name}: crecimiento ~n^{exponent}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"📝 Resultados: {args.output}")
+
+    if not args.baseline:
+        return 0 if all(entry["ok"] for entry in results["cases"].values()) else 1
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare_results(results, baseline, threshold=args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        marker = "❌" if row["regression"] else "  "
+        label = row["case"] + (f" / {row['stage']}" if row["stage"] else "")
+        print(f"{marker} {label}: {row['baseline']:.4f}s -> {row['current']:.4f}s (x{row['ratio']:.2f})")
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones por encima de x{args.threshold}")
+        return 1
+    print(f"✅ Sin regresiones respecto a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import io
+import sys
+import glob
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import doc_to_scorm, html_to_scorm
+from .config import DEFAULT_CONFIG
+
+DOC_EXTENSIONS = (".docx", ".dotx", ".odt")
+HTML_EXTENSIONS = (".html", ".htm")
+INPUT_EXTENSIONS = DOC_EXTENSIONS + HTML_EXTENSIONS
+
+REPORT_FILE = "docs2scorm_report.json"
+
+
+def collect_inputs(patterns, recursive=False):
+    """
+    Expande las rutas de entrada (archivos, directorios o globs) a la lista ordenada y
+    sin duplicados de documentos convertibles.
+
+    :param patterns: Rutas, directorios o patrones glob.
+    :param recursive: Recorrer también los subdirectorios de los directorios indicados.
+    """
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                paths = []
+                for root, dirs, files in os.walk(pattern):
+                    dirs.sort()
+                    paths.extend(os.path.join(root, name) for name in sorted(files))
+            else:
+                paths = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+        elif glob.has_magic(pattern):
+            paths = sorted(glob.glob(pattern, recursive=True))
+        else:
+            paths = [pattern]
+
+        for path in paths:
+            if os.path.isdir(path) or not path.lower().endswith(INPUT_EXTENSIONS):
+                continue
+            if not os.path.isfile(path):
+                print(f"⚠️ Archivo no encontrado: {path}")
+                continue
+            found.append(os.path.normpath(path))
+
+    return list(dict.fromkeys(found))
+
+
+def output_paths(inputs, output_dir):
+    """Asigna a cada entrada <output_dir>/<nombre>.zip, numerando los nombres repetidos."""
+    used = set()
+    outputs = []
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name.lower() in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name.lower())
+        outputs.append(os.path.join(output_dir, f"{name}.zip"))
+    return outputs
+
+
+def load_config(config_path=None):
+    """Configuración por defecto, sobrescrita con las claves de un archivo JSON opcional."""
+    config = dict(DEFAULT_CONFIG)
+    if config_path:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+
+def convert_file(input_path, output_zip, config, trace=False):
+    """
+    Convierte un documento y devuelve su entrada del informe. Se ejecuta en los procesos
+    del pool: los mensajes de la conversión se capturan para no mezclar la salida de varios
+    documentos y se guardan en el informe si la conversión falla.
+
+    :param trace: Añadir a la entrada la traza por etapas de la conversión (ver instrumentation).
+    """
+    traces = []
+    if trace:
+        config = dict(config, trace_callback=traces.append)
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    log = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            if input_path.lower().endswith(HTML_EXTENSIONS):
+                ok = html_to_scorm([input_path], output_zip, config)
+            else:
+                ok = doc_to_scorm(input_path, output_zip, config)
+        if not ok:
+            error = log.getvalue().strip() or "La conversión no generó el paquete"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    result = {
+        "input": input_path,
+        "output": output_zip if error is None else None,
+        "ok": error is None,
+        "seconds": round(time.perf_counter() - started, 3),
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+        "input_size": os.path.getsize(input_path),
+        "output_size": os.path.getsize(output_zip) if error is None and os.path.exists(output_zip) else None,
+        "error": error,
+    }
+    if trace:
+        result["stages"] = traces[0]["stages"] if traces else None
+    return result
+
+
+def _file_config(config, input_path, title_from_file):
+    file_config = dict(config)
+    if title_from_file:
+        file_config["course_title"] = os.path.splitext(os.path.basename(input_path))[0]
+    return file_config
+
+
+def run_batch(inputs, output_dir, config=None, workers=None, title_from_file=True, progress=print, trace=False):
+    """
+    Convierte una lista de documentos en paralelo, un proceso por documento.
+    Un documento que falla no detiene el lote: su error queda en el informe.
+
+    :param inputs: Rutas de los documentos (.docx, .dotx, .odt, .html).
+    :param output_dir: Directorio donde se guardan los .zip.
+    :param config: Configuración común a todos los documentos.
+    :param workers: Procesos de conversión (None = núcleos disponibles, 1 = en el proceso actual).
+    :param title_from_file: Usar el nombre de cada archivo como título del curso.
+    :param progress: Función que recibe cada línea de progreso (None = sin progreso).
+    :param trace: Incluir en cada entrada del informe los tiempos, memoria y contadores por etapa.
+    :return: Informe con los totales y una entrada por documento, en el orden de inputs.
+    """
+    config = dict(config or DEFAULT_CONFIG)
+    # Una traza por archivo va al informe; una ruta común se sobrescribiría en cada documento
+    config["trace_callback"] = config["trace_file"] = None
+    if workers != 1 and config.get("image_workers") is None:
+        # Ya hay un proceso por documento: no abrir además un pool de imágenes en cada uno
+        config["image_workers"] = 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = output_paths(inputs, output_dir)
+    jobs = [(path, out, _file_config(config, path, title_from_file), trace) for path, out in zip(inputs, outputs)]
+
+    results = [None] * len(jobs)
+    total = len(jobs)
+    started = time.perf_counter()
+
+    def report_progress(done, result):
+        if progress is None:
+            return
+        status = "✅" if result["ok"] else "❌"
+        seconds = f" ({result['seconds']:.2f}s)" if result["seconds"] is not None else ""
+        progress(f"[{done}/{total}] {status} {result['input']}{seconds}")
+
+    if workers == 1 or total <= 1:
+        for index, job in enumerate(jobs):
+            results[index] = convert_file(*job)
+            report_progress(index + 1, results[index])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(convert_file, *job): index for index, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # El proceso murió (memoria, señal...): se registra y se sigue con el lote
+                    path, out = jobs[index][:2]
+                    results[index] = {
+                        "input": path, "output": None, "ok": False,
+                        "seconds": None, "cpu_seconds": None,
+                        "input_size": os.path.getsize(path), "output_size": None,
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+                report_progress(done, results[index])
+
+    failed = sum(1 for r in results if not r["ok"])
+    return {
+        "total": total,
+        "succeeded": total - failed,
+        "failed": failed,
+        "workers": workers or os.cpu_count(),
+        "seconds": round(time.perf_counter() - started, 3),
+        "output_bytes": sum(r["output_size"] or 0 for r in results),
+        "files": results,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="docs2scorm",
+        description="Convierte documentos .docx/.odt/.html en paquetes SCORM, en paralelo.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Archivos, directorios o patrones glob (p. ej. 'docs/**/*.docx')")
+    parser.add_argument("-o", "--output-dir", default="scorm", help="Directorio de salida de los .zip (por defecto: scorm)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Procesos de conversión (por defecto: todos los núcleos)")
+    parser.add_argument("-c", "--config", help="Archivo JSON con claves de configuración (ver config.py)")
+    parser.add_argument("-r", "--report", help=f"Ruta del informe JSON (por defecto: <output-dir>/{REPORT_FILE})")
+    parser.add_argument("--recursive", action="store_true", help="Recorrer los subdirectorios de los directorios indicados")
+    parser.add_argument("--title", help="Título común para todos los cursos (por defecto: el nombre de cada archivo)")
+    parser.add_argument("--trace", action="store_true", help="Guardar en el informe los tiempos, memoria y contadores por etapa")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No mostrar el progreso por archivo")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.workers is not None and args.workers < 1:
+        print("❌ --workers debe ser 1 o mayor")
+        return 2
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo leer la configuración {args.config}: {e}")
+        return 2
+    if args.title:
+        config["course_title"] = args.title
+
+    inputs = collect_inputs(args.inputs, recursive=args.recursive)
+    if not inputs:
+        print("⚠️ No se encontró ningún documento .docx, .dotx, .odt o .html")
+        return 1
+
+    print(f"📄 Convirtiendo {len(inputs)} documentos con {args.workers or os.cpu_count()} procesos...")
+    summary = run_batch(
+        inputs,
+        args.output_dir,
+        config=config,
+        workers=args.workers,
+        title_from_file=config.get("course_title") == DEFAULT_CONFIG["course_title"],
+        progress=None if args.quiet else print,
+        trace=args.trace,
+    )
+
+    report_path = args.report or os.path.join(args.output_dir, REPORT_FILE)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ {summary['succeeded']}/{summary['total']} convertidos en {summary['seconds']:.2f}s")
+    if summary["failed"]:
+        print(f"❌ {summary['failed']} con errores (ver {report_path})")
+    else:
+        print(f"📝 Informe: {report_path}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
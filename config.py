@@ -1,5 +1,29 @@
 DEFAULT_CONFIG = {
     "split_level": 2,               # Nivel de encabezado para dividir (h2)
     "split_tags": ["h2", "h3"],
-    "course_title": "Mi Curso SCORM"  # Título por defecto del curso
+    "course_title": "Mi Curso SCORM",  # Título por defecto del curso
+    "external_images": False,       # True: imágenes en images/<sha256>.<ext> en vez de base64
+    "image_max_width": 700,         # Ancho máximo de las imágenes procesadas (px)
+    "image_quality": 85,            # Calidad de recodificación
+    "image_format": "JPEG",         # Formato de salida de las imágenes (JPEG, PNG, WEBP o cualquiera que Pillow sepa guardar)
+    "image_cache_dir": None,        # Directorio de caché persistente de imágenes procesadas
+    "image_workers": None,          # Procesos para transformar imágenes (None = todos los núcleos)
+    "zip_stored_extensions": None,  # Extensiones sin comprimir en el ZIP (None = vídeo, audio, imagen...)
+    "zip_compresslevel": None,      # Nivel de deflate (0-9) para el resto (None = por defecto de zlib)
+    "shared_resources": False,      # True: CSS/JS comunes en course.css/course.js enlazados desde cada SCO
+    "prepaginate": False,           # True: partir las diapositivas al generar el paquete (estimando alturas)
+    "slide_viewport": [1280, 720],  # Ventana objetivo (ancho, alto) para la paginación previa
+    "single_page": False,           # True: un único index.html que carga fragmentos por sección
+    "html_parser": None,            # Backend de BeautifulSoup (None = lxml si está instalado, si no html.parser)
+    "incremental": False,           # True: reconstrucción incremental con <zip>.state.json
+    "reproducible": False,          # True: mismos bytes para la misma entrada (ids estables, fechas fijas)
+    "streaming_docx": False,        # True: leer el .docx en streaming (junto con external_images, memoria acotada; sin conversion_cache)
+    "build_workers": 1,             # Hilos para renderizar y comprimir las entradas del ZIP (1 = en serie, None = todos los núcleos)
+    "conversion_cache": False,      # True: reutilizar en memoria la lectura de un documento ya convertido (no con streaming_docx)
+    "conversion_cache_dir": None,   # Directorio de caché de conversiones en disco (también la activa)
+    "conversion_cache_memory_bytes": None,  # Tamaño máximo de la caché en memoria (None = 256 MB)
+    "conversion_cache_max_size": None,      # Tamaño máximo de la caché en disco (None = 1 GB)
+    "trace_callback": None,         # Función que recibe la traza por etapas (tiempos, memoria, contadores)
+    "trace_file": None,             # Ruta donde guardar la traza por etapas en JSON
+    "trace_memory": False           # True: medir también la memoria de Python con tracemalloc (más lento)
 }
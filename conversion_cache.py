@@ -0,0 +1,177 @@
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Caché de conversiones: guarda el resultado intermedio de leer un documento (HTML de mammoth,
+# bloques de docx_reader/odt_reader, HTML de build_html) junto con sus imágenes ya procesadas,
+# para que una segunda llamada sobre el mismo archivo (vista previa y luego SCORM, otro
+# split_tags u otro título) sólo repita el reparto en secciones y el empaquetado.
+#
+# La clave es el hash del contenido del archivo más el lector y las opciones que cambian su
+# salida. Hay un nivel en memoria (LRU por tamaño, por proceso) y otro opcional en disco
+# (conversion_cache_dir), que se recorta por tamaño borrando primero lo menos usado.
+
+CACHE_VERSION = 1
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+MAX_FILE_DIGESTS = 1024         # Hashes de archivo recordados (cada subida del servidor es una ruta nueva)
+
+_memory = OrderedDict()         # clave -> (valor, tamaño)
+_memory_size = 0
+_lock = threading.Lock()
+_file_digests = OrderedDict()   # (ruta, tamaño, mtime) -> sha256 del contenido (LRU)
+
+
+def cache_settings(config):
+    """
+    Ajustes de la caché a partir de la configuración, o None si está desactivada:
+    conversion_cache (bool), conversion_cache_dir (str), conversion_cache_memory_bytes y
+    conversion_cache_max_size (bytes en disco).
+    """
+    config = config or {}
+    if not config.get("conversion_cache") and not config.get("conversion_cache_dir"):
+        return None
+    return {
+        "memory_bytes": config.get("conversion_cache_memory_bytes") or DEFAULT_MEMORY_BYTES,
+        "dir": config.get("conversion_cache_dir"),
+        "max_size": config.get("conversion_cache_max_size") or DEFAULT_DISK_BYTES,
+    }
+
+
+def file_digest(path):
+    """sha256 del contenido del archivo; se recuerda (LRU) mientras no cambien su tamaño ni su fecha."""
+    stat = os.stat(path)
+    stat_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        digest = _file_digests.get(stat_key)
+        if digest is not None:
+            _file_digests.move_to_end(stat_key)
+            return digest
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _lock:
+        _file_digests[stat_key] = digest
+        while len(_file_digests) > MAX_FILE_DIGESTS:
+            _file_digests.popitem(last=False)
+    return digest
+
+
+def cache_key(path, reader, *options):
+    """Clave de una conversión: contenido del archivo, lector y opciones que afectan al resultado."""
+    digest = hashlib.sha256(f"{CACHE_VERSION}|{reader}|{file_digest(path)}".encode("utf-8"))
+    for option in options:
+        digest.update(b"|" + repr(option).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _value_size(value):
+    """Tamaño aproximado de una entrada (cadenas y bytes de su contenido)."""
+    pending, size = [value], 0
+    while pending:
+        item = pending.pop()
+        if isinstance(item, (str, bytes)):
+            size += len(item)
+        elif isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+    return size
+
+
+def _disk_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f"{key}.pickle")
+
+
+def _remember(key, value, size, memory_bytes):
+    global _memory_size
+    if size > memory_bytes:
+        return
+    with _lock:
+        if key in _memory:
+            _memory_size -= _memory.pop(key)[1]
+        _memory[key] = (value, size)
+        _memory_size += size
+        while _memory_size > memory_bytes:
+            _, (_, evicted) = _memory.popitem(last=False)
+            _memory_size -= evicted
+
+
+def get_cached(key, settings):
+    """Devuelve la entrada guardada para key (memoria y después disco) o None."""
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+            return entry[0]
+
+    if not settings.get("dir"):
+        return None
+    path = _disk_path(settings["dir"], key)
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        # La fecha de modificación hace de "último uso" para el recorte por tamaño
+        os.utime(path)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    _remember(key, value, _value_size(value), settings["memory_bytes"])
+    return value
+
+
+def put_cached(key, value, settings):
+    """Guarda value en memoria y, si hay directorio de caché, en disco."""
+    _remember(key, value, _value_size(value), settings["memory_bytes"])
+
+    cache_dir = settings.get("dir")
+    if not cache_dir:
+        return
+    path = _disk_path(cache_dir, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        trim_disk_cache(cache_dir, settings["max_size"])
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la conversión en caché: {e}")
+
+
+def trim_disk_cache(cache_dir, max_size):
+    """Borra las entradas usadas hace más tiempo hasta que el directorio ocupe como mucho max_size bytes."""
+    entries, total = [], 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".pickle"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def clear_memory_cache():
+    """Vacía el nivel en memoria (el de disco se mantiene)."""
+    global _memory_size
+    with _lock:
+        _memory.clear()
+        _memory_size = 0
+        _file_digests.clear()
@@ -1,35 +1,101 @@
 import os
-import mammoth
-from odf.opendocument import load
-from odf import text
-from odf import teletype
 import base64
-from bs4 import BeautifulSoup, NavigableString, Tag
+from .images import add_image, image_bytes
+from .conversion_cache import cache_key, get_cached, put_cached
+from .instrumentation import stage, count
+from .scorm_builder import html_to_hierarchical_tree, blocks_to_hierarchical_tree
 
-def read_docx_as_html(path):
+def read_docx_as_html(path, image_store=None):
+    """
+    Convierte un .docx a HTML con mammoth.
+
+    :param image_store: Almacén de imágenes (dict). Si se indica, las imágenes se guardan
+        en él y se referencian como 'images/<sha256>.<ext>' en lugar de data URIs base64.
+    """
+    import mammoth
+    images = {"images": 0, "image_bytes": 0}
     def embed_image(image):
         try:
-            with image.open() as image_bytes:
-                encoded = base64.b64encode(image_bytes.read()).decode("utf-8")
+            with image.open() as image_file:
+                data = image_file.read()
+                images["images"] += 1
+                images["image_bytes"] += len(data)
+                if image_store is not None:
+                    return {"src": add_image(image_store, data, image.content_type)}
+                encoded = base64.b64encode(data).decode("utf-8")
                 return {"src": f"data:{image.content_type};base64,{encoded}"}
         except:
             return {}
-    with open(path, "rb") as f:
-        result = mammoth.convert_to_html(f, convert_image=mammoth.images.inline(embed_image))
+    with stage("read_docx", bytes_in=os.path.getsize(path)) as record:
+        with open(path, "rb") as f:
+            result = mammoth.convert_to_html(f, convert_image=mammoth.images.inline(embed_image))
+        record.update(images, bytes_out=len(result.value))
         return result.value
 
-def read_odt_as_html(path):
-    odt = load(path)
-    html = ""
-    for child in odt.text.childNodes:
-        if child.qname == (text.H).qname:
-            level = child.getAttribute("outline-level")
-            html += f"<h{level}>{teletype.extractText(child)}</h{level}>\n"
-        elif child.qname == (text.P).qname:
-            html += f"<p>{teletype.extractText(child)}</p>\n"
-    return html
-
-def convert_to_tree(input_file, split_tags):
+def read_odt_as_html(path, image_store=None):
+    """
+    Convierte un .odt a HTML (encabezados, párrafos, listas, tablas, formato e imágenes).
+
+    :param image_store: Almacén de imágenes (dict). Si se indica, las imágenes de Pictures/
+        se referencian como 'images/<sha256>.<ext>' en lugar de data URIs base64.
+    """
+    from .odt_reader import iter_odt_blocks
+    return "".join(html for _, html, _ in iter_odt_blocks(path, image_store=image_store))
+
+def _read_document(input_file, ext, image_store, streaming):
+    """Lee el documento. Devuelve ("html", html) o ("blocks", iterador de bloques)."""
+    if ext == ".odt" or streaming:
+        # Lectura y reparto van juntos en la etapa read_split
+        count("bytes_in", os.path.getsize(input_file), stage_name="read_split")
+    if ext == ".odt":
+        # El .odt se lee siempre por bloques, en una sola pasada
+        from .odt_reader import iter_odt_blocks
+        return "blocks", iter_odt_blocks(input_file, image_store=image_store)
+    if streaming:
+        from .docx_reader import iter_docx_blocks
+        return "blocks", iter_docx_blocks(input_file, image_store=image_store)
+    return "html", read_docx_as_html(input_file, image_store=image_store)
+
+def convert_to_tree(input_file, split_tags, image_store=None, parser=None, streaming=False, cache=None):
+    """
+    Convierte un .docx/.dotx/.odt en (árbol de secciones, recursos).
+
+    :param streaming: Para .docx/.dotx, leer word/document.xml en streaming (docx_reader) y pasar
+        los bloques directamente al separador, sin montar el HTML del documento completo.
+    :param cache: Ajustes de conversion_cache.cache_settings. Si se indican, el HTML o los bloques
+        leídos y sus imágenes se guardan por hash del archivo, y una nueva conversión del mismo
+        contenido sólo repite el reparto en secciones. No se usa con streaming: guardar los
+        bloques y los bytes de las imágenes desharía la memoria acotada de la lectura en streaming.
+    """
     ext = os.path.splitext(input_file)[1].lower()
-    html = read_odt_as_html(input_file) if ext == ".odt" else read_docx_as_html(input_file)
-    return html_to_hierarchical_tree(html, split_tags)
\ No newline at end of file
+    if cache is not None and streaming and ext != ".odt":
+        print("⚠️ conversion_cache no se aplica con streaming_docx: el documento se lee sin caché")
+        cache = None
+    if cache is None:
+        kind, data = _read_document(input_file, ext, image_store, streaming)
+        if kind == "blocks":
+            return blocks_to_hierarchical_tree(data, split_tags)
+        return html_to_hierarchical_tree(data, split_tags, parser=parser)
+
+    reader = "odt" if ext == ".odt" else "mammoth"
+    key = cache_key(input_file, reader, image_store is not None)
+    with stage("cache_lookup") as record:
+        cached = get_cached(key, cache)
+        record["hits"] = int(cached is not None)
+    if cached is None:
+        local_store = {} if image_store is not None else None
+        kind, data = _read_document(input_file, ext, local_store, streaming)
+        if kind == "blocks":
+            with stage("read_blocks") as record:
+                data = list(data)
+                record["blocks"] = len(data)
+        # Las imágenes se guardan ya en bytes: las funciones de carga leen del archivo de origen
+        images = {rel_path: image_bytes(value) for rel_path, value in (local_store or {}).items()}
+        cached = {"kind": kind, "data": data, "images": images}
+        put_cached(key, cached, cache)
+
+    if image_store is not None:
+        image_store.update(cached["images"])
+    if cached["kind"] == "blocks":
+        return blocks_to_hierarchical_tree(iter(cached["data"]), split_tags)
+    return html_to_hierarchical_tree(cached["data"], split_tags, parser=parser)
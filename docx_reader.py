@@ -0,0 +1,493 @@
+import base64
+import hashlib
+import zipfile
+import posixpath
+from functools import partial
+from html import escape
+from lxml import etree
+from .images import add_image_loader, get_image_mime_type
+
+# Lector de .docx en streaming: recorre word/document.xml con iterparse y va entregando
+# bloques HTML (el mismo marcado que mammoth tras pasar por BeautifulSoup) sin cargar el
+# documento completo.
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+V_NS = 'urn:schemas-microsoft-com:vml'
+WP_NS = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+DOCUMENT_PART = 'word/document.xml'
+IMAGE_REL_TYPE = R_NS + '/image'
+HYPERLINK_REL_TYPE = R_NS + '/hyperlink'
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _w(name):
+    return f'{{{W_NS}}}{name}'
+
+
+_W_BODY = _w('body')
+_W_P = _w('p')
+_W_TBL = _w('tbl')
+_W_SDT = _w('sdt')
+_W_SDT_CONTENT = _w('sdtContent')
+_W_R = _w('r')
+_W_T = _w('t')
+_W_TAB = _w('tab')
+_W_PTAB = _w('ptab')
+_W_BR = _w('br')
+_W_CR = _w('cr')
+_W_NO_BREAK_HYPHEN = _w('noBreakHyphen')
+_W_DRAWING = _w('drawing')
+_W_PICT = _w('pict')
+_W_HYPERLINK = _w('hyperlink')
+_W_DEL = _w('del')
+_W_TR = _w('tr')
+_W_TC = _w('tc')
+_W_VAL = _w('val')
+# Contenedores de runs cuyo contenido se trata como si estuviera en el párrafo
+_INLINE_CONTAINERS = {_w('ins'), _w('smartTag'), _w('fldSimple'), _w('customXml'), _W_SDT, _W_SDT_CONTENT}
+
+
+def _on_off(rPr, name):
+    """Valor de una propiedad booleana de w:rPr (w:b, w:i...): presente y no desactivada."""
+    if rPr is None:
+        return False
+    element = rPr.find(_w(name))
+    if element is None:
+        return False
+    return element.get(_W_VAL) not in ('0', 'false', 'off')
+
+
+def _read_xml(zf, name):
+    try:
+        with zf.open(name) as f:
+            return etree.parse(f).getroot()
+    except KeyError:
+        return None
+
+
+def _read_member(path, name):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read(name)
+
+
+def _load_styles(zf):
+    """
+    styleId -> (nivel de encabezado o None, numPr del estilo o None) de los estilos de párrafo,
+    más el styleId del estilo de párrafo por defecto.
+    """
+    root = _read_xml(zf, 'word/styles.xml')
+    styles, default_id = {}, None
+    if root is None:
+        return styles, default_id
+    for style in root.iterfind(_w('style')):
+        if style.get(_w('type')) != 'paragraph':
+            continue
+        style_id = style.get(_w('styleId'))
+        name_el = style.find(_w('name'))
+        name = ((name_el.get(_W_VAL) if name_el is not None else None) or '').lower()
+        level = None
+        if name.startswith('heading'):
+            try:
+                level = int(name.split()[-1])
+            except (IndexError, ValueError):
+                level = None
+            if level is not None and not 1 <= level <= 6:
+                level = None
+        styles[style_id] = (level, style.find(f'{_w("pPr")}/{_w("numPr")}'))
+        if style.get(_w('default')) in ('1', 'true'):
+            default_id = style_id
+    return styles, default_id
+
+
+def _load_numbering(zf):
+    """numId -> {ilvl: 'ul' | 'ol'} según el numFmt de cada nivel de la lista."""
+    root = _read_xml(zf, 'word/numbering.xml')
+    if root is None:
+        return {}
+    abstract = {}
+    for abstract_num in root.iterfind(_w('abstractNum')):
+        levels = {}
+        for lvl in abstract_num.iterfind(_w('lvl')):
+            fmt = lvl.find(_w('numFmt'))
+            levels[lvl.get(_w('ilvl'))] = 'ul' if fmt is not None and fmt.get(_W_VAL) == 'bullet' else 'ol'
+        abstract[abstract_num.get(_w('abstractNumId'))] = levels
+    numbering = {}
+    for num in root.iterfind(_w('num')):
+        abstract_id = num.find(_w('abstractNumId'))
+        if abstract_id is not None:
+            numbering[num.get(_w('numId'))] = abstract.get(abstract_id.get(_W_VAL), {})
+    return numbering
+
+
+def _load_relationships(zf):
+    """rId -> (tipo, destino, externo) de word/_rels/document.xml.rels."""
+    root = _read_xml(zf, 'word/_rels/document.xml.rels')
+    rels = {}
+    if root is None:
+        return rels
+    for rel in root.iterfind(f'{{{PKG_REL_NS}}}Relationship'):
+        rels[rel.get('Id')] = (rel.get('Type'), rel.get('Target'), rel.get('TargetMode') == 'External')
+    return rels
+
+
+def _load_content_types(zf):
+    root = _read_xml(zf, '[Content_Types].xml')
+    defaults, overrides = {}, {}
+    if root is not None:
+        for default in root.iterfind(f'{{{CT_NS}}}Default'):
+            defaults[default.get('Extension', '').lower()] = default.get('ContentType')
+        for override in root.iterfind(f'{{{CT_NS}}}Override'):
+            overrides[override.get('PartName', '').lstrip('/')] = override.get('ContentType')
+    return defaults, overrides
+
+
+def _numbering_of(pPr, style_numPr):
+    """(numId, ilvl) de un párrafo de lista (o del estilo que lo define), o None."""
+    numPr = pPr.find(_w('numPr')) if pPr is not None else None
+    if numPr is None:
+        numPr = style_numPr
+    if numPr is None:
+        return None
+    num_id = numPr.find(_w('numId'))
+    num_id = num_id.get(_W_VAL) if num_id is not None else None
+    if not num_id or num_id == '0':
+        return None
+    ilvl = numPr.find(_w('ilvl'))
+    return num_id, ilvl.get(_W_VAL, '0') if ilvl is not None else '0'
+
+
+def _make_context(path, zf, image_store):
+    styles, default_style = _load_styles(zf)
+    return {
+        "path": path,
+        "zf": zf,
+        "image_store": image_store,
+        "styles": styles,
+        "default_style": default_style,
+        "numbering": _load_numbering(zf),
+        "rels": _load_relationships(zf),
+        "content_types": _load_content_types(zf),
+        "image_srcs": {},  # rId -> src ya resuelto (imágenes repetidas)
+    }
+
+
+def zip_image_src(zf, path, member, content_type, image_store=None):
+    """
+    URL de una imagen guardada dentro del ZIP del documento (.docx, .odt).
+
+    Con almacén, sólo se calcula su hash por bloques y se registra con una función que la lee
+    del documento al escribir el paquete ('images/<sha256>.<ext>'); sin almacén se devuelve un
+    data URI base64. Lanza KeyError si el archivo no existe en el ZIP.
+    """
+    if image_store is not None:
+        digest = hashlib.sha256()
+        with zf.open(member) as f:
+            for chunk in iter(partial(f.read, CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return add_image_loader(image_store, digest.hexdigest(), content_type or 'image/png',
+                                partial(_read_member, path, member))
+    data = zf.read(member)
+    content_type = content_type or get_image_mime_type(data)
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def _image_src(ctx, rel_id):
+    """URL de la imagen de una relación: images/<sha256>.<ext> con almacén, si no data URI."""
+    if rel_id in ctx["image_srcs"]:
+        return ctx["image_srcs"][rel_id]
+
+    src = None
+    rel_type, target, external = ctx["rels"].get(rel_id, (None, None, False))
+    if rel_type == IMAGE_REL_TYPE and target:
+        if external:
+            src = target
+        else:
+            member = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('word', target))
+            defaults, overrides = ctx["content_types"]
+            content_type = overrides.get(member) or defaults.get(posixpath.splitext(member)[1].lstrip('.').lower())
+            try:
+                src = zip_image_src(ctx["zf"], ctx["path"], member, content_type, ctx["image_store"])
+            except KeyError:
+                print(f"Error cargando imagen: {member} no está en el documento")
+    ctx["image_srcs"][rel_id] = src
+    return src
+
+
+def _image_html(ctx, element):
+    """<img> de un w:drawing o w:pict ('' si no tiene imagen)."""
+    if element.tag == _W_DRAWING:
+        blip = element.find(f'.//{{{A_NS}}}blip')
+        rel_id = blip.get(f'{{{R_NS}}}embed') if blip is not None else None
+        doc_pr = element.find(f'.//{{{WP_NS}}}docPr')
+        alt = doc_pr.get('descr') if doc_pr is not None else None
+    else:
+        imagedata = element.find(f'.//{{{V_NS}}}imagedata')
+        rel_id = imagedata.get(f'{{{R_NS}}}id') if imagedata is not None else None
+        alt = imagedata.get(f'{{{V_NS}}}title') if imagedata is not None else None
+    src = _image_src(ctx, rel_id) if rel_id else None
+    if not src:
+        return ''
+    alt_attr = f' alt="{escape(alt)}"' if alt else ''
+    return f'<img{alt_attr} src="{escape(src)}"/>'
+
+
+def _run_format(rPr):
+    if rPr is None:
+        return ()
+    vert_align = rPr.find(_w('vertAlign'))
+    vert_align = vert_align.get(_W_VAL) if vert_align is not None else None
+    return tuple(tag for tag, on in (
+        ('strong', _on_off(rPr, 'b')),
+        ('em', _on_off(rPr, 'i')),
+        ('s', _on_off(rPr, 'strike') or _on_off(rPr, 'dstrike')),
+        ('sup', vert_align == 'superscript'),
+        ('sub', vert_align == 'subscript'),
+    ) if on)
+
+
+def _run_pieces(ctx, r, pieces, text_parts):
+    """Añade a pieces los (formato, html) de un w:r y su texto plano a text_parts."""
+    fmt = _run_format(r.find(_w('rPr')))
+    for child in r:
+        tag = child.tag
+        if tag == _W_T:
+            if child.text:
+                pieces.append((fmt, escape(child.text, quote=False)))
+                text_parts.append(child.text)
+        elif tag == _W_TAB or tag == _W_PTAB:
+            pieces.append((fmt, '\t'))
+            text_parts.append('\t')
+        elif tag == _W_NO_BREAK_HYPHEN:
+            pieces.append((fmt, '-'))
+            text_parts.append('-')
+        elif tag == _W_CR or (tag == _W_BR and child.get(_w('type'), 'textWrapping') == 'textWrapping'):
+            pieces.append(((), '<br/>'))
+            text_parts.append(' ')
+        elif tag == _W_DRAWING or tag == _W_PICT:
+            image = _image_html(ctx, child)
+            if image:
+                pieces.append(((), image))
+
+
+def join_pieces(pieces):
+    """Une los fragmentos agrupando los consecutivos con el mismo formato."""
+    parts, i = [], 0
+    while i < len(pieces):
+        fmt = pieces[i][0]
+        j = i
+        while j < len(pieces) and pieces[j][0] == fmt:
+            j += 1
+        content = ''.join(html for _, html in pieces[i:j])
+        for tag in reversed(fmt):
+            content = f'<{tag}>{content}</{tag}>'
+        parts.append(content)
+        i = j
+    return ''.join(parts)
+
+
+def _inline_html(ctx, parent):
+    """HTML y texto plano del contenido en línea de un párrafo (runs, hipervínculos, imágenes)."""
+    parts, text_parts = [], []
+    pieces = []
+    pending = [iter(parent)]
+    while pending:
+        child = next(pending[-1], None)
+        if child is None:
+            pending.pop()
+            continue
+        tag = child.tag
+        if tag == _W_R:
+            _run_pieces(ctx, child, pieces, text_parts)
+        elif tag == _W_HYPERLINK:
+            link_pieces = []
+            for r in child.iter(_W_R):
+                _run_pieces(ctx, r, link_pieces, text_parts)
+            rel_id = child.get(f'{{{R_NS}}}id')
+            anchor = child.get(_w('anchor'))
+            href = None
+            if rel_id and rel_id in ctx["rels"]:
+                href = ctx["rels"][rel_id][1]
+            elif anchor:
+                href = f'#{anchor}'
+            if href:
+                parts.append(join_pieces(pieces))
+                pieces = []
+                parts.append(f'<a href="{escape(href)}">{join_pieces(link_pieces)}</a>')
+            else:
+                pieces.extend(link_pieces)
+        elif tag in _INLINE_CONTAINERS:
+            pending.append(iter(child))
+        elif tag == _W_DEL:
+            continue
+    parts.append(join_pieces(pieces))
+    return ''.join(parts), ''.join(text_parts)
+
+
+def _table_html(ctx, tbl):
+    """
+    Tabla con colspan (w:gridSpan) y rowspan (w:vMerge). Las filas marcadas como encabezado
+    (w:tblHeader) usan <th>. Cada celda se convierte con el mismo conversor de bloques.
+    """
+    rows = []
+    origin = {}  # columna de la rejilla -> celda que abrió la fusión vertical
+    for tr in tbl.iterchildren(_W_TR):
+        trPr = tr.find(_w('trPr'))
+        is_header = trPr is not None and _on_off(trPr, 'tblHeader')
+        cells, col = [], 0
+        for tc in tr.iterchildren(_W_TC):
+            tcPr = tc.find(_w('tcPr'))
+            span, merge = 1, None
+            if tcPr is not None:
+                grid_span = tcPr.find(_w('gridSpan'))
+                if grid_span is not None:
+                    try:
+                        span = max(1, int(grid_span.get(_W_VAL, '1')))
+                    except ValueError:
+                        span = 1
+                v_merge = tcPr.find(_w('vMerge'))
+                if v_merge is not None:
+                    merge = v_merge.get(_W_VAL, 'continue')
+            if merge == 'continue' and col in origin:
+                origin[col]['rowspan'] += 1
+            else:
+                cell = {'tag': 'th' if is_header else 'td', 'colspan': span, 'rowspan': 1,
+                        'html': _blocks_html(ctx, tc)}
+                cells.append(cell)
+                if merge == 'restart':
+                    origin[col] = cell
+                else:
+                    origin.pop(col, None)
+            col += span
+        rows.append(cells)
+
+    parts = ['<table>']
+    for cells in rows:
+        parts.append('<tr>')
+        for cell in cells:
+            attrs = ''
+            if cell['colspan'] > 1:
+                attrs += f' colspan="{cell["colspan"]}"'
+            if cell['rowspan'] > 1:
+                attrs += f' rowspan="{cell["rowspan"]}"'
+            parts.append(f'<{cell["tag"]}{attrs}>{cell["html"]}</{cell["tag"]}>')
+        parts.append('</tr>')
+    parts.append('</table>')
+    return ''.join(parts)
+
+
+def _block_writer(ctx):
+    """
+    Devuelve (feed, flush). feed(element) convierte un hijo de w:body (o de una celda) y
+    devuelve la lista de bloques (tag, html, texto) terminados; los párrafos de lista se
+    acumulan hasta que termina la lista. flush() cierra la lista pendiente.
+    """
+    list_parts = []
+    list_stack = []  # tags ('ul'/'ol') de las listas abiertas, uno por nivel
+
+    def close_list():
+        if not list_stack:
+            return []
+        tag = list_stack[0]
+        while list_stack:
+            list_parts.append(f'</li></{list_stack.pop()}>')
+        html = ''.join(list_parts)
+        list_parts.clear()
+        return [(tag, html, '')]
+
+    def add_list_item(list_tag, level, inner):
+        while len(list_stack) > level + 1:
+            list_parts.append(f'</li></{list_stack.pop()}>')
+        if len(list_stack) == level + 1 and list_stack[-1] != list_tag:
+            list_parts.append(f'</li></{list_stack.pop()}>')
+        if len(list_stack) == level + 1:
+            list_parts.append(f'</li><li>{inner}')
+            return
+        while len(list_stack) < level + 1:
+            list_parts.append(f'<{list_tag}><li>')
+            list_stack.append(list_tag)
+        list_parts.append(inner)
+
+    def feed(element):
+        tag = element.tag
+        if tag == _W_SDT:
+            blocks = []
+            content = element.find(_W_SDT_CONTENT)
+            for child in (content if content is not None else ()):
+                blocks.extend(feed(child))
+            return blocks
+        if tag == _W_TBL:
+            return close_list() + [('table', _table_html(ctx, element), '')]
+        if tag != _W_P:
+            return []
+
+        pPr = element.find(_w('pPr'))
+        style = pPr.find(_w('pStyle')) if pPr is not None else None
+        style_id = style.get(_W_VAL) if style is not None else ctx["default_style"]
+        level, style_numPr = ctx["styles"].get(style_id, (None, None))
+        inner, text = _inline_html(ctx, element)
+
+        numbering = _numbering_of(pPr, style_numPr) if level is None else None
+        # Como mammoth, un nivel que no está definido en numbering.xml no es una lista
+        list_tag = ctx["numbering"].get(numbering[0], {}).get(numbering[1]) if numbering else None
+        if list_tag is not None:
+            ilvl = numbering[1]
+            try:
+                depth = max(0, int(ilvl))
+            except ValueError:
+                depth = 0
+            add_list_item(list_tag, depth, inner)
+            return []
+
+        blocks = close_list()
+        if not inner.strip():
+            return blocks
+        if level is not None:
+            blocks.append((f'h{level}', f'<h{level}>{inner}</h{level}>', text))
+        else:
+            blocks.append(('p', f'<p>{inner}</p>', ''))
+        return blocks
+
+    return feed, close_list
+
+
+def _blocks_html(ctx, container):
+    """HTML de los bloques de un contenedor ya cargado (celda de tabla)."""
+    feed, flush = _block_writer(ctx)
+    parts = []
+    for child in container:
+        parts.extend(html for _, html, _ in feed(child))
+    parts.extend(html for _, html, _ in flush())
+    return ''.join(parts)
+
+
+def iter_docx_blocks(path, image_store=None):
+    """
+    Recorre un .docx/.dotx en streaming y genera sus bloques de primer nivel como tuplas
+    (tag, html, texto): encabezados (h1-h6, con su texto plano para el título), párrafos,
+    listas completas (ul/ol, anidadas por nivel) y tablas. Cada elemento del cuerpo se
+    libera en cuanto se ha convertido, así que la memoria no crece con el documento.
+
+    :param image_store: Almacén de imágenes (dict). Si se indica, las imágenes se registran por
+        su hash sin cargarlas (se leen del .docx al escribir el paquete) y se referencian como
+        'images/<sha256>.<ext>'; si no, se incrustan como data URIs base64.
+    """
+    with zipfile.ZipFile(path) as zf:
+        ctx = _make_context(path, zf, image_store)
+        feed, flush = _block_writer(ctx)
+        with zf.open(DOCUMENT_PART) as document:
+            for _, element in etree.iterparse(document, events=('end',), tag=(_W_P, _W_TBL, _W_SDT)):
+                parent = element.getparent()
+                if parent is None or parent.tag != _W_BODY:
+                    continue
+                yield from feed(element)
+                # Liberar el bloque ya convertido y los anteriores
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+        yield from flush()
@@ -1,9 +1,37 @@
 import os
 import base64
-from io import BytesIO
+from html import escape
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
-from PIL import Image
+from .instrumentation import stage
+from .images import add_image, process_images, DEFAULT_MAX_WIDTH, DEFAULT_QUALITY, DEFAULT_FORMAT
+
+# Namespaces necesarios para buscar elementos
+NAMESPACES = {
+    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'v': 'urn:schemas-microsoft-com:vml'
+}
+
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_W_TBL = qn('w:tbl')
+_W_TR = qn('w:tr')
+_W_TC = qn('w:tc')
+_W_VAL = qn('w:val')
+_W_TAB = qn('w:tab')
+_W_PTAB = qn('w:ptab')
+_W_BR = qn('w:br')
+_W_CR = qn('w:cr')
+_W_NO_BREAK_HYPHEN = qn('w:noBreakHyphen')
+_W_HYPERLINK = qn('w:hyperlink')
+_W_RPR = qn('w:rPr')
+_W_U = qn('w:u')
+_R_ID = qn('r:id')
+_W_PSTYLE = '{%s}pPr/{%s}pStyle' % (NAMESPACES['w'], NAMESPACES['w'])
 
 default_styles = {
     'body': 'font-family: system-ui, -apple-system, sans-serif; max-width: 800px; margin: 20px auto; padding: 20px; background: #f8fafc; color: #333;',
@@ -24,41 +52,7 @@ default_styles = {
     'td': 'padding: 8px; border: 1px solid #ccc;'
 }
 
-def _get_image_mime_type(image_data):
-    magic_numbers = {
-        b'\x89PNG\r\n\x1a\n': 'image/png',
-        b'\xFF\xD8\xFF': 'image/jpeg',
-        b'GIF87a': 'image/gif',
-        b'GIF89a': 'image/gif',
-        b'\x00\x00\x01\x00': 'image/x-icon',
-    }
-    for magic, mime in magic_numbers.items():
-        if image_data.startswith(magic):
-            return mime
-    return 'image/png'
-
-
-def _convert_image_to_base64(image_data):
-    try:
-        img = Image.open(BytesIO(image_data))
-        if img.mode in ('RGBA', 'LA'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1])
-            img = background
-
-        max_width = 700
-        if img.size[0] > max_width:
-            ratio = max_width / img.size[0]
-            img = img.resize((max_width, int(img.size[1] * ratio)), Image.Resampling.LANCZOS)
-
-        output = BytesIO()
-        img.save(output, format='JPEG', quality=85, optimize=True)
-        image_data = output.getvalue()
-        mime_type = 'image/jpeg'
-    except Exception as e:
-        print(f"Error procesando imagen: {e}")
-        mime_type = _get_image_mime_type(image_data)
-
+def _to_data_uri(image_data, mime_type):
     base64_data = base64.b64encode(image_data).decode('utf-8')
     return f'data:{mime_type};base64,{base64_data}'
 
@@ -72,25 +66,183 @@ def find_image_id(element):
     return None
 
 
-def is_list_paragraph(para):
-    """Detecta si el párrafo es parte de una lista (viñetas o numerada)"""
-    p = para._p
-    numPr = p.find('w:pPr/w:numPr', namespaces=p.nsmap)
-    return numPr is not None
-
-
-def get_list_type(para):
-    """Devuelve 'ul' o 'ol' según si es lista con viñetas o numerada"""
+def _on_off(rPr, name):
+    """Valor tri-estado (True/False/None) de una propiedad booleana de w:rPr (w:b, w:i...)"""
+    if rPr is None:
+        return None
+    element = rPr.find(qn(name))
+    if element is None:
+        return None
+    val = element.get(qn('w:val'))
+    return val is None or val in ('1', 'true', 'on')
+
+
+def _run_text(r):
+    """Texto de un w:r, con la misma traducción de tabs y saltos que python-docx"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or '')
+        elif tag == _W_TAB or tag == _W_PTAB:
+            parts.append('\t')
+        elif tag == _W_CR:
+            parts.append('\n')
+        elif tag == _W_BR:
+            if child.get(qn('w:type'), 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag == _W_NO_BREAK_HYPHEN:
+            parts.append('-')
+    return ''.join(parts)
+
+
+def _paragraph_text(p):
+    """Texto de un w:p incluyendo el de los hipervínculos (equivale a Paragraph.text)"""
+    parts = []
+    for child in p:
+        if child.tag == _W_R:
+            parts.append(_run_text(child))
+        elif child.tag == _W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(_W_R))
+    return ''.join(parts)
+
+
+def _format_run(r, styles, skip_images=False):
+    """HTML de un w:r con su negrita/cursiva/subrayado ('' si no tiene texto)."""
+    # Evitar procesar "runs" que en realidad son imágenes
+    if skip_images and (r.find('.//w:drawing', NAMESPACES) is not None or r.find('.//w:pict', NAMESPACES) is not None):
+        return ''
+
+    run_text = _run_text(r)
+    if not run_text.strip():
+        return ''
+
+    rPr = r.find(_W_RPR)
+    underline = rPr.find(_W_U) if rPr is not None else None
+    if underline is not None and underline.get(_W_VAL, 'single') != 'none':
+        run_text = f'<u>{run_text}</u>'
+    if _on_off(rPr, 'w:i'):
+        run_text = f'<em style="{styles["em"]}">{run_text}</em>'
+    if _on_off(rPr, 'w:b'):
+        run_text = f'<strong style="{styles["strong"]}">{run_text}</strong>'
+    return run_text
+
+
+def _format_runs(p, styles, skip_images=False, with_hyperlinks=False, hyperlinks=None):
+    """
+    Convierte los w:r directos de un párrafo en HTML con negrita/cursiva/subrayado.
+
+    :param with_hyperlinks: Incluir también los w:r de los hipervínculos (como _paragraph_text).
+    :param hyperlinks: rId -> URL de los hipervínculos externos del documento; los que aparecen
+        se convierten en <a href>, el resto se queda en su texto.
+    """
+    formatted = []
+    for child in p.iterchildren(_W_R, _W_HYPERLINK):
+        if child.tag == _W_R:
+            formatted.append(_format_run(child, styles, skip_images))
+        elif with_hyperlinks:
+            text = ''.join(_format_run(r, styles, skip_images) for r in child.iterchildren(_W_R))
+            href = (hyperlinks or {}).get(child.get(_R_ID))
+            formatted.append(f'<a href="{escape(href)}">{text}</a>' if text and href else text)
+    return ''.join(formatted)
+
+
+def _grid_value(parent, name, default):
+    """Valor entero w:val de un hijo de w:trPr / w:tcPr (gridSpan, gridBefore...)."""
+    element = parent.find(qn(name)) if parent is not None else None
+    if element is None:
+        return default
     try:
-        if "number" in para.style.name.lower():
-            return "ol"
-        return "ul"
-    except:
-        return "ul"
-
-
-def build_html(file_path, output_path=None, styles=None):
-    doc = Document(file_path)
+        return max(0, int(element.get(_W_VAL, default)))
+    except ValueError:
+        return default
+
+
+def _table_html(tbl, styles, hyperlinks=None):
+    """
+    Convierte un w:tbl leyendo w:tr / w:tc una sola vez (lineal en el número de celdas).
+    w:gridSpan se convierte en colspan y w:vMerge en rowspan, sin repetir las celdas fusionadas,
+    y el texto de cada celda conserva la negrita/cursiva/subrayado de sus runs y sus enlaces
+    (hyperlinks: rId -> URL, ver _format_runs).
+    La primera fila va con <th>; una tabla de una sola celda, sólo con <td>.
+    """
+    rows = []
+    origin = {}  # columna de la rejilla -> celda que abrió la fusión vertical
+    for tr in tbl.iterchildren(_W_TR):
+        cells = []
+        col = _grid_value(tr.find(qn('w:trPr')), 'w:gridBefore', 0)
+        for tc in tr.iterchildren(_W_TC):
+            tcPr = tc.find(qn('w:tcPr'))
+            span = max(1, _grid_value(tcPr, 'w:gridSpan', 1))
+            v_merge = tcPr.find(qn('w:vMerge')) if tcPr is not None else None
+            merge = v_merge.get(_W_VAL, 'continue') if v_merge is not None else None
+            if merge == 'continue' and col in origin:
+                origin[col]['rowspan'] += 1
+            else:
+                paragraphs = (_format_runs(p, styles, with_hyperlinks=True, hyperlinks=hyperlinks).strip()
+                              for p in tc.iterchildren(_W_P))
+                cell = {'colspan': span, 'rowspan': 1, 'html': ' '.join(html for html in paragraphs if html)}
+                cells.append(cell)
+                if merge == 'restart':
+                    origin[col] = cell
+                else:
+                    origin.pop(col, None)
+            col += span
+        rows.append(cells)
+
+    grid = tbl.find('w:tblGrid', NAMESPACES)
+    single_cell = len(rows) == 1 and len(rows[0]) == 1 and rows[0][0]['colspan'] == 1 and (
+        grid is None or len(grid) <= 1)
+
+    parts = [f'<table style="{styles.get("table", "")}">']
+    for row_idx, cells in enumerate(rows):
+        tag = 'th' if row_idx == 0 and not single_cell else 'td'
+        cell_style = styles.get(tag, "")
+        parts.append('<tr>')
+        for cell in cells:
+            attrs = ''
+            if cell['colspan'] > 1:
+                attrs += f' colspan="{cell["colspan"]}"'
+            if cell['rowspan'] > 1:
+                attrs += f' rowspan="{cell["rowspan"]}"'
+            parts.append(f'<{tag}{attrs} style="{cell_style}">{cell["html"]}</{tag}>')
+        parts.append('</tr>')
+    parts.append('</table>')
+    return parts
+
+
+def _paragraph_style_names(doc):
+    """Mapa styleId -> nombre (en minúsculas) de los estilos de párrafo, más el nombre por defecto"""
+    names = {}
+    for style in doc.styles:
+        if style.type == WD_STYLE_TYPE.PARAGRAPH:
+            names[style.style_id] = (style.name or "").lower()
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    default_name = ((default.name if default is not None else None) or "").lower()
+    return names, default_name
+
+
+def _image_block(src, styles):
+    return [
+        f'<div style="{styles["image"]}">',
+        f'<img src="{src}" alt="Imagen del documento" loading="lazy" style="{styles["img"]}">',
+        '</div>',
+    ]
+
+
+def build_html(file_path, output_path=None, styles=None, image_store=None, config=None):
+    """
+    Convierte un .docx en un documento HTML autocontenido.
+
+    :param image_store: Almacén de imágenes (dict). Si se indica, las imágenes se referencian
+        como 'images/<sha256>.<ext>' en lugar de incrustarse en base64; el llamador
+        debe escribirlas con images.save_images.
+    :param config: Diccionario con los ajustes de imagen opcionales (image_max_width,
+        image_quality, image_format, image_cache_dir, image_workers).
+    """
+    config = config or {}
+    with stage("docx_load", bytes_in=os.path.getsize(file_path)):
+        doc = Document(file_path)
     html_content = []
 
     if not styles:
@@ -109,42 +261,57 @@ def build_html(file_path, output_path=None, styles=None):
     ])
 
     try:
-        # Mapear imágenes
-        image_rels = {}
+        # Mapear imágenes: se transforman todas de una vez (en paralelo y con caché)
+        # antes de montar el HTML. Los enlaces externos se usan en las celdas de las tablas
+        image_rids, image_blobs = [], []
+        hyperlinks = {}
         for rel in doc.part.rels.values():
-            if "image" in rel.reltype:
+            if "hyperlink" in rel.reltype and rel.is_external:
+                hyperlinks[rel.rId] = rel.target_ref
+            elif "image" in rel.reltype:
                 try:
-                    image_data = rel.target_part.blob
-                    image_base64 = _convert_image_to_base64(image_data)
-                    image_rels[rel.rId] = image_base64
+                    image_blobs.append(rel.target_part.blob)
+                    image_rids.append(rel.rId)
                 except Exception as e:
                     print(f"Error cargando imagen: {e}")
 
+        with stage("images", images=len(image_blobs), bytes_in=sum(map(len, image_blobs))) as record:
+            processed_images = process_images(
+                image_blobs,
+                max_width=config.get("image_max_width", DEFAULT_MAX_WIDTH),
+                quality=config.get("image_quality", DEFAULT_QUALITY),
+                image_format=config.get("image_format", DEFAULT_FORMAT),
+                cache_dir=config.get("image_cache_dir"),
+                workers=config.get("image_workers")
+            )
+            record["bytes_out"] = sum(len(image_data) for image_data, _ in processed_images)
+
+        image_rels = {}
+        for rel_id, (image_data, mime_type) in zip(image_rids, processed_images):
+            if image_store is not None:
+                image_rels[rel_id] = add_image(image_store, image_data, mime_type)
+            else:
+                image_rels[rel_id] = _to_data_uri(image_data, mime_type)
+
+        # Los estilos se resuelven una única vez: el recorrido trabaja sobre el XML
+        # del cuerpo sin volver a construir doc.paragraphs / doc.tables
+        style_names, default_style_name = _paragraph_style_names(doc)
+
         in_list = False
         list_tag = None
 
-        body_elements = list(doc.element.body)
-        
-        # Namespaces necesarios para buscar elementos
-        namespaces = {
-            'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-            'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
-            'v': 'urn:schemas-microsoft-com:vml'
-        }
-
-        for element in body_elements:
+        for element in doc.element.body.iterchildren():
             # Procesar párrafo
-            if element.tag.endswith('p'):
-                para = next((p for p in doc.paragraphs if p._p == element), None)
-                if not para:
-                    continue
-
-                text = para.text.strip()
-                style_name = getattr(para.style, "name", "").lower()
+            if element.tag == _W_P:
+                text = _paragraph_text(element).strip()
+                pStyle = element.find(_W_PSTYLE)
+                style_id = pStyle.get(qn('w:val')) if pStyle is not None else None
+                style_name = style_names.get(style_id, default_style_name)
+                is_heading = style_name.startswith("heading")
+                is_list = element.find('w:pPr/w:numPr', NAMESPACES) is not None
 
                 # Encabezados
-                if style_name.startswith("heading"):
+                if is_heading:
                     try:
                         level = int(style_name.split()[-1])
                         heading_style = styles.get(f"h{level}", "")
@@ -154,8 +321,8 @@ def build_html(file_path, output_path=None, styles=None):
                         pass
 
                 # Listas
-                if is_list_paragraph(para):
-                    tag = get_list_type(para)
+                if is_list:
+                    tag = "ol" if "number" in style_name else "ul"
 
                     if not in_list or list_tag != tag:
                         if in_list:
@@ -164,21 +331,7 @@ def build_html(file_path, output_path=None, styles=None):
                         in_list = True
                         list_tag = tag
 
-                    formatted_text = ""
-                    for run in para.runs:
-                        run_text = run.text
-                        if not run_text.strip():
-                            continue
-                        if run.bold and run.italic:
-                            formatted_text += f'<strong style="{styles["strong"]}"><em style="{styles["em"]}">{run_text}</em></strong>'
-                        elif run.bold:
-                            formatted_text += f'<strong style="{styles["strong"]}">{run_text}</strong>'
-                        elif run.italic:
-                            formatted_text += f'<em style="{styles["em"]}">{run_text}</em>'
-                        else:
-                            formatted_text += run_text
-
-                    html_content.append(f'<li>{formatted_text}</li>')
+                    html_content.append(f'<li>{_format_runs(element, styles)}</li>')
                     continue
                 else:
                     if in_list:
@@ -188,88 +341,36 @@ def build_html(file_path, output_path=None, styles=None):
 
                 # Imágenes en línea
                 has_images = False
-                xml_element = para._element
-                
-                for drawing in xml_element.findall('.//w:drawing', namespaces):
+
+                for drawing in element.iterfind('.//w:drawing', NAMESPACES):
                     rel_id = find_image_id(drawing)
                     if rel_id and rel_id in image_rels:
-                        html_content.append(f'<div style="{styles["image"]}">')
-                        html_content.append(f'<img src="{image_rels[rel_id]}" alt="Imagen del documento" loading="lazy" style="{styles["img"]}">')
-                        html_content.append('</div>')
+                        html_content.extend(_image_block(image_rels[rel_id], styles))
                         has_images = True
 
                 if not has_images:
-                    for pict in xml_element.findall('.//w:pict', namespaces):
-                        imagedata = pict.find('.//v:imagedata', namespaces)
+                    for pict in element.iterfind('.//w:pict', NAMESPACES):
+                        imagedata = pict.find('.//v:imagedata', NAMESPACES)
                         if imagedata is not None:
                             rel_id = imagedata.get(qn('r:id'))
                             if rel_id and rel_id in image_rels:
-                                html_content.append(f'<div style="{styles["image"]}">')
-                                html_content.append(f'<img src="{image_rels[rel_id]}" alt="Imagen del documento" loading="lazy" style="{styles["img"]}">')
-                                html_content.append('</div>')
-                                has_images = True 
-                
-                if not style_name.startswith("heading") and not is_list_paragraph(para):
-                    if text or not has_images:
-                        formatted_text = ""
-                        for run in para.runs:
-                            # Evitar procesar "runs" que en realidad son imágenes
-                            if run._r.find('.//w:drawing', namespaces) is not None or run._r.find('.//w:pict', namespaces) is not None:
-                                continue
-                            
-                            run_text = run.text # ¡CORRECCIÓN! Asignar run_text DENTRO del bucle
-                            if not run_text.strip():
-                                continue
-                                
-                            if run.bold and run.italic:
-                                formatted_text += f'<strong style="{styles["strong"]}"><em style="{styles["em"]}">{run_text}</em></strong>'
-                            elif run.bold:
-                                formatted_text += f'<strong style="{styles["strong"]}">{run_text}</strong>'
-                            elif run.italic:
-                                formatted_text += f'<em style="{styles["em"]}">{run_text}</em>'
-                            else:
-                                formatted_text += run_text
+                                html_content.extend(_image_block(image_rels[rel_id], styles))
+                                has_images = True
 
+                if not is_heading:
+                    if text or not has_images:
+                        formatted_text = _format_runs(element, styles, skip_images=True)
                         if formatted_text.strip():
                             html_content.append(f'<p style="{styles["p"]}">{formatted_text}</p>')
 
             # Procesar tabla
-            elif element.tag.endswith('tbl'):
+            elif element.tag == _W_TBL:
                 if in_list:
                     html_content.append(f'</{list_tag}>')
                     in_list = False
                     list_tag = None
 
-                table = next((t for t in doc.tables if t._tbl == element), None)
-                if not table:
-                    continue
-
-                rows_count = len(table.rows)
-                cols_count = len(table.rows[0].cells) if rows_count > 0 else 0
-
-                # Siempre envolvemos en <table>
-                html_content.append(f'<table style="{styles.get("table", "")}">')
-
-                # Caso 1x1: usar SOLO <td> (sin <th>, por lo que no aplica color de encabezado)
-                if rows_count == 1 and cols_count == 1:
-                    single_cell_text = ' '.join(p.text.strip() for p in table.rows[0].cells[0].paragraphs)
-                    html_content.append('<tr>')
-                    html_content.append(f'<td style="{styles.get("td", "")}">{single_cell_text}</td>')
-                    html_content.append('</tr>')
-                    html_content.append('</table>')
-                    continue
-
-                # Resto de tablas: primera fila como encabezado <th>, demás <td>
-                for row_idx, row in enumerate(table.rows):
-                    html_content.append('<tr>')
-                    for cell in row.cells:
-                        cell_text = ' '.join(paragraph.text.strip() for paragraph in cell.paragraphs)
-                        if row_idx == 0:
-                            html_content.append(f'<th style="{styles.get("th", "")}">{cell_text}</th>')
-                        else:
-                            html_content.append(f'<td style="{styles.get("td", "")}">{cell_text}</td>')
-                    html_content.append('</tr>')
-                html_content.append('</table>')
+                html_content.extend(_table_html(element, styles, hyperlinks))
 
         # Cerrar lista si quedó abierta
         if in_list:
@@ -0,0 +1,204 @@
+import os
+import hashlib
+import mimetypes
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+IMAGES_DIR = "images"
+
+# Ajustes por defecto de la transformación de imágenes (ver transcode_image)
+DEFAULT_MAX_WIDTH = 700
+DEFAULT_QUALITY = 85
+DEFAULT_FORMAT = "JPEG"
+
+_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/x-icon': 'ico',
+    'image/svg+xml': 'svg',
+}
+
+
+def _extension_for(content_type):
+    if content_type in _EXTENSIONS:
+        return _EXTENSIONS[content_type]
+    guessed = mimetypes.guess_extension(content_type or "")
+    if guessed:
+        return guessed.lstrip('.')
+    # image/x-emf -> emf, image/tiff -> tiff...
+    subtype = (content_type or "").split('/')[-1]
+    return subtype.replace('x-', '', 1) or 'bin'
+
+
+def add_image(image_store, image_data, content_type):
+    """
+    Registra una imagen en el almacén (dict nombre_relativo -> bytes) y devuelve
+    su URL relativa 'images/<sha256>.<ext>'. Las imágenes repetidas comparten entrada.
+    """
+    digest = hashlib.sha256(image_data).hexdigest()
+    rel_path = f"{IMAGES_DIR}/{digest}.{_extension_for(content_type)}"
+    if rel_path not in image_store:
+        image_store[rel_path] = image_data
+    return rel_path
+
+
+def add_image_loader(image_store, digest, content_type, load):
+    """
+    Como add_image para una imagen que no se quiere tener en memoria: se registra por su hash
+    sha256 (digest) con una función load() que devuelve los bytes cuando se escribe el paquete.
+    """
+    rel_path = f"{IMAGES_DIR}/{digest}.{_extension_for(content_type)}"
+    if rel_path not in image_store:
+        image_store[rel_path] = load
+    return rel_path
+
+
+def image_bytes(value):
+    """Bytes de una entrada del almacén (los datos o el resultado de su función de carga)."""
+    return value() if callable(value) else value
+
+
+def save_images(image_store, output_dir):
+    """
+    Escribe cada imagen del almacén una sola vez bajo output_dir/images/.
+    Devuelve la lista de rutas relativas escritas (para el manifest).
+    """
+    if not image_store:
+        return []
+    os.makedirs(os.path.join(output_dir, IMAGES_DIR), exist_ok=True)
+    written = []
+    for rel_path, image_data in image_store.items():
+        path = os.path.join(output_dir, *rel_path.split('/'))
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(image_bytes(image_data))
+        written.append(rel_path)
+    return written
+
+
+def get_image_mime_type(image_data):
+    magic_numbers = {
+        b'\x89PNG\r\n\x1a\n': 'image/png',
+        b'\xFF\xD8\xFF': 'image/jpeg',
+        b'GIF87a': 'image/gif',
+        b'GIF89a': 'image/gif',
+        b'\x00\x00\x01\x00': 'image/x-icon',
+    }
+    for magic, mime in magic_numbers.items():
+        if image_data.startswith(magic):
+            return mime
+    return 'image/png'
+
+
+def transcode_image(image_data, max_width=DEFAULT_MAX_WIDTH, quality=DEFAULT_QUALITY, image_format=DEFAULT_FORMAT):
+    """
+    Aplana la transparencia sobre blanco, reduce a max_width (LANCZOS) y recodifica.
+    Devuelve (bytes, mime_type); si Pillow no puede con la imagen, devuelve la original.
+    """
+    from PIL import Image
+    try:
+        img = Image.open(BytesIO(image_data))
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+
+        if img.size[0] > max_width:
+            ratio = max_width / img.size[0]
+            img = img.resize((max_width, int(img.size[1] * ratio)), Image.Resampling.LANCZOS)
+
+        output = BytesIO()
+        img.save(output, format=image_format, quality=quality, optimize=True)
+        image_data = output.getvalue()
+        # Tipo MIME del formato en el que Pillow ha guardado (GIF, BMP, TIFF... no son JPEG)
+        return image_data, Image.MIME.get(image_format.upper()) or get_image_mime_type(image_data)
+    except Exception as e:
+        print(f"Error procesando imagen: {e}")
+        return image_data, get_image_mime_type(image_data)
+
+
+def _transcode_job(args):
+    image_data, max_width, quality, image_format = args
+    return transcode_image(image_data, max_width, quality, image_format)
+
+
+def _cache_key(image_data, max_width, quality, image_format):
+    digest = hashlib.sha256(image_data)
+    digest.update(f"|{max_width}|{quality}|{image_format.upper()}".encode("ascii"))
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def _read_cache(cache_dir, key):
+    try:
+        with open(_cache_path(cache_dir, key), "rb") as f:
+            mime_type, _, image_data = f.read().partition(b"\n")
+        return image_data, mime_type.decode("ascii")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _write_cache(cache_dir, key, image_data, mime_type):
+    path = _cache_path(cache_dir, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(mime_type.encode("ascii") + b"\n" + image_data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la imagen en caché: {e}")
+
+
+def process_images(images, max_width=DEFAULT_MAX_WIDTH, quality=DEFAULT_QUALITY, image_format=DEFAULT_FORMAT,
+                   cache_dir=None, workers=None):
+    """
+    Transforma un lote de imágenes (lista de bytes) con transcode_image y devuelve
+    la lista de (bytes, mime_type) en el mismo orden.
+
+    :param cache_dir: Directorio de caché persistente. La clave es el hash de los bytes
+        de origen más los ajustes (max_width, quality, image_format), de modo que una
+        reconstrucción sin cambios no hace ningún trabajo con Pillow.
+    :param workers: Procesos para las imágenes no cacheadas (None = núcleos disponibles,
+        1 = en el proceso actual).
+    """
+    results = [None] * len(images)
+    cached_results = {}
+    pending = {}  # clave -> índices de las imágenes (repetidas) que la comparten
+
+    for index, image_data in enumerate(images):
+        key = _cache_key(image_data, max_width, quality, image_format)
+        if key in pending:
+            pending[key].append(index)
+            continue
+        if key not in cached_results and cache_dir:
+            cached = _read_cache(cache_dir, key)
+            if cached is not None:
+                cached_results[key] = cached
+        if key in cached_results:
+            results[index] = cached_results[key]
+        else:
+            pending[key] = [index]
+
+    jobs = [(images[idxs[0]], max_width, quality, image_format) for idxs in pending.values()]
+    if len(jobs) > 1 and workers != 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outputs = list(executor.map(_transcode_job, jobs))
+        except Exception as e:
+            print(f"⚠️ Procesado paralelo de imágenes no disponible ({e}), se procesan en serie.")
+            outputs = [_transcode_job(job) for job in jobs]
+    else:
+        outputs = [_transcode_job(job) for job in jobs]
+
+    for (key, idxs), output in zip(pending.items(), outputs):
+        if cache_dir:
+            _write_cache(cache_dir, key, *output)
+        for index in idxs:
+            results[index] = output
+
+    return results
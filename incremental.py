@@ -0,0 +1,113 @@
+import os
+import copy
+import json
+import struct
+import hashlib
+import zipfile
+
+STATE_VERSION = 2
+
+_LOCAL_HEADER_SIZE = 30
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def state_path_for(output_zip_path):
+    """Ruta del archivo de estado de compilación asociado a un ZIP de salida."""
+    return f"{output_zip_path}.state.json"
+
+
+def hash_key(*parts):
+    """Hash estable (sha256) de una serie de valores str/bytes/None."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\x00"
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def load_build_state(path, options_key):
+    """
+    Carga el estado de la compilación anterior: {"entries": {nombre: {"input", "output", "compression"}}}.
+    Devuelve un estado vacío si no existe, está dañado o se generó con otras opciones.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"entries": {}}
+    if state.get("version") != STATE_VERSION or state.get("options") != options_key:
+        return {"entries": {}}
+    return state
+
+
+def save_build_state(path, options_key, entries):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "options": options_key, "entries": entries}, f)
+    os.replace(tmp_path, path)
+
+
+def write_raw_zip_entry(dst_zip, zinfo, chunks, zip64=None):
+    """
+    Añade a dst_zip una entrada cuyos datos ya vienen comprimidos: zinfo debe traer CRC,
+    file_size y compress_size, y chunks es un iterable con los compress_size bytes. zipfile no
+    ofrece esta operación, así que se escribe la cabecera local y los datos en bruto manteniendo
+    el índice interno de dst_zip igual que ZipFile.write.
+
+    Depende de atributos privados de ZipFile (_lock, fp, _seekable, start_dir, _writecheck,
+    _didModify): comprobado en CPython 3.8 a 3.13 (ver python_requires en setup.py y
+    tests/test_incremental.py).
+    """
+    if zip64 is None:
+        zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+
+    with dst_zip._lock:
+        dst_fp = dst_zip.fp
+        if dst_zip._seekable:
+            dst_fp.seek(dst_zip.start_dir)
+        zinfo.header_offset = dst_fp.tell()
+        dst_zip._writecheck(zinfo)
+        dst_zip._didModify = True
+        dst_fp.write(zinfo.FileHeader(zip64))
+        for chunk in chunks:
+            dst_fp.write(chunk)
+
+        dst_zip.filelist.append(zinfo)
+        dst_zip.NameToInfo[zinfo.filename] = zinfo
+        dst_zip.start_dir = dst_fp.tell()
+
+
+def _read_compressed(fp, size, name, chunk_size):
+    remaining = size
+    while remaining > 0:
+        chunk = fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Entrada truncada en el ZIP anterior: {name}")
+        yield chunk
+        remaining -= len(chunk)
+
+
+def copy_zip_entry(src_zip, dst_zip, name, chunk_size=1024 * 1024):
+    """
+    Copia una entrada de src_zip a dst_zip tal cual está comprimida (sin descomprimir ni
+    recomprimir).
+    """
+    info = src_zip.getinfo(name)
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    strip_extra = getattr(zipfile, "_strip_extra", None)
+    if strip_extra is not None:
+        # La cabecera ZIP64 se regenera si hace falta
+        new_info.extra = strip_extra(info.extra, (1,))
+
+    with src_zip._lock:
+        src_fp = src_zip.fp
+        src_fp.seek(info.header_offset)
+        header = src_fp.read(_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        src_fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+        write_raw_zip_entry(dst_zip, new_info, _read_compressed(src_fp, info.compress_size, name, chunk_size))
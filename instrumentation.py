@@ -0,0 +1,151 @@
+import sys
+import json
+import time
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Traza activa del contexto actual (None = sin instrumentación: las etapas no miden nada)
+_current_trace = contextvars.ContextVar("docs2scorm_trace", default=None)
+
+
+def _peak_rss_kb():
+    """Pico de memoria residente del proceso en KB (None si la plataforma no lo ofrece)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS lo da en bytes, Linux en KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def start_trace(name, callback=None, memory=False, **info):
+    """
+    Activa una traza para el contexto actual y la devuelve.
+
+    :param name: Operación trazada (doc_to_scorm, html_to_scorm...).
+    :param callback: Función que recibe la traza completa al terminar (finish_trace).
+    :param memory: Medir también la memoria de Python con tracemalloc (más lento).
+    :param info: Datos adicionales que se guardan en la traza (p. ej. input=ruta).
+    """
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    trace = {
+        "name": name,
+        **info,
+        "wall": 0.0,
+        "cpu": 0.0,
+        "peak_rss_kb": None,
+        "stages": {},
+        "_start": (time.perf_counter(), time.process_time()),
+        "_memory": memory,
+        "_stopped_tracemalloc": started_tracemalloc,
+        "_callback": callback,
+        "_lock": threading.Lock(),
+        "_token": None,
+    }
+    trace["_token"] = _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    """Cierra la traza, desactiva la instrumentación del contexto y llama al callback."""
+    wall_start, cpu_start = trace.pop("_start")
+    trace["wall"] = round(time.perf_counter() - wall_start, 6)
+    trace["cpu"] = round(time.process_time() - cpu_start, 6)
+    trace["peak_rss_kb"] = _peak_rss_kb()
+    if trace.pop("_memory"):
+        trace["tracemalloc_peak"] = tracemalloc.get_traced_memory()[1]
+    if trace.pop("_stopped_tracemalloc"):
+        tracemalloc.stop()
+    _current_trace.reset(trace.pop("_token"))
+    del trace["_lock"]
+    callback = trace.pop("_callback")
+    if callback is not None:
+        callback(trace)
+    return trace
+
+
+def write_trace(trace, path):
+    """Guarda la traza como JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def traced(config, name, **info):
+    """
+    Traza una operación completa según la configuración: trace_callback (función que recibe la
+    traza), trace_file (ruta del JSON) y trace_memory (tracemalloc). Sin ninguna de las dos
+    primeras no se activa nada.
+    """
+    config = config or {}
+    callback, path = config.get("trace_callback"), config.get("trace_file")
+    if callback is None and not path:
+        yield None
+        return
+    trace = start_trace(name, callback=callback, memory=config.get("trace_memory", False), **info)
+    try:
+        yield trace
+    except Exception as e:
+        trace["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        finish_trace(trace)
+        if path:
+            write_trace(trace, path)
+
+
+@contextmanager
+def stage(name, **counters):
+    """
+    Mide una etapa (tiempo real, CPU, pico de RSS y, si está activo, tracemalloc) y la acumula
+    en la traza activa bajo su nombre: las etapas que se repiten (un render por SCO, una
+    entrada del ZIP...) suman sus tiempos y contadores y cuentan sus llamadas.
+    Devuelve un dict en el que el código puede anotar contadores (nodos, imágenes, bytes...).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        # Un dict propio por llamada: las etapas anidadas o de otros hilos no se pisan
+        yield {}
+        return
+
+    record = dict(counters)
+    memory = trace["_memory"]
+    memory_start = tracemalloc.get_traced_memory()[0] if memory else 0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak_rss = _peak_rss_kb()
+        current, peak = tracemalloc.get_traced_memory() if memory else (0, 0)
+        # Las etapas pueden cerrarse a la vez desde varios hilos (scorm_builder.write_entries_parallel)
+        with trace["_lock"]:
+            stats = trace["stages"].setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+            stats["calls"] += 1
+            stats["wall"] = round(stats["wall"] + wall, 6)
+            stats["cpu"] = round(stats["cpu"] + cpu, 6)
+            stats["peak_rss_kb"] = peak_rss
+            if memory:
+                stats["memory_delta"] = stats.get("memory_delta", 0) + current - memory_start
+                stats["tracemalloc_peak"] = max(stats.get("tracemalloc_peak", 0), peak)
+            for key, value in record.items():
+                stats[key] = stats.get(key, 0) + value
+
+
+def count(name, value=1, stage_name=None):
+    """Suma value al contador name de una etapa de la traza activa (sin medir tiempos)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    with trace["_lock"]:
+        stats = trace["stages"].setdefault(stage_name or "counters", {"calls": 0, "wall": 0.0, "cpu": 0.0})
+        stats[name] = stats.get(name, 0) + value
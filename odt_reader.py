@@ -0,0 +1,383 @@
+import zipfile
+import mimetypes
+from html import escape
+from lxml import etree
+from .docx_reader import join_pieces, zip_image_src
+
+# Lector de .odt en una sola pasada: recorre content.xml con iterparse y entrega los mismos
+# bloques (tag, html, texto) que docx_reader, con el mismo marcado.
+
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+STYLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:style:1.0'
+FO_NS = 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
+DRAW_NS = 'urn:oasis:names:tc:opendocument:xmlns:drawing:1.0'
+SVG_NS = 'urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+MANIFEST_NS = 'urn:oasis:names:tc:opendocument:xmlns:manifest:1.0'
+
+CONTENT_PART = 'content.xml'
+
+
+def _q(ns, name):
+    return f'{{{ns}}}{name}'
+
+
+_OFFICE_TEXT = _q(OFFICE_NS, 'text')
+_OFFICE_AUTOMATIC_STYLES = _q(OFFICE_NS, 'automatic-styles')
+_TEXT_H = _q(TEXT_NS, 'h')
+_TEXT_P = _q(TEXT_NS, 'p')
+_TEXT_LIST = _q(TEXT_NS, 'list')
+_TEXT_LIST_ITEM = _q(TEXT_NS, 'list-item')
+_TEXT_LIST_HEADER = _q(TEXT_NS, 'list-header')
+_TEXT_SECTION = _q(TEXT_NS, 'section')
+_TEXT_SPAN = _q(TEXT_NS, 'span')
+_TEXT_A = _q(TEXT_NS, 'a')
+_TEXT_S = _q(TEXT_NS, 's')
+_TEXT_TAB = _q(TEXT_NS, 'tab')
+_TEXT_LINE_BREAK = _q(TEXT_NS, 'line-break')
+_TEXT_STYLE_NAME = _q(TEXT_NS, 'style-name')
+_TABLE_TABLE = _q(TABLE_NS, 'table')
+_TABLE_ROW = _q(TABLE_NS, 'table-row')
+_TABLE_CELL = _q(TABLE_NS, 'table-cell')
+_TABLE_HEADER_ROWS = _q(TABLE_NS, 'table-header-rows')
+_DRAW_FRAME = _q(DRAW_NS, 'frame')
+_DRAW_IMAGE = _q(DRAW_NS, 'image')
+_DRAW_A = _q(DRAW_NS, 'a')
+_STYLE_STYLE = _q(STYLE_NS, 'style')
+_STYLE_NAME = _q(STYLE_NS, 'name')
+_STYLE_TEXT_PROPERTIES = _q(STYLE_NS, 'text-properties')
+_XLINK_HREF = _q(XLINK_NS, 'href')
+
+# Elementos que no aportan contenido visible (notas al pie, índices de campos, anotaciones...)
+_SKIPPED = {_q(TEXT_NS, name) for name in (
+    'note', 'bookmark', 'bookmark-start', 'bookmark-end', 'reference-mark', 'reference-mark-start',
+    'reference-mark-end', 'soft-page-break', 'sequence-decls', 'tracked-changes', 'change-start',
+    'change-end', 'change', 'alphabetical-index-mark', 'toc-mark',
+)} | {_q(OFFICE_NS, 'annotation'), _q(OFFICE_NS, 'annotation-end'), _q(OFFICE_NS, 'forms')}
+
+# Contenedores de bloques en los que se entra (el propio texto o secciones)
+_BLOCK_CONTAINERS = {_OFFICE_TEXT, _TEXT_SECTION}
+
+
+def _read_xml(zf, name):
+    try:
+        with zf.open(name) as f:
+            return etree.parse(f).getroot()
+    except KeyError:
+        return None
+
+
+def _text_format(properties):
+    """Formato en línea (tags HTML) de un style:text-properties."""
+    if properties is None:
+        return {}
+    fmt = {}
+    weight = properties.get(_q(FO_NS, 'font-weight'))
+    if weight is not None:
+        fmt['strong'] = weight == 'bold' or (weight.isdigit() and int(weight) >= 600)
+    style = properties.get(_q(FO_NS, 'font-style'))
+    if style is not None:
+        fmt['em'] = style in ('italic', 'oblique')
+    line_through = properties.get(_q(STYLE_NS, 'text-line-through-style'))
+    if line_through is not None:
+        fmt['s'] = line_through != 'none'
+    # "super 58%", "-33% 58%"... (puede venir vacío)
+    position = (properties.get(_q(STYLE_NS, 'text-position')) or '').split()
+    if position:
+        offset = position[0]
+        fmt['sup'] = offset == 'super' or (offset.endswith('%') and not offset.startswith(('-', '0')))
+        fmt['sub'] = offset == 'sub' or offset.startswith('-')
+    return fmt
+
+
+def _collect_styles(root, styles, list_styles):
+    """Registra los estilos de texto/párrafo (formato y padre) y los estilos de lista."""
+    if root is None:
+        return
+    for style in root.iter(_STYLE_STYLE):
+        styles[style.get(_STYLE_NAME)] = (
+            _text_format(style.find(_STYLE_TEXT_PROPERTIES)),
+            style.get(_q(STYLE_NS, 'parent-style-name')),
+        )
+    for list_style in root.iter(_q(TEXT_NS, 'list-style')):
+        levels = {}
+        for level_style in list_style:
+            level = level_style.get(_q(TEXT_NS, 'level'))
+            if level_style.tag == _q(TEXT_NS, 'list-level-style-number'):
+                levels[level] = 'ol'
+            elif level_style.tag in (_q(TEXT_NS, 'list-level-style-bullet'), _q(TEXT_NS, 'list-level-style-image')):
+                levels[level] = 'ul'
+        list_styles[list_style.get(_STYLE_NAME)] = levels
+
+
+def _resolve_format(ctx, style_name):
+    """Formato efectivo de un estilo, heredando de sus padres."""
+    cache = ctx["formats"]
+    if style_name in cache:
+        return cache[style_name]
+    chain, name = [], style_name
+    while name and name in ctx["styles"] and name not in chain:
+        chain.append(name)
+        name = ctx["styles"][name][1]
+    fmt = {}
+    for name in reversed(chain):
+        fmt.update(ctx["styles"][name][0])
+    cache[style_name] = fmt
+    return fmt
+
+
+def _load_media_types(zf):
+    root = _read_xml(zf, 'META-INF/manifest.xml')
+    media_types = {}
+    if root is not None:
+        for entry in root.iter(_q(MANIFEST_NS, 'file-entry')):
+            media_types[entry.get(_q(MANIFEST_NS, 'full-path'))] = entry.get(_q(MANIFEST_NS, 'media-type'))
+    return media_types
+
+
+def _make_context(path, zf, image_store):
+    styles, list_styles = {}, {}
+    # Estilos con nombre de styles.xml; los automáticos de content.xml se añaden al leerlos
+    _collect_styles(_read_xml(zf, 'styles.xml'), styles, list_styles)
+    return {
+        "path": path,
+        "zf": zf,
+        "image_store": image_store,
+        "styles": styles,
+        "list_styles": list_styles,
+        "formats": {},
+        "media_types": _load_media_types(zf),
+        "image_srcs": {},  # ruta en el .odt -> src ya resuelto (imágenes repetidas)
+    }
+
+
+def _image_src(ctx, href):
+    """URL de una imagen de draw:image: images/<sha256>.<ext> con almacén, si no data URI."""
+    if href in ctx["image_srcs"]:
+        return ctx["image_srcs"][href]
+    src = None
+    if href.startswith(('http://', 'https://', 'data:')):
+        src = href
+    else:
+        member = href[2:] if href.startswith('./') else href
+        content_type = ctx["media_types"].get(member) or mimetypes.guess_type(member)[0]
+        try:
+            src = zip_image_src(ctx["zf"], ctx["path"], member, content_type, ctx["image_store"])
+        except KeyError:
+            print(f"Error cargando imagen: {member} no está en el documento")
+    ctx["image_srcs"][href] = src
+    return src
+
+
+def _frame_image(ctx, frame):
+    image = frame.find(_DRAW_IMAGE)
+    href = image.get(_XLINK_HREF) if image is not None else None
+    src = _image_src(ctx, href) if href else None
+    if not src:
+        return ''
+    desc = frame.find(_q(SVG_NS, 'desc'))
+    title = frame.find(_q(SVG_NS, 'title'))
+    alt = (desc.text if desc is not None else None) or (title.text if title is not None else None)
+    alt_attr = f' alt="{escape(alt)}"' if alt else ''
+    return f'<img{alt_attr} src="{escape(src)}"/>'
+
+
+def _format_key(fmt):
+    return tuple(tag for tag in ('strong', 'em', 's', 'sup', 'sub') if fmt.get(tag))
+
+
+def _inline_pieces(ctx, element, fmt, pieces, text_parts):
+    """Añade a pieces los (formato, html) del contenido en línea de element."""
+    key = _format_key(fmt)
+    if element.text:
+        pieces.append((key, escape(element.text, quote=False)))
+        text_parts.append(element.text)
+    for child in element:
+        tag = child.tag
+        if tag in _SKIPPED:
+            pass
+        elif tag == _TEXT_SPAN:
+            style_name = child.get(_TEXT_STYLE_NAME)
+            child_fmt = dict(fmt, **_resolve_format(ctx, style_name)) if style_name else fmt
+            _inline_pieces(ctx, child, child_fmt, pieces, text_parts)
+        elif tag == _TEXT_A:
+            link_pieces = []
+            _inline_pieces(ctx, child, fmt, link_pieces, text_parts)
+            href = child.get(_XLINK_HREF)
+            if href:
+                pieces.append(((), f'<a href="{escape(href)}">{join_pieces(link_pieces)}</a>'))
+            else:
+                pieces.extend(link_pieces)
+        elif tag == _TEXT_S:
+            count = int(child.get(_q(TEXT_NS, 'c'), '1') or 1)
+            pieces.append((key, ' ' * count))
+            text_parts.append(' ' * count)
+        elif tag == _TEXT_TAB:
+            pieces.append((key, '\t'))
+            text_parts.append('\t')
+        elif tag == _TEXT_LINE_BREAK:
+            pieces.append(((), '<br/>'))
+            text_parts.append(' ')
+        elif tag == _DRAW_FRAME:
+            image = _frame_image(ctx, child)
+            if image:
+                pieces.append(((), image))
+        elif tag == _DRAW_A:
+            for frame in child.iter(_DRAW_FRAME):
+                image = _frame_image(ctx, frame)
+                if image:
+                    pieces.append(((), image))
+        else:
+            # Campos (fecha, número de página...) y otros contenedores: su texto
+            _inline_pieces(ctx, child, fmt, pieces, text_parts)
+        if child.tail:
+            pieces.append((key, escape(child.tail, quote=False)))
+            text_parts.append(child.tail)
+
+
+def _inline_html(ctx, element):
+    """HTML y texto plano de un text:p / text:h."""
+    style_name = element.get(_TEXT_STYLE_NAME)
+    fmt = _resolve_format(ctx, style_name) if style_name else {}
+    if element.tag == _TEXT_H and fmt.get('strong'):
+        # Los estilos de encabezado (Heading N de LibreOffice) son negrita: el <hN> ya lo expresa
+        fmt = dict(fmt, strong=False)
+    pieces, text_parts = [], []
+    _inline_pieces(ctx, element, fmt, pieces, text_parts)
+    return join_pieces(pieces), ''.join(text_parts)
+
+
+def _list_tag(ctx, element, style_name=None, level=1):
+    """'ul' u 'ol' según el estilo de la lista (o el heredado de la lista padre) y su nivel."""
+    style_name = element.get(_TEXT_STYLE_NAME) or style_name
+    return ctx["list_styles"].get(style_name, {}).get(str(level), 'ul')
+
+
+def _list_html(ctx, element, style_name=None, level=1):
+    """Lista (ul/ol según el estilo de lista y el nivel) con sus sublistas anidadas."""
+    style_name = element.get(_TEXT_STYLE_NAME) or style_name
+    tag = _list_tag(ctx, element, style_name, level)
+    parts = [f'<{tag}>']
+    for item in element:
+        if item.tag not in (_TEXT_LIST_ITEM, _TEXT_LIST_HEADER):
+            continue
+        item_parts = []
+        for child in item:
+            if child.tag in (_TEXT_P, _TEXT_H):
+                inner, _ = _inline_html(ctx, child)
+                if inner.strip():
+                    if item_parts:
+                        item_parts.append('<br/>')
+                    item_parts.append(inner)
+            elif child.tag == _TEXT_LIST:
+                item_parts.append(_list_html(ctx, child, style_name, level + 1))
+            elif child.tag == _TABLE_TABLE:
+                item_parts.append(_table_html(ctx, child))
+        parts.append(f'<li>{"".join(item_parts)}</li>')
+    parts.append(f'</{tag}>')
+    return ''.join(parts)
+
+
+def _table_rows(table):
+    """Filas de la tabla en orden, marcando las de table:table-header-rows."""
+    pending = [(iter(table), False)]
+    while pending:
+        child = next(pending[-1][0], None)
+        if child is None:
+            pending.pop()
+            continue
+        is_header = pending[-1][1]
+        if child.tag == _TABLE_ROW:
+            yield child, is_header
+        elif child.tag in (_TABLE_HEADER_ROWS, _q(TABLE_NS, 'table-rows'), _q(TABLE_NS, 'table-row-group')):
+            pending.append((iter(child), is_header or child.tag == _TABLE_HEADER_ROWS))
+
+
+def _table_html(ctx, table):
+    """Tabla con colspan/rowspan; las celdas tapadas por una fusión no se emiten."""
+    parts = ['<table>']
+    for row, is_header in _table_rows(table):
+        repeat = int(row.get(_q(TABLE_NS, 'number-rows-repeated'), '1') or 1)
+        cells = []
+        for cell in row.iterchildren(_TABLE_CELL):
+            tag = 'th' if is_header else 'td'
+            attrs = ''
+            colspan = int(cell.get(_q(TABLE_NS, 'number-columns-spanned'), '1') or 1)
+            rowspan = int(cell.get(_q(TABLE_NS, 'number-rows-spanned'), '1') or 1)
+            if colspan > 1:
+                attrs += f' colspan="{colspan}"'
+            if rowspan > 1:
+                attrs += f' rowspan="{rowspan}"'
+            cell_repeat = int(cell.get(_q(TABLE_NS, 'number-columns-repeated'), '1') or 1)
+            cells.append(f'<{tag}{attrs}>{_blocks_html(ctx, cell)}</{tag}>' * cell_repeat)
+        parts.append(f'<tr>{"".join(cells)}</tr>' * repeat)
+    parts.append('</table>')
+    return ''.join(parts)
+
+
+def _block(ctx, element):
+    """Bloque (tag, html, texto) de un hijo de office:text, o None si no aporta contenido."""
+    tag = element.tag
+    if tag == _TEXT_H:
+        inner, text = _inline_html(ctx, element)
+        if not inner.strip():
+            return None
+        try:
+            level = min(max(int(element.get(_q(TEXT_NS, 'outline-level'), '1')), 1), 6)
+        except ValueError:
+            level = 1
+        return f'h{level}', f'<h{level}>{inner}</h{level}>', text
+    if tag == _TEXT_P:
+        inner, _ = _inline_html(ctx, element)
+        return ('p', f'<p>{inner}</p>', '') if inner.strip() else None
+    if tag == _TEXT_LIST:
+        return _list_tag(ctx, element), _list_html(ctx, element), ''
+    if tag == _TABLE_TABLE:
+        return 'table', _table_html(ctx, element), ''
+    return None
+
+
+def _blocks_html(ctx, container):
+    """HTML de los bloques de un contenedor ya cargado (celda de tabla, sección)."""
+    parts = []
+    for child in container:
+        if child.tag == _TEXT_SECTION:
+            parts.append(_blocks_html(ctx, child))
+            continue
+        block = _block(ctx, child)
+        if block:
+            parts.append(block[1])
+    return ''.join(parts)
+
+
+def iter_odt_blocks(path, image_store=None):
+    """
+    Recorre el content.xml de un .odt en una sola pasada y genera sus bloques de primer nivel
+    como tuplas (tag, html, texto): encabezados, párrafos, listas (anidadas, ul/ol según el
+    estilo de lista) y tablas, con negrita/cursiva/tachado/super/subíndice, enlaces e imágenes.
+    Cada bloque se libera en cuanto se ha convertido.
+
+    :param image_store: Almacén de imágenes (dict). Si se indica, las imágenes de Pictures/ se
+        registran por su hash y se escriben como archivos images/<sha256>.<ext> del paquete;
+        si no, se incrustan como data URIs base64.
+    """
+    with zipfile.ZipFile(path) as zf:
+        ctx = _make_context(path, zf, image_store)
+        tags = (_OFFICE_AUTOMATIC_STYLES, _TEXT_H, _TEXT_P, _TEXT_LIST, _TABLE_TABLE)
+        with zf.open(CONTENT_PART) as content:
+            for _, element in etree.iterparse(content, events=('end',), tag=tags):
+                parent = element.getparent()
+                if element.tag == _OFFICE_AUTOMATIC_STYLES:
+                    _collect_styles(element, ctx["styles"], ctx["list_styles"])
+                    continue
+                if parent is None or parent.tag not in _BLOCK_CONTAINERS:
+                    continue
+                block = _block(ctx, element)
+                if block:
+                    yield block
+                # Liberar el bloque ya convertido y los anteriores
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
@@ -0,0 +1,163 @@
+import math
+
+# BeautifulSoup se importa dentro de las funciones: este módulo también se carga sólo
+# para leer DEFAULT_VIEWPORT
+
+# Medidas aproximadas de slides.html con la tipografía por defecto del navegador (16px)
+FONT_SIZE = 16
+LINE_HEIGHT = 1.5 * FONT_SIZE
+CHAR_WIDTH = 0.55 * FONT_SIZE
+HEADING_FONT_SIZES = {'h1': 32, 'h2': 24, 'h3': 18.72, 'h4': 16, 'h5': 13.28, 'h6': 10.72}
+BLOCK_MARGIN = FONT_SIZE
+TABLE_CELL_PADDING = 10
+
+# Margen de seguridad: mejor partir algo antes que desbordar y forzar la medición en cliente
+SAFETY_FACTOR = 0.9
+
+DEFAULT_VIEWPORT = (1280, 720)
+
+SLIDE_PAGE_CLASS = "slide-page"
+
+
+def usable_area(viewport):
+    """Ancho y alto útiles de .slide-inner en slides.html para una ventana (ancho, alto)."""
+    width, height = viewport
+    # body: padding derecho 20px; .slide-content: padding 40px; .slide-inner: max-width 1000px
+    usable_width = min(1000, width - 20 - 80)
+    # .slide-wrapper 95vh - navbar (60 + 20 padding + 32 margen) - padding 80; .slide-inner: 100vh - 120
+    usable_height = min(0.95 * height - 192, height - 120)
+    return max(usable_width, 100), max(usable_height, 100)
+
+
+def _text_height(text, width, font_size=FONT_SIZE, line_height=LINE_HEIGHT):
+    text = " ".join(text.split())
+    if not text:
+        return 0
+    chars_per_line = max(1, int(width / (CHAR_WIDTH * font_size / FONT_SIZE)))
+    return math.ceil(len(text) / chars_per_line) * line_height
+
+
+def _image_height(img, width):
+    """Alto de una imagen escalada al ancho disponible, o None si no declara dimensiones."""
+    try:
+        img_width = float(img.get('width'))
+        img_height = float(img.get('height'))
+    except (TypeError, ValueError):
+        return None
+    if img_width <= 0:
+        return None
+    return img_height * min(1.0, width / img_width)
+
+
+def estimate_height(element, width):
+    """
+    Estima el alto en píxeles de un bloque de nivel superior (encabezados, párrafos,
+    listas, tablas e imágenes con dimensiones conocidas). Devuelve None si no es posible.
+    """
+    from bs4 import NavigableString, Tag
+
+    if isinstance(element, NavigableString):
+        return _text_height(str(element), width)
+    if not isinstance(element, Tag):
+        return 0
+
+    name = element.name.lower()
+
+    images = [element] if name == 'img' else element.find_all('img')
+    images_height = 0
+    for img in images:
+        img_height = _image_height(img, width)
+        if img_height is None:
+            return None
+        images_height += img_height + 20
+
+    if name in HEADING_FONT_SIZES:
+        font_size = HEADING_FONT_SIZES[name]
+        return _text_height(element.get_text(), width, font_size, 1.2 * font_size) + font_size + images_height
+
+    if name in ('ul', 'ol'):
+        items = element.find_all('li')
+        # Sangría de lista: 40px
+        items_height = sum(max(_text_height(li.get_text(), width - 40), LINE_HEIGHT) for li in items)
+        return items_height + BLOCK_MARGIN + images_height
+
+    if name == 'li':
+        return max(_text_height(element.get_text(), width - 40), LINE_HEIGHT) + images_height
+
+    if name == 'table':
+        total = BLOCK_MARGIN
+        for row in element.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if not cells:
+                continue
+            cell_width = max(width / len(cells) - 2 * TABLE_CELL_PADDING, CHAR_WIDTH)
+            total += max(max(_text_height(c.get_text(), cell_width), LINE_HEIGHT) for c in cells) + 2 * TABLE_CELL_PADDING
+        return total + images_height
+
+    if name == 'img':
+        return images_height
+
+    return _text_height(element.get_text(), width) + BLOCK_MARGIN + images_height
+
+
+def _should_group(element, next_element):
+    """Mismas reglas de cohesión que shouldGroup() en slides.html."""
+    from bs4 import Tag
+
+    if next_element is None:
+        return False
+    name = element.name.lower() if isinstance(element, Tag) else ""
+    next_name = next_element.name.lower() if isinstance(next_element, Tag) else ""
+    return name in HEADING_FONT_SIZES or name in ('li', 'table') or next_name == 'li'
+
+
+def paginate_content(content, viewport=DEFAULT_VIEWPORT, parser=None):
+    """
+    Parte el HTML de un nodo en diapositivas estimando el alto de cada bloque para la ventana
+    indicada. Cada diapositiva se emite como <div class="slide-page">; slides.html sólo vuelve
+    a medir en el cliente las que, aun así, desbordan.
+
+    :param parser: Backend de BeautifulSoup ya resuelto (scorm_builder.resolve_html_parser);
+        None = "html.parser".
+    """
+    from bs4 import BeautifulSoup, Tag
+
+    width, height = usable_area(viewport)
+    max_height = height * SAFETY_FACTOR
+
+    soup = BeautifulSoup(content, parser or "html.parser")
+    # lxml envuelve el fragmento en <html><body>
+    root = soup.body if soup.body is not None else soup
+    blocks = [c for c in root.contents if isinstance(c, Tag) or str(c).strip()]
+
+    # Agrupar encabezados, listas y tablas con su siguiente bloque
+    groups = []
+    i = 0
+    while i < len(blocks):
+        group = [blocks[i]]
+        while i + 1 < len(blocks) and _should_group(blocks[i], blocks[i + 1]):
+            i += 1
+            group.append(blocks[i])
+        groups.append(group)
+        i += 1
+
+    pages = []
+    current, current_height = [], 0
+    for group in groups:
+        heights = [estimate_height(block, width) for block in group]
+        # Altura desconocida: el grupo va en su propia diapositiva y se mide en cliente
+        group_height = max_height + 1 if None in heights else sum(heights)
+
+        if current and current_height + group_height > max_height:
+            pages.append(current)
+            current, current_height = [], 0
+        current.extend(group)
+        current_height += group_height
+
+    if current:
+        pages.append(current)
+
+    return "".join(
+        f'<div class="{SLIDE_PAGE_CLASS}">' + "".join(str(block) for block in page) + '</div>'
+        for page in pages
+    )
@@ -1,53 +1,159 @@
+import io
 import os
+import time
+import zlib
 import shutil
 import zipfile
-from jinja2 import Environment, FileSystemLoader
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from functools import lru_cache
 from uuid import uuid4
-import xml.etree.ElementTree as ET
-from xml.dom.minidom import parseString
-from bs4 import BeautifulSoup, NavigableString, Tag
 import re
 from urllib.parse import urlencode
+from .images import image_bytes
+from .instrumentation import stage
+from .tree import TreeNode, iter_tree
+from .incremental import state_path_for, hash_key, load_build_state, save_build_state, copy_zip_entry, write_raw_zip_entry
 
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
 
-# --- BUILDER & TEMPLATE ---
-def save_tree_files(tree_nodes, output_dir, resources, template_name="slides.html"):
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    template = env.get_template(template_name)
-    
-    extra_css = resources.get("css", "")
-    extra_js = resources.get("js", "")
-    extra_js_not_script = ""
+_template_env = None
 
-    if template_name == "slides.html":
-        soup = BeautifulSoup(extra_js, 'html.parser')
+def get_template_env():
+    """
+    Entorno Jinja compartido por todo el módulo: cada plantilla se compila una sola vez por
+    proceso, y la caché de bytecode en disco (directorio temporal del usuario) evita recompilarlas
+    en procesos nuevos (CLI, workers, funciones serverless).
+    """
+    global _template_env
+    if _template_env is None:
+        try:
+            bytecode_cache = FileSystemBytecodeCache()
+        except Exception:
+            bytecode_cache = None
+        _template_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), bytecode_cache=bytecode_cache)
+    return _template_env
 
-        # Extraemos todos los scripts
-        scripts = soup.find_all('script')
+SHARED_CSS_FILE = "course.css"
+SHARED_JS_FILE = "course.js"
+SHARED_RESOURCE_ID = "RES-SHARED"
 
-        # Usamos una expresión regular para encontrar la función que comienza con 'document.addEventListener'
-        pattern = re.compile(r"document.addEventListener\('DOMContentLoaded',\s*function\s*\(\)\s*{(.*)}\);", re.DOTALL)
+_STYLE_BLOCK_RE = re.compile(r"<style\b[^>]*>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_SCRIPT_BLOCK_RE = re.compile(r"<script\b([^>]*)>(.*?)</script>", re.DOTALL | re.IGNORECASE)
+_INLINE_SCRIPT_TYPE_RE = re.compile(r"""\btype\s*=\s*["']?(text|application)/(javascript|ecmascript)\b""", re.IGNORECASE)
 
-        # Buscamos la función en el contenido de los scripts
-        for script in scripts:
-            content = script.string
-            if content:
+_DOM_READY_RE = re.compile(r"document.addEventListener\('DOMContentLoaded',\s*function\s*\(\)\s*{(.*)}\);", re.DOTALL)
 
-                match = pattern.search(content)
-                if match:
-                    extra_js_not_script = match.group(1).strip()
+def extract_dom_ready_body(extra_js):
+    """Devuelve el cuerpo del manejador DOMContentLoaded de los scripts ('' si no hay)."""
+    body = ""
+    # Escaneo directo de los bloques <script> (sin volver a parsear con BeautifulSoup)
+    for script in _SCRIPT_BLOCK_RE.finditer(extra_js):
+        content = script.group(2)
+        if content:
+            match = _DOM_READY_RE.search(content)
+            if match:
+                body = match.group(1).strip()
+    return body
 
-    # --- 1) Aplanar nodos en orden ---
-    flat_list = []
+def strip_dom_ready(extra_js):
+    """
+    Los <script> del documento sin sus manejadores DOMContentLoaded (que la plantilla vuelve a
+    ejecutar como setupInteractividad): se conservan los <script src> y el resto del código.
+    """
+    scripts = []
+    for script in _SCRIPT_BLOCK_RE.finditer(extra_js):
+        attrs, content = script.group(1), script.group(2)
+        if _is_inline_script(attrs):
+            content = _DOM_READY_RE.sub("", content)
+            if not content.strip():
+                continue
+        scripts.append(f"<script{attrs}>{content}</script>")
+    return "\n".join(scripts)
 
-    def flatten(nodes):
-        for node in nodes:
-            flat_list.append(node)
-            if node['children']:
-                flatten(node['children'])
+_default_html_parser = None
 
-    flatten(tree_nodes)
+def resolve_html_parser(parser=None):
+    """
+    Backend de BeautifulSoup a usar: el indicado, o "lxml" si está instalado
+    con "html.parser" como alternativa.
+    """
+    global _default_html_parser
+    if parser:
+        return parser
+    if _default_html_parser is None:
+        try:
+            import lxml  # noqa: F401
+            _default_html_parser = "lxml"
+        except ImportError:
+            _default_html_parser = "html.parser"
+    return _default_html_parser
+
+def _unique(blocks):
+    seen = set()
+    return [b for b in blocks if not (b in seen or seen.add(b))]
+
+def _is_inline_script(attrs):
+    if re.search(r"\bsrc\s*=", attrs, re.IGNORECASE):
+        return False
+    return "type" not in attrs.lower() or bool(_INLINE_SCRIPT_TYPE_RE.search(attrs))
+
+def extract_shared_resources(resources, template_name="slides.html"):
+    """
+    Separa el CSS/JS en línea de todos los SCOs en archivos comunes del curso.
+    Los bloques <style>/<script> repetidos (mismo texto exacto) se incluyen una sola vez.
+
+    Devuelve (shared_files, template_resources): shared_files es {nombre: texto} con
+    course.css/course.js, y template_resources los recursos que siguen en cada SCO
+    (<link> y <script src>) más las rutas shared_css/shared_js a enlazar.
+    """
+    css = resources.get("css", "")
+    js = resources.get("js", "")
+
+    style_blocks = _unique(m.group(0) for m in _STYLE_BLOCK_RE.finditer(css))
+    link_tags = _unique(m.group(0) for m in _LINK_TAG_RE.finditer(css))
+
+    inline_scripts, other_scripts = [], []
+    for match in _SCRIPT_BLOCK_RE.finditer(js):
+        if _is_inline_script(match.group(1)):
+            inline_scripts.append(match.group(0))
+        else:
+            other_scripts.append(match.group(0))
+    inline_scripts = _unique(inline_scripts)
+    other_scripts = _unique(other_scripts)
+
+    shared_files = {}
+    template_resources = {
+        "css": "\n".join(link_tags),
+        "js": "\n".join(other_scripts),
+    }
+
+    if style_blocks:
+        shared_files[SHARED_CSS_FILE] = "\n".join(_STYLE_BLOCK_RE.match(b).group(1).strip() for b in style_blocks) + "\n"
+        template_resources["shared_css"] = SHARED_CSS_FILE
+
+    if template_name == "slides.html":
+        # slides.html sólo usa el cuerpo del DOMContentLoaded, reejecutado en cada diapositiva
+        body = extract_dom_ready_body("\n".join(inline_scripts))
+        if body:
+            shared_files[SHARED_JS_FILE] = f"function setupInteractividad() {{\n    {body}\n}};\n"
+        else:
+            shared_files[SHARED_JS_FILE] = 'function setupInteractividad() {\n    console.log("No se ha cargado código JS adicional.");\n};\n'
+        template_resources["shared_js"] = SHARED_JS_FILE
+    elif inline_scripts:
+        shared_files[SHARED_JS_FILE] = "\n;\n".join(_SCRIPT_BLOCK_RE.match(b).group(2).strip() for b in inline_scripts) + "\n"
+        template_resources["shared_js"] = SHARED_JS_FILE
+
+    return shared_files, template_resources
+
+# --- BUILDER & TEMPLATE ---
+def link_tree_nodes(tree_nodes):
+    """Aplana el árbol en orden y asigna filename, prev y next a cada nodo. Devuelve la lista plana."""
+    # --- 1) Aplanar nodos en orden (preorden iterativo) ---
+    flat_list = [node for node, _ in iter_tree(tree_nodes)]
 
     # --- 2) Asignar filenames en orden ---
     for index, node in enumerate(flat_list):
@@ -58,19 +164,108 @@ def save_tree_files(tree_nodes, output_dir, resources, template_name="slides.htm
         node["prev"] = flat_list[i-1]["filename"] if i > 0 else None
         node["next"] = flat_list[i+1]["filename"] if i < len(flat_list)-1 else None
 
-    # --- 4) Guardar archivos con la plantilla ---
-    for node in flat_list:
-        html = template.render(
+    return flat_list
+
+def prepare_tree_render(tree_nodes, resources, template_name="slides.html", slide_viewport=None, html_parser=None):
+    """
+    Enlaza los nodos (link_tree_nodes) y prepara el renderizado de cada SCO.
+    Devuelve (flat_list, render_node, render_key): render_node(node) devuelve el html del nodo y
+    render_key resume todo lo que, aparte del propio nodo, influye en el resultado
+    (plantilla, CSS/JS, paginación), para poder detectar cambios entre compilaciones.
+
+    :param html_parser: Backend de BeautifulSoup para la paginación previa (ver resolve_html_parser).
+    """
+    env = get_template_env()
+    template = env.get_template(template_name)
+    template_source = env.loader.get_source(env, template_name)[0]
+    
+    extra_css = resources.get("css", "")
+    extra_js = resources.get("js", "")
+    extra_js_not_script = ""
+
+    if template_name == "slides.html":
+        extra_js_not_script = extract_dom_ready_body(extra_js)
+
+    flat_list = link_tree_nodes(tree_nodes)
+
+    # --- 4) Renderizar con la plantilla ---
+    prepaginate = bool(slide_viewport) and template_name == "slides.html"
+    if prepaginate:
+        from .pagination import paginate_content
+        html_parser = resolve_html_parser(html_parser)
+
+    def render_node(node):
+        content = paginate_content(node['content'], tuple(slide_viewport), html_parser) if prepaginate else node['content']
+        return template.render(
             title=node['title'],
-            content=node['content'],
+            content=content,
             extra_css=extra_css,
             extra_js=extra_js,
             extra_js_not_script=extra_js_not_script,
+            shared_css=resources.get("shared_css"),
+            shared_js=resources.get("shared_js"),
             prev=node["prev"],
             next=node["next"]
         )
-        
-        path = os.path.join(output_dir, node['filename'])
+
+    render_key = hash_key(
+        template_name, template_source, extra_css, extra_js,
+        resources.get("shared_css"), resources.get("shared_js"),
+        repr(tuple(slide_viewport)) if prepaginate else None,
+        html_parser if prepaginate else None
+    )
+    return flat_list, render_node, render_key
+
+def render_tree_files(tree_nodes, resources, template_name="slides.html", slide_viewport=None, html_parser=None):
+    """
+    Asigna filename/prev/next a cada nodo y genera (filename, html) en orden,
+    sin escribir nada en disco.
+
+    :param slide_viewport: (ancho, alto) de la ventana objetivo. Si se indica con slides.html,
+        el contenido se entrega ya partido en diapositivas (ver pagination.paginate_content).
+    """
+    flat_list, render_node, _ = prepare_tree_render(tree_nodes, resources, template_name, slide_viewport, html_parser)
+    for node in flat_list:
+        yield node['filename'], render_node(node)
+
+
+SPA_LAUNCH_FILE = "index.html"
+SPA_SECTIONS_DIR = "sections"
+
+def render_spa_files(tree_nodes, resources, template_name="spa.html", course_title=None):
+    """
+    Modo de página única: genera (nombre_en_zip, texto) para una página shell (index.html)
+    más un fragmento HTML por sección en sections/. El shell carga cada fragmento bajo
+    demanda, precarga el siguiente y mantiene una única sesión con el LMS.
+
+    :param course_title: Título del shell (None = el de la primera sección).
+    """
+    template = get_template_env().get_template(template_name)
+
+    flat_list = link_tree_nodes(tree_nodes)
+    depths = [depth for _, depth in iter_tree(tree_nodes)]
+
+    sections = [{
+        "id": node['filename'],
+        "file": f"{SPA_SECTIONS_DIR}/{node['filename']}",
+        "title": node['title'],
+        "depth": depth
+    } for node, depth in zip(flat_list, depths)]
+
+    yield SPA_LAUNCH_FILE, template.render(
+        title=course_title if course_title is not None else (flat_list[0]['title'] if flat_list else ""),
+        sections=sections,
+        extra_css=resources.get("css", ""),
+        extra_js=strip_dom_ready(resources.get("js", "")),
+        extra_js_not_script=extract_dom_ready_body(resources.get("js", ""))
+    )
+
+    for section, node in zip(sections, flat_list):
+        yield section["file"], node['content']
+
+def save_tree_files(tree_nodes, output_dir, resources, template_name="slides.html"):
+    for filename, html in render_tree_files(tree_nodes, resources, template_name):
+        path = os.path.join(output_dir, filename)
         with open(path, "w", encoding="utf-8") as f:
             f.write(html)
 
@@ -78,82 +273,137 @@ def save_tree_files(tree_nodes, output_dir, resources, template_name="slides.htm
 def sanitize_title(title):
     return re.sub(r'[^\w\s\-.,;:()&/áéíóúÁÉÍÓÚñÑ]', '', title)
 
-def build_imsmanifest(course_title, tree_nodes, output_dir, extra_files=None):
-    ET.register_namespace('', "http://www.imsproject.org/xsd/imscp_rootv1p1p2")
-    ET.register_namespace('adlcp', "http://www.adlnet.org/xsd/adlcp_rootv1p2")
-    ET.register_namespace('xsi', "http://www.w3.org/2001/XMLSchema-instance")
-
-    NS_IMSCP = "http://www.imsproject.org/xsd/imscp_rootv1p1p2"
-    NS_ADLCP = "http://www.adlnet.org/xsd/adlcp_rootv1p2"
-
-    manifest = ET.Element(f"{{{NS_IMSCP}}}manifest", {
-        "identifier": f"MANIFEST-{uuid4().hex}",
-        "version": "1.1"
-    })
-
-    metadata = ET.SubElement(manifest, "metadata")
-    ET.SubElement(metadata, "schema").text = "ADL SCORM"
-    ET.SubElement(metadata, "schemaversion").text = "1.2"
-
-    organizations = ET.SubElement(manifest, "organizations", default="ORG-1")
-    organization = ET.SubElement(organizations, "organization", identifier="ORG-1")
-    ET.SubElement(organization, "title").text = sanitize_title(course_title)
-
-    resources_elem = ET.SubElement(manifest, "resources")
-
-    def recursive_item_builder(parent_xml, nodes):
-        for node in nodes:
-            item_id = f"ITEM-{uuid4().hex}"
-            res_id = f"RES-{uuid4().hex}"
-
-            # Crear item en el árbol (menú)
-            item = ET.SubElement(parent_xml, "item",
-                                 identifier=item_id,
-                                 identifierref=res_id)
-            ET.SubElement(item, "title").text = sanitize_title(node["title"])
-
-            # Crear resource (archivo físico)
-            res = ET.SubElement(resources_elem, "resource", {
-                "identifier": res_id,
-                "type": "webcontent",
-                f"{{{NS_ADLCP}}}scormtype": "sco",
-                "href": node["filename"]
-            })
-            # Un SCO real sólo al nivel 1 (h1)
-            # is_sco = (node["level"] == 2)
-
-            # res = ET.SubElement(resources_elem, "resource", {
-            #     "identifier": res_id,
-            #     "type": "webcontent",
-            #     f"{{{NS_ADLCP}}}scormtype": "sco" if is_sco else "asset",
-            #     "href": node["filename"]
-            # })
-
-            ET.SubElement(res, "file", href=node["filename"])
-
-            # Recursividad
-            if node.get("children"):
-                recursive_item_builder(item, node["children"])
-
-    recursive_item_builder(organization, tree_nodes)
-
-    if extra_files:
-        for filename in extra_files:
-            res_id = f"RES-{uuid4().hex}"
-            res = ET.SubElement(resources_elem, "resource", {
-                "identifier": res_id,
-                "type": "webcontent",
-                f"{{{NS_ADLCP}}}scormtype": "asset",
-                "href": filename
-            })
-            ET.SubElement(res, "file", href=filename)
-
-    xml_str = ET.tostring(manifest, encoding="utf-8")
-    pretty_xml = parseString(xml_str).toprettyxml(indent="  ")
+NS_IMSCP = "http://www.imsproject.org/xsd/imscp_rootv1p1p2"
+NS_ADLCP = "http://www.adlnet.org/xsd/adlcp_rootv1p2"
+
+def _xml_escape(value):
+    # Mismo escapado que usaba minidom.toprettyxml, para que el manifest no cambie
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;").replace(">", "&gt;")
+
+def write_imsmanifest(out, course_title, tree_nodes, extra_files=None, shared_files=None, single_page=False,
+                      reproducible=False, indent="  "):
+    """
+    Escribe el imsmanifest.xml (SCORM 1.2) en out (cualquier objeto con write(str): archivo,
+    StringIO o io.TextIOWrapper sobre zipf.open(..., "w")) a medida que recorre el árbol, sin
+    montar el documento en memoria: primero los items de la organización y después, en el
+    mismo orden, sus resources.
+
+    :param shared_files: Archivos comunes a todos los SCOs (course.css/course.js). Se registran
+        en un único resource asset del que depende cada SCO.
+    :param single_page: Modo de página única: todos los items apuntan al mismo SCO (index.html)
+        con parameters="?section=<sco_N.html>", y los fragmentos se listan como sus archivos.
+    :param reproducible: Identificadores derivados del título del curso y de la posición de cada
+        nodo en el árbol en lugar de uuid4, para que el manifest sea idéntico entre compilaciones.
+    :param indent: Sangría por nivel (None = todo en una línea, sin espacios entre elementos).
+    """
+    def new_id(prefix, *path):
+        if reproducible:
+            return f"{prefix}-{hash_key(course_title, prefix, *path)[:32]}"
+        return f"{prefix}-{uuid4().hex}"
+
+    newline = "\n" if indent is not None else ""
+    indent = indent or ""
+    buffer = []
+
+    def line(depth, text):
+        buffer.append(f"{indent * depth}{text}{newline}")
+        if len(buffer) >= 512:
+            out.write("".join(buffer))
+            buffer.clear()
+
+    def attributes(attrs):
+        return "".join(f' {name}="{_xml_escape(value)}"' for name, value in attrs)
+
+    def title(depth, text):
+        text = sanitize_title(text)
+        line(depth, f"<title>{_xml_escape(text)}</title>" if text else "<title/>")
+
+    def resource(identifier, scormtype, href, files, dependency=None):
+        line(2, f"<resource{attributes([('identifier', identifier), ('type', 'webcontent'), ('adlcp:scormtype', scormtype), ('href', href)])}>")
+        for filename in files:
+            line(3, f'<file href="{_xml_escape(filename)}"/>')
+        if dependency:
+            line(3, f'<dependency identifierref="{_xml_escape(dependency)}"/>')
+        line(2, "</resource>")
+
+    has_resources = bool(single_page or tree_nodes or shared_files or extra_files)
+    namespaces = [("xmlns", NS_IMSCP)] + ([("xmlns:adlcp", NS_ADLCP)] if has_resources else [])
+    line(0, '<?xml version="1.0" ?>')
+    line(0, f"<manifest{attributes(namespaces + [('identifier', new_id('MANIFEST')), ('version', '1.1')])}>")
+    line(1, "<metadata>")
+    line(2, "<schema>ADL SCORM</schema>")
+    line(2, "<schemaversion>1.2</schemaversion>")
+    line(1, "</metadata>")
+    line(1, '<organizations default="ORG-1">')
+    line(2, '<organization identifier="ORG-1">')
+    title(3, course_title)
+
+    if single_page:
+        spa_res_id = new_id("RES", SPA_LAUNCH_FILE)
+
+    # Items en preorden con una pila explícita (sin recursión para árboles muy profundos).
+    # Se guardan sólo los datos de los resources, que van después de la organización.
+    sco_resources = []
+    pending = [(iter(enumerate(tree_nodes)), ())]
+    while pending:
+        nodes, path = pending[-1]
+        position, node = next(nodes, (None, None))
+        if node is None:
+            pending.pop()
+            if pending:
+                line(len(pending) + 2, "</item>")
+            continue
+        depth = len(pending) + 2
+        node_path = path + (str(position),)
+        item_id = new_id("ITEM", *node_path)
+        if single_page:
+            attrs = [("identifier", item_id), ("identifierref", spa_res_id), ("parameters", f"?section={node['filename']}")]
+            sco_resources.append(node["filename"])
+        else:
+            res_id = new_id("RES", *node_path)
+            attrs = [("identifier", item_id), ("identifierref", res_id)]
+            sco_resources.append((res_id, node["filename"]))
+        line(depth, f"<item{attributes(attrs)}>")
+        title(depth + 1, node["title"])
+        if node.get("children"):
+            pending.append((iter(enumerate(node["children"])), node_path))
+        else:
+            line(depth, "</item>")
 
+    line(2, "</organization>")
+    line(1, "</organizations>")
+
+    if not has_resources:
+        line(1, "<resources/>")
+    else:
+        line(1, "<resources>")
+        if single_page:
+            resource(spa_res_id, "sco", SPA_LAUNCH_FILE,
+                     [SPA_LAUNCH_FILE] + [f"{SPA_SECTIONS_DIR}/{filename}" for filename in sco_resources])
+        else:
+            dependency = SHARED_RESOURCE_ID if shared_files else None
+            for res_id, filename in sco_resources:
+                resource(res_id, "sco", filename, [filename], dependency)
+        if shared_files:
+            resource(SHARED_RESOURCE_ID, "asset", shared_files[0], shared_files)
+        for filename in extra_files or ():
+            resource(new_id("RES", filename), "asset", filename, [filename])
+        line(1, "</resources>")
+    line(0, "</manifest>")
+    out.write("".join(buffer))
+
+def render_imsmanifest(course_title, tree_nodes, extra_files=None, shared_files=None, single_page=False,
+                       reproducible=False, indent="  "):
+    """Genera el texto del imsmanifest.xml (SCORM 1.2). Ver write_imsmanifest."""
+    out = io.StringIO()
+    write_imsmanifest(out, course_title, tree_nodes, extra_files=extra_files, shared_files=shared_files,
+                      single_page=single_page, reproducible=reproducible, indent=indent)
+    return out.getvalue()
+
+def build_imsmanifest(course_title, tree_nodes, output_dir, extra_files=None):
     os.makedirs(output_dir, exist_ok=True)
     with open(os.path.join(output_dir, "imsmanifest.xml"), "w", encoding="utf-8") as f:
-        f.write(pretty_xml)
+        write_imsmanifest(f, course_title, tree_nodes, extra_files=extra_files)
 
 def copy_assets(assets_paths, destination_dir):
     if not assets_paths: return
@@ -166,26 +416,405 @@ def copy_assets(assets_paths, destination_dir):
             else:
                 shutil.copy2(asset, dest)
 
-def build_scorm_package(tree_data, output_zip_path, course_title="Curso SCORM", assets_paths=None):
-    temp_dir = f"scorm_temp_{uuid4().hex}"
-    os.makedirs(temp_dir, exist_ok=True)
-    try:
-        tree_nodes, global_resources = tree_data
-        
-        if assets_paths: copy_assets(assets_paths, temp_dir)
-        save_tree_files(tree_nodes, temp_dir, global_resources)
-        build_imsmanifest(course_title, tree_nodes, temp_dir)
-        
-        with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
+# Tipos que ya vienen comprimidos: se guardan tal cual (ZIP_STORED) en lugar de deflactarlos otra vez
+STORED_EXTENSIONS = frozenset({
+    ".mp4", ".m4v", ".mov", ".webm", ".avi", ".mkv",
+    ".mp3", ".m4a", ".aac", ".ogg", ".oga", ".wav",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".zip", ".gz", ".7z", ".rar",
+    ".woff", ".woff2",
+})
+
+# Fecha fija de las entradas en modo reproducible (la mínima que admite ZIP)
+REPRODUCIBLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+def compression_policy(stored_extensions=None, compresslevel=None, reproducible=False):
+    """
+    Política de compresión por tipo de archivo.
+
+    :param stored_extensions: Extensiones que se guardan sin comprimir (None = STORED_EXTENSIONS).
+    :param compresslevel: Nivel de deflate (0-9) para el resto (None = por defecto de zlib).
+    :param reproducible: Fecha, permisos y sistema de origen fijos en todas las entradas.
+    """
+    if stored_extensions is None:
+        stored = STORED_EXTENSIONS
+    else:
+        stored = frozenset(ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in stored_extensions)
+    return {"stored_extensions": stored, "compresslevel": compresslevel, "reproducible": reproducible}
+
+def _fixed_zipinfo(arcname, compress_type, compresslevel):
+    """
+    ZipInfo con fecha, permisos y sistema de origen fijos para el modo reproducible.
+
+    ZipFile.open(zinfo, "w") (usado por zip_write_file) no admite compresslevel, así que el nivel
+    va en el propio zinfo: en el atributo público compress_level desde Python 3.13 y, antes, en el
+    privado _compresslevel (comprobado en CPython 3.8 a 3.12, ver python_requires en setup.py).
+    """
+    zinfo = zipfile.ZipInfo(arcname, date_time=REPRODUCIBLE_DATE_TIME)
+    zinfo.create_system = 3                 # Unix, independientemente de la plataforma
+    zinfo.external_attr = 0o644 << 16       # -rw-r--r--
+    zinfo.compress_type = compress_type
+    if hasattr(zinfo, "compress_level"):
+        zinfo.compress_level = compresslevel
+    else:
+        zinfo._compresslevel = compresslevel
+    return zinfo
+
+def _compression_for(arcname, policy):
+    policy = policy or compression_policy()
+    if os.path.splitext(arcname)[1].lower() in policy["stored_extensions"]:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, policy["compresslevel"]
+
+def _record_zip_entry(record, zipf, arcname):
+    zinfo = zipf.NameToInfo[getattr(arcname, "filename", arcname)]
+    record["entries"] = 1
+    record["bytes_in"] = zinfo.file_size
+    record["bytes_out"] = zinfo.compress_size
+
+def zip_writestr(zipf, arcname, data, policy=None):
+    compress_type, compresslevel = _compression_for(arcname, policy)
+    if policy and policy.get("reproducible"):
+        arcname = _fixed_zipinfo(arcname, compress_type, compresslevel)
+    with stage("zip_write") as record:
+        zipf.writestr(arcname, data, compress_type=compress_type, compresslevel=compresslevel)
+        _record_zip_entry(record, zipf, arcname)
+
+def zip_write_file(zipf, path, arcname, policy=None):
+    """Vuelca un archivo al ZIP por bloques desde su ruta de origen (memoria constante)."""
+    compress_type, compresslevel = _compression_for(arcname, policy)
+    if policy and policy.get("reproducible"):
+        # Sin mtime ni permisos del archivo de origen
+        zinfo = _fixed_zipinfo(arcname, compress_type, compresslevel)
+        zinfo.file_size = os.path.getsize(path)
+        with stage("zip_write") as record:
+            with open(path, "rb") as src, zipf.open(zinfo, "w") as dest:
+                shutil.copyfileobj(src, dest, 1024 * 1024)
+            _record_zip_entry(record, zipf, arcname)
+        return
+    with stage("zip_write") as record:
+        zipf.write(path, arcname, compress_type=compress_type, compresslevel=compresslevel)
+        _record_zip_entry(record, zipf, arcname)
+
+def deflate_entry(arcname, data, policy=None):
+    """
+    Comprime una entrada fuera del ZIP, como lo haría zip_writestr. Devuelve (zinfo, datos
+    comprimidos) listos para write_raw_zip_entry; zlib libera el GIL, así que puede llamarse
+    desde varios hilos a la vez.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    compress_type, compresslevel = _compression_for(arcname, policy)
+    if policy and policy.get("reproducible"):
+        zinfo = _fixed_zipinfo(arcname, compress_type, compresslevel)
+    else:
+        zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = compress_type
+        zinfo.external_attr = 0o600 << 16
+    zinfo.file_size = len(data)
+    zinfo.CRC = zlib.crc32(data)
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel,
+                                      zlib.DEFLATED, -15)
+        data = compressor.compress(data) + compressor.flush()
+    zinfo.compress_size = len(data)
+    return zinfo, data
+
+def zip_write_deflated(zipf, zinfo, data):
+    """Añade al ZIP una entrada preparada con deflate_entry."""
+    with stage("zip_write") as record:
+        # Misma cabecera que ZipFile.open(..., "w") para que el resultado no dependa de los hilos
+        write_raw_zip_entry(zipf, zinfo, (data,), zip64=zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT)
+        _record_zip_entry(record, zipf, zinfo)
+
+def write_entries_parallel(zipf, items, policy=None, workers=None):
+    """
+    Escribe items en el ZIP con un pool de hilos: cada hilo genera una entrada (render Jinja,
+    lectura de la imagen) y la comprime con deflate_entry, y sólo este hilo escribe en el ZIP,
+    en el orden de items, así que el resultado es el mismo que en serie.
+
+    :param items: (arcname, produce) para las entradas generadas o (arcname, ruta) para los
+        archivos de disco, que se vuelcan directamente al llegarles el turno.
+    :param workers: Hilos del pool (None = núcleos disponibles).
+    """
+    def prepare(arcname, produce):
+        data = produce()
+        with stage("deflate") as record:
+            prepared = deflate_entry(arcname, data, policy)
+            record["bytes_out"] = len(prepared[1])
+        return prepared
+
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Ventana acotada: sólo unas pocas entradas comprimidas esperan en memoria a ser escritas
+        window = (workers or os.cpu_count() or 1) * 2
+
+        def submit_next():
+            item = next(items, None)
+            if item is None:
+                return False
+            arcname, source = item
+            if callable(source):
+                # Cada hilo hereda la traza activa (instrumentation)
+                source = executor.submit(contextvars.copy_context().run, prepare, arcname, source)
+            pending.append((arcname, source))
+            return True
+
+        while len(pending) < window and submit_next():
+            pass
+        while pending:
+            arcname, source = pending.popleft()
+            if isinstance(source, (str, os.PathLike)):
+                if arcname not in zipf.NameToInfo:
+                    zip_write_file(zipf, source, arcname, policy)
+            else:
+                zip_write_deflated(zipf, *source.result())
+            submit_next()
+
+def iter_asset_files(assets_paths):
+    """Genera (ruta_origen, nombre_en_zip) para cada archivo de los assets (carpetas recursivas)."""
+    if not assets_paths: return
+    for asset in assets_paths:
+        if not os.path.exists(asset): continue
+        base_name = os.path.basename(os.path.normpath(asset))
+        if os.path.isdir(asset):
+            # Orden estable, independiente del sistema de archivos
+            for root, dirs, files in os.walk(asset):
+                dirs.sort()
+                for file in sorted(files):
                     abs_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(abs_path, temp_dir)
-                    zipf.write(abs_path, rel_path)
-        print(f"✅ SCORM Generado: {output_zip_path}")
-        
-    finally:
-        if os.path.exists(temp_dir): shutil.rmtree(temp_dir)
+                    rel_path = os.path.relpath(abs_path, asset)
+                    yield abs_path, "/".join([base_name, *rel_path.split(os.sep)])
+        else:
+            yield asset, base_name
+
+def write_package(output_zip, write_entries):
+    """
+    Abre el ZIP de salida y llama a write_entries(zipf) para volcar las entradas directamente,
+    sin directorio temporal. output_zip puede ser una ruta, un fichero binario abierto o un BytesIO.
+    Si la salida es una ruta y falla la generación, se borra el ZIP incompleto.
+    """
+    is_path = isinstance(output_zip, (str, os.PathLike))
+    try:
+        with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            write_entries(zipf)
+    except Exception:
+        if is_path and os.path.exists(output_zip): os.remove(output_zip)
+        raise
+
+def _copy_entry(old_zip, zipf, arcname):
+    with stage("zip_copy") as record:
+        copy_zip_entry(old_zip, zipf, arcname)
+        _record_zip_entry(record, zipf, arcname)
+
+def _staged(name, produce, *args):
+    """Envuelve produce(*args) para medirlo como etapa name de la traza activa."""
+    def run():
+        with stage(name) as record:
+            data = produce(*args)
+            record["bytes_out"] = len(data)
+        return data
+    return run
+
+def _entry_writers(policy, old_zip=None, old_entries=None, new_entries=None):
+    """
+    Devuelve (put, put_file) para escribir entradas en el ZIP.
+
+    put(zipf, arcname, input_key, produce) escribe el resultado de produce() (str o bytes).
+    put_file(zipf, path, arcname) vuelca un archivo desde disco.
+    En modo incremental (new_entries no es None) se reutiliza la entrada ya comprimida del ZIP
+    anterior cuando su clave de entrada coincide (sin llamar a produce) o cuando el resultado
+    producido es idéntico al anterior, siempre que se comprimiera con el mismo método y nivel,
+    y se anotan las claves en new_entries.
+    """
+    if new_entries is None:
+        def put(zipf, arcname, input_key, produce):
+            zip_writestr(zipf, arcname, produce(), policy)
+
+        def put_file(zipf, path, arcname):
+            zip_write_file(zipf, path, arcname, policy)
+
+        return put, put_file
+
+    old_entries = old_entries or {}
+
+    def previous_entry(arcname, compression):
+        # Sólo se reutiliza una entrada comprimida igual que la pediría ahora la política
+        previous = old_entries.get(arcname)
+        if old_zip is None or previous is None or arcname not in old_zip.NameToInfo:
+            return None
+        if previous.get("compression") != compression:
+            return None
+        return previous
+
+    def put(zipf, arcname, input_key, produce):
+        compression = list(_compression_for(arcname, policy))
+        previous = previous_entry(arcname, compression)
+        if previous and input_key is not None and previous["input"] == input_key:
+            _copy_entry(old_zip, zipf, arcname)
+            new_entries[arcname] = previous
+            return
+
+        data = produce()
+        output_key = hash_key(data)
+        if previous and previous["output"] == output_key:
+            _copy_entry(old_zip, zipf, arcname)
+        else:
+            zip_writestr(zipf, arcname, data, policy)
+        new_entries[arcname] = {"input": input_key, "output": output_key, "compression": compression}
+
+    def put_file(zipf, path, arcname):
+        stat = os.stat(path)
+        input_key = hash_key(os.path.abspath(path), str(stat.st_size), str(stat.st_mtime_ns))
+        compression = list(_compression_for(arcname, policy))
+        previous = previous_entry(arcname, compression)
+        if previous and previous["input"] == input_key:
+            _copy_entry(old_zip, zipf, arcname)
+        else:
+            zip_write_file(zipf, path, arcname, policy)
+        new_entries[arcname] = {"input": input_key, "output": None, "compression": compression}
+
+    return put, put_file
+
+def _write_assets(zipf, assets_paths, policy=None, put_file=None):
+    # Los archivos generados (SCOs, manifest, imágenes) tienen prioridad sobre los assets
+    for abs_path, arcname in iter_asset_files(assets_paths):
+        if arcname not in zipf.NameToInfo:
+            if put_file:
+                put_file(zipf, abs_path, arcname)
+            else:
+                zip_write_file(zipf, abs_path, arcname, policy)
+
+def _open_previous_package(output_zip_path, state):
+    if not state["entries"] or not os.path.exists(output_zip_path):
+        return None
+    try:
+        return zipfile.ZipFile(output_zip_path, 'r')
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+def build_scorm_package(tree_data, output_zip_path, course_title="Curso SCORM", assets_paths=None, image_store=None,
+                        stored_extensions=None, compresslevel=None, shared_resources=False, slide_viewport=None,
+                        single_page=False, incremental=False, reproducible=False, workers=1, html_parser=None):
+    """
+    Genera el paquete SCORM escribiendo cada SCO, las imágenes, el manifest y los assets
+    directamente como entradas del ZIP.
+
+    :param output_zip_path: Ruta, fichero binario abierto o BytesIO de destino.
+    :param stored_extensions: Extensiones guardadas sin comprimir (ver compression_policy).
+    :param compresslevel: Nivel de deflate para el resto de archivos.
+    :param shared_resources: Escribir el CSS/JS en course.css/course.js una sola vez y
+        enlazarlos desde cada SCO en lugar de incrustarlos en todos.
+    :param slide_viewport: (ancho, alto) para partir las diapositivas al generar el paquete
+        en lugar de medirlas en el navegador.
+    :param single_page: Generar una página shell única con fragmentos por sección cargados
+        bajo demanda (ver render_spa_files) en lugar de un sco_N.html completo por nodo.
+    :param incremental: Reconstrucción incremental (sólo si output_zip_path es una ruta). Guarda
+        en <zip>.state.json los hashes de entrada y salida de cada entrada; en la siguiente
+        compilación sólo se renderizan los nodos cuyo contenido, título o prev/next han cambiado
+        y las entradas sin cambios se copian ya comprimidas desde el ZIP anterior.
+    :param reproducible: Salida reproducible: identificadores derivados del título del curso y de la
+        ruta de cada nodo, fechas de las entradas fijas y entradas ordenadas. La misma entrada con
+        la misma configuración produce siempre los mismos bytes.
+    :param workers: Hilos que renderizan y comprimen las entradas en paralelo (1 = en serie,
+        None = núcleos disponibles). Un único escritor las añade al ZIP en el mismo orden, así
+        que el paquete no cambia. La compilación incremental se hace siempre en serie.
+    :param html_parser: Backend de BeautifulSoup para partir las diapositivas (slide_viewport).
+    """
+    tree_nodes, global_resources = tree_data
+    policy = compression_policy(stored_extensions, compresslevel, reproducible)
+    shared_files = {}
+    # En modo página única el CSS/JS ya se carga una sola vez en el shell
+    if shared_resources and not single_page:
+        shared_files, global_resources = extract_shared_resources(global_resources)
+
+    if single_page:
+        spa_files = render_spa_files(tree_nodes, global_resources, course_title=course_title)
+        entries = ((name, None, lambda text=text: text) for name, text in spa_files)
+    else:
+        flat_list, render_node, render_key = prepare_tree_render(tree_nodes, global_resources, slide_viewport=slide_viewport,
+                                                                 html_parser=html_parser)
+        entries = (
+            (node['filename'],
+             hash_key(render_key, node['title'], node['content'], node['prev'], node['next']),
+             _staged("render", render_node, node))
+            for node in flat_list
+        )
+
+    incremental = incremental and isinstance(output_zip_path, (str, os.PathLike))
+    old_zip, new_entries = None, None
+    if incremental:
+        state_path = state_path_for(output_zip_path)
+        # La compresión se comprueba por entrada (ver _entry_writers): cambiar zip_stored_extensions
+        # o zip_compresslevel sólo reescribe las entradas afectadas
+        options_key = hash_key(repr(single_page), repr(shared_resources), repr(reproducible))
+        state = load_build_state(state_path, options_key)
+        old_zip = _open_previous_package(output_zip_path, state)
+        new_entries = {}
+    put, put_file = _entry_writers(policy, old_zip, state["entries"] if incremental else None, new_entries)
+    parallel = workers != 1 and not incremental
+
+    def write_entries(zipf):
+        if single_page:
+            # El shell y los fragmentos se generan al recorrer render_spa_files
+            with stage("render") as record:
+                jobs = list(entries)
+                record["bytes_out"] = sum(len(text()) for _, _, text in jobs)
+        else:
+            jobs = list(entries)
+        for filename, text in shared_files.items():
+            jobs.append((filename, None, lambda text=text: text))
+        image_files = []
+        for rel_path, image_data in (image_store or {}).items():
+            # El nombre ya es el hash del contenido
+            jobs.append((rel_path, rel_path, _staged("image_load", image_bytes, image_data)))
+            image_files.append(rel_path)
+        with stage("manifest") as record:
+            manifest = render_imsmanifest(course_title, tree_nodes, extra_files=image_files, shared_files=list(shared_files),
+                                          single_page=single_page, reproducible=reproducible)
+            record["bytes_out"] = len(manifest)
+        jobs.append(("imsmanifest.xml", None, lambda: manifest))
+
+        if not reproducible:
+            if parallel:
+                assets = [(arcname, abs_path) for abs_path, arcname in iter_asset_files(assets_paths)]
+                write_entries_parallel(zipf, [(job[0], job[2]) for job in jobs] + assets, policy, workers)
+                return
+            for arcname, input_key, produce in jobs:
+                put(zipf, arcname, input_key, produce)
+            _write_assets(zipf, assets_paths, policy, put_file)
+            return
+
+        # Modo reproducible: todas las entradas (también los assets) en orden alfabético
+        generated = {job[0] for job in jobs}
+        asset_jobs = [(arcname, abs_path) for abs_path, arcname in iter_asset_files(assets_paths) if arcname not in generated]
+        ordered = sorted([(job[0], job) for job in jobs] + [(arcname, path) for arcname, path in asset_jobs], key=lambda x: x[0])
+        if parallel:
+            items = [(arcname, job[2] if isinstance(job, tuple) else job) for arcname, job in ordered]
+            write_entries_parallel(zipf, items, policy, workers)
+            return
+        for arcname, job in ordered:
+            if isinstance(job, tuple):
+                put(zipf, *job)
+            elif arcname not in zipf.NameToInfo:
+                put_file(zipf, job, arcname)
+
+    with stage("package") as record:
+        if not incremental:
+            write_package(output_zip_path, write_entries)
+        else:
+            tmp_path = f"{output_zip_path}.{os.getpid()}.tmp"
+            try:
+                write_package(tmp_path, write_entries)
+            finally:
+                if old_zip is not None: old_zip.close()
+            os.replace(tmp_path, output_zip_path)
+            save_build_state(state_path, options_key, new_entries)
+        record["images"] = len(image_store or {})
+        if isinstance(output_zip_path, (str, os.PathLike)):
+            record["bytes_out"] = os.path.getsize(output_zip_path)
+    print(f"✅ SCORM Generado: {output_zip_path}")
 
 # --- LOGICA DE PAGINACIÓN (RENOMBRADO) ---
 def process_pagination_titles(nodes):
@@ -194,12 +823,15 @@ def process_pagination_titles(nodes):
     los renombra añadiendo (x/y).
     Ejemplo: "Cosméticos" -> "Cosméticos (1/2)" y "Cosméticos (2/2)"
     """
-    if not nodes:
-        return
+    # Cada lista de hermanos se procesa una vez; las de los hijos se apilan (sin recursión)
+    pending = [nodes]
+    while pending:
+        nodes = pending.pop()
+        if not nodes:
+            continue
 
-    # Agrupar nodos consecutivos con el mismo título base
-    groups = []
-    if nodes:
+        # Agrupar nodos consecutivos con el mismo título base
+        groups = []
         current_group = [nodes[0]]
         for i in range(1, len(nodes)):
             if nodes[i]['title'] == nodes[i-1]['title']:
@@ -209,164 +841,244 @@ def process_pagination_titles(nodes):
                 current_group = [nodes[i]]
         groups.append(current_group)
 
-    # Renombrar grupos
-    for group in groups:
-        total = len(group)
-        if total > 1:
-            for index, node in enumerate(group):
-                # Añadimos el contador al título
-                node['title'] = f"{node['title']} ({index + 1}/{total})"
+        # Renombrar grupos
+        for group in groups:
+            total = len(group)
+            if total > 1:
+                for index, node in enumerate(group):
+                    # Añadimos el contador al título
+                    node['title'] = f"{node['title']} ({index + 1}/{total})"
 
-        # Recursividad para los hijos de cada nodo
-        for node in group:
-            if node['children']:
-                process_pagination_titles(node['children'])
+        # Los hijos de cada nodo, después
+        pending.extend(node['children'] for node in reversed(nodes) if node['children'])
 
 # --- CONVERTER (CON LOGICA DE STRONG) ---
-def html_to_hierarchical_tree(html_content, split_tags=['h1', 'h2', 'h3']):
-    soup = BeautifulSoup(html_content, "html.parser")
-    resources = {"css": "", "js": ""}
+def _mark_splitter_containers(soup, split_tags):
+    """
+    Devuelve los id() de todos los elementos que contienen algún splitter entre sus descendientes.
+    Se calcula en una sola pasada subiendo desde cada splitter hasta el primer ancestro ya marcado,
+    de modo que cada elemento se visita como mucho una vez.
+    """
+    containers = set()
+    for splitter in soup.find_all(split_tags):
+        parent = splitter.parent
+        while parent is not None and id(parent) not in containers:
+            containers.add(id(parent))
+            parent = parent.parent
+    return containers
+
+def _new_tree():
+    """Estado del separador jerárquico: pila de secciones abiertas (TreeNode) y nodos creados."""
+    # Nodo raíz invisible
+    root_node = TreeNode('Inicio', 0)
+    # El contenido de cada nodo se acumula en su lista de fragmentos (ver tree.TreeNode)
+    return {"root": root_node, "stack": [root_node], "nodes": [root_node]}
+
+def _tree_open_section(tree, level, title, html):
+    """Abre una sección nueva (encabezado de nivel level) cerrando las de nivel mayor o igual."""
+    stack = tree["stack"]
+    while len(stack) > 1 and stack[-1]['level'] >= level:
+        stack.pop()
+
+    new_node = TreeNode(title, level, [html])
+    tree["nodes"].append(new_node)
+    stack[-1]['children'].append(new_node)
+    stack.append(new_node)
+
+def _tree_append(tree, html):
+    """Añade contenido a la sección abierta más profunda."""
+    tree["stack"][-1].fragments.append(html)
+
+def _finish_tree(tree):
+    """Une los fragmentos de cada nodo y devuelve los nodos de primer nivel."""
+    root_node = tree["root"]
+    for node in tree["nodes"]:
+        node.content = "".join(node.fragments)
+
+    if root_node.content.strip():
+        intro_node = TreeNode('Introducción', 1)
+        intro_node.content = root_node.content
+        root_node['children'].insert(0, intro_node)
+
+    # 2. PROCESAR PAGINACIÓN (1/X)
+    # Antes de devolver el árbol, renombramos los nodos repetidos
+    process_pagination_titles(root_node['children'])
+
+    return root_node['children']
+
+def html_to_hierarchical_tree(html_content, split_tags=['h1', 'h2', 'h3'], parser=None):
+    from bs4 import BeautifulSoup, Tag
+    with stage("parse_html", bytes_in=len(html_content)):
+        soup = BeautifulSoup(html_content, resolve_html_parser(parser))
+    css_parts, js_parts = [], []
 
     # 1. Extraer Assets
     for tag in soup.find_all(['style', 'script', 'link']):
         if tag.name == 'link' and 'stylesheet' in tag.get('rel', []):
-             resources["css"] += str(tag) + "\n"
+             css_parts.append(str(tag) + "\n")
              tag.extract()
         elif tag.name == 'style':
-            if tag.string: resources["css"] += str(tag) + "\n"
+            if tag.string: css_parts.append(str(tag) + "\n")
             tag.extract()
         elif tag.name == 'script':
-            resources["js"] += str(tag) + "\n"
+            js_parts.append(str(tag) + "\n")
             tag.extract()
 
+    resources = {"css": "".join(css_parts), "js": "".join(js_parts)}
+
     header_levels = {tag: int(tag[1]) for tag in split_tags}
-    
-    # Nodo raíz invisible
-    root_node = {
-        'title': 'Inicio', 'level': 0, 'content': '', 'children': [], 'filename': ''
-    }
-    stack = [root_node]
+    tree = _new_tree()
     
     # Tags que provocan un split normal (headers) o forzado (strong)
     # Strong no tiene nivel numérico en header_levels, se maneja especial.
-    
-    def element_contains_splitters(element):
-        """Revisa si el elemento contiene headers O strongs dentro."""
-        if not isinstance(element, Tag): return False
-        # Buscamos headers definidos o strong
-        return bool(element.find(split_tags)) # + ['strong']))
+    # Contenedores con headers dentro (calculado una vez, de abajo arriba)
+    splitter_containers = _mark_splitter_containers(soup, split_tags)
 
     def process_element(element):
+        """Procesa un hijo; devuelve sus hijos si hay que entrar en él (drill down)."""
         if not isinstance(element, Tag):
             if str(element).strip(): 
-                stack[-1]['content'] += str(element)
-            return
+                _tree_append(tree, str(element))
+            return None
 
         tag_name = element.name.lower()
 
         # CASO A: Es un HEADER (H1, H2, H3...)
         if tag_name in header_levels:
-            level = header_levels[tag_name]
             title = element.get_text(strip=True) or "Sin Título"
-            
-            # Cerrar niveles más profundos o iguales
-            while len(stack) > 1 and stack[-1]['level'] >= level:
-                stack.pop()
-            
-            new_node = {
-                'title': title,
-                'level': level,
-                'content': str(element), 
-                'children': [],
-                'filename': ''
-            }
-            stack[-1]['children'].append(new_node)
-            stack.append(new_node)
+            _tree_open_section(tree, header_levels[tag_name], title, str(element))
 
         # CASO C: Contenedor con headers o strongs dentro (Drill down)
-        elif element_contains_splitters(element):
+        elif id(element) in splitter_containers:
             # No guardamos el tag wrapper, entramos en sus hijos
-            for child in element.children:
-                process_element(child)
+            return element.children
 
         # CASO D: Contenido normal
         else:
-            stack[-1]['content'] += str(element)
-
-    start_node = soup.body if soup.body else soup
-    for child in start_node.children:
-        process_element(child)
-
-    if root_node['content'].strip():
-        intro_node = {
-            'title': 'Introducción',
-            'level': 1,
-            'content': root_node['content'],
-            'children': [],
-            'filename': ''
-        }
-        root_node['children'].insert(0, intro_node)
+            _tree_append(tree, str(element))
+        return None
 
-    # 2. PROCESAR PAGINACIÓN (1/X)
-    # Antes de devolver el árbol, renombramos los nodos repetidos
-    process_pagination_titles(root_node['children'])
+    # Recorrido iterativo (sin recursión) para soportar anidamientos muy profundos
+    with stage("split_tree") as record:
+        start_node = soup.body if soup.body else soup
+        pending = [iter(list(start_node.children))]
+        while pending:
+            element = next(pending[-1], None)
+            if element is None:
+                pending.pop()
+                continue
+            children = process_element(element)
+            if children is not None:
+                pending.append(iter(list(children)))
+        nodes = _finish_tree(tree)
+        record["sections"] = len(tree["nodes"]) - 1
 
-    return root_node['children'], resources
+    return nodes, resources
 
-def build_scorm_wrapper_package(output_zip_path, course_title, curso_id, visor_url_base, extra_params=None, assets_paths=None):
+def blocks_to_hierarchical_tree(blocks, split_tags=['h1', 'h2', 'h3']):
+    """
+    Igual que html_to_hierarchical_tree pero a partir de bloques ya separados (tag, html, texto),
+    p. ej. los de docx_reader.iter_docx_blocks: se consumen según llegan, sin montar ni volver a
+    parsear el HTML del documento completo.
+    """
+    header_levels = {tag: int(tag[1]) for tag in split_tags}
+    tree = _new_tree()
+    # La lectura del documento ocurre al consumir los bloques: se mide junto con el reparto
+    with stage("read_split") as record:
+        blocks_count = bytes_out = 0
+        for tag_name, html, text in blocks:
+            blocks_count += 1
+            bytes_out += len(html)
+            if tag_name in header_levels:
+                _tree_open_section(tree, header_levels[tag_name], text.strip() or "Sin Título", html)
+            else:
+                _tree_append(tree, html)
+        nodes = _finish_tree(tree)
+        record.update(blocks=blocks_count, bytes_out=bytes_out, sections=len(tree["nodes"]) - 1)
+    return nodes, {"css": "", "js": ""}
+
+WRAPPER_JS_FILE = "scorm_wrapper.js"
+
+_VISOR_URL_PLACEHOLDER = "\x00VISOR_URL\x00"
+# Identificadores estables como valor de identifier/identifierref (en el texto de los títulos las
+# comillas van escapadas, así que un título nunca coincide)
+_STABLE_ID_RE = re.compile(r'(\bidentifier(?:ref)?=")((MANIFEST|ITEM|RES)-[0-9a-f]{32})"')
+
+@lru_cache(maxsize=256)
+def _wrapper_skeleton(course_title):
+    """
+    Partes fijas de un wrapper para un título: index.html partido alrededor de la URL del visor,
+    el imsmanifest.xml (con identificadores estables) y scorm_wrapper.js. Sólo la URL
+    (curso_id y parámetros) cambia entre cursos, así que se renderiza una vez por título.
+    """
+    src_js = os.path.join(TEMPLATE_DIR, WRAPPER_JS_FILE)
+    if not os.path.exists(src_js):
+        raise FileNotFoundError(f"No encuentro {WRAPPER_JS_FILE} en {TEMPLATE_DIR}")
+    with open(src_js, "rb") as f:
+        wrapper_js = f.read()
+
+    html_content = get_template_env().get_template("wrapper.html").render(
+        title=course_title,
+        visor_url=_VISOR_URL_PLACEHOLDER
+    )
+    html_head, html_tail = html_content.split(_VISOR_URL_PLACEHOLDER, 1)
+
+    dummy_node = [{
+        "title": course_title,
+        "filename": "index.html",
+        "children": []
+    }]
+    manifest = render_imsmanifest(course_title, dummy_node, reproducible=True)
+    return html_head, html_tail, manifest, wrapper_js
+
+def _fresh_ids(manifest):
+    """
+    Sustituye los identificadores estables del manifest por uuid4 (como en el modo no reproducible).
+    Sólo se tocan los atributos identifier/identifierref; cada identificador antiguo se cambia
+    siempre por el mismo nuevo para que las referencias sigan apuntando a su resource.
+    """
+    fresh = {}
+    def replace(match):
+        stable_id = match.group(2)
+        if stable_id not in fresh:
+            fresh[stable_id] = f"{match.group(3)}-{uuid4().hex}"
+        return f'{match.group(1)}{fresh[stable_id]}"'
+    return _STABLE_ID_RE.sub(replace, manifest)
+
+def build_scorm_wrapper_package(output_zip_path, course_title, curso_id, visor_url_base, extra_params=None, assets_paths=None,
+                                reproducible=False):
     """
     Genera un SCORM 'ligero' que apunta a la nube.
     NO procesa HTML, NO parte en trozos. Solo crea el puente.
+
+    :param output_zip_path: Ruta, fichero binario abierto o BytesIO de destino.
+    :param reproducible: Identificadores y fechas fijos (ver build_scorm_package).
     """
     
     extra_params = extra_params or {}
-    temp_dir = f"scorm_wrapper_temp_{uuid4().hex}"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    try:
-        query_params = {
-            "curso_id": curso_id,
-            **extra_params
-        }
-        visor_full_url = f"{visor_url_base}?{urlencode(query_params)}"
-
-        src_js = os.path.join(TEMPLATE_DIR, "scorm_wrapper.js")
-        dst_js = os.path.join(temp_dir, "scorm_wrapper.js")
-        
-        if os.path.exists(src_js):
-            shutil.copy(src_js, dst_js)
-        else:
-            print(f"❌ ERROR: No encuentro scorm_wrapper.js en {TEMPLATE_DIR}")
-        
-        shutil.copy(os.path.join(TEMPLATE_DIR, "scorm_wrapper.js"), os.path.join(temp_dir, "scorm_wrapper.js"))
-
-        env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-        template = env.get_template("wrapper.html")
-        
-        html_content = template.render(
-            title=course_title,
-            visor_url=visor_full_url # Ej: https://app.tuempresa.com/visor
-        )
-        
-        with open(os.path.join(temp_dir, "index.html"), "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        dummy_node = [{
-            "title": course_title,
-            "filename": "index.html",
-            "children": []
-        }]
-        
-        build_imsmanifest(course_title, dummy_node, temp_dir)
-
-        with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    abs_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(abs_path, temp_dir)
-                    zipf.write(abs_path, rel_path)
-                    
-        print(f"✅ SCORM wrapper (Nube) Generado: {output_zip_path}")
-        
-    finally:
-        if os.path.exists(temp_dir): shutil.rmtree(temp_dir)
\ No newline at end of file
+    query_params = {
+        "curso_id": curso_id,
+        **extra_params
+    }
+    visor_full_url = f"{visor_url_base}?{urlencode(query_params)}"
+
+    # Esqueleto ya renderizado: sólo se inserta la URL del visor
+    with stage("wrapper_skeleton"):
+        html_head, html_tail, manifest, wrapper_js = _wrapper_skeleton(course_title)
+        html_content = html_head + visor_full_url + html_tail
+        if not reproducible:
+            manifest = _fresh_ids(manifest)
+
+    policy = compression_policy(reproducible=reproducible)
+
+    def write_entries(zipf):
+        zip_writestr(zipf, "imsmanifest.xml", manifest, policy)
+        zip_writestr(zipf, "index.html", html_content, policy)
+        zip_writestr(zipf, WRAPPER_JS_FILE, wrapper_js, policy)
+        _write_assets(zipf, assets_paths, policy)
+
+    with stage("package") as record:
+        write_package(output_zip_path, write_entries)
+        if isinstance(output_zip_path, (str, os.PathLike)):
+            record["bytes_out"] = os.path.getsize(output_zip_path)
+    print(f"✅ SCORM wrapper (Nube) Generado: {output_zip_path}")
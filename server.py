@@ -0,0 +1,424 @@
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qsl
+
+from .cli import convert_file, load_config, INPUT_EXTENSIONS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 16                  # Trabajos en espera además de los que se están ejecutando
+DEFAULT_MAX_UPLOAD = 100 * 1024 * 1024  # Tamaño máximo de un documento subido (bytes)
+DEFAULT_RESULT_TTL = 600                # Segundos que se conserva un resultado no descargado
+
+# Claves de configuración que una petición puede cambiar (?config= o "config" del wrapper): sólo
+# presentación del paquete. Rutas (trace_file, cachés), pools y callbacks quedan en la
+# configuración del servicio
+REQUEST_CONFIG_KEYS = frozenset((
+    "split_level", "split_tags", "course_title", "single_page", "prepaginate", "slide_viewport",
+    "shared_resources", "reproducible", "external_images",
+))
+
+CHUNK_SIZE = 64 * 1024
+MAX_HEADER_LINES = 100
+
+_STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def build_wrapper_file(output_zip, curso_id, config, extra_params):
+    """Equivalente a convert_file para build_scorm_wrapper (se ejecuta en el pool)."""
+    from . import build_scorm_wrapper
+
+    started = time.perf_counter()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            ok = build_scorm_wrapper(curso_id, output_zip, config, extra_params)
+        error = None if ok else (log.getvalue().strip() or "La conversión no generó el paquete")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "ok": error is None,
+        "seconds": round(time.perf_counter() - started, 3),
+        "output_size": os.path.getsize(output_zip) if error is None else None,
+        "error": error,
+    }
+
+
+def create_app(config=None, workers=None, max_queue=DEFAULT_MAX_QUEUE, max_upload=DEFAULT_MAX_UPLOAD,
+               result_ttl=DEFAULT_RESULT_TTL, work_dir=None):
+    """
+    Estado del servicio: pool de procesos, trabajos y límites. Cada trabajo tiene su propio
+    directorio temporal bajo work_dir, así que los trabajos concurrentes no comparten archivos.
+
+    :param config: Configuración base; cada petición puede sobrescribir las claves de
+        REQUEST_CONFIG_KEYS con ?config=<json>.
+    :param workers: Conversiones simultáneas (procesos del pool; None = núcleos disponibles).
+    :param max_queue: Trabajos en espera admitidos; por encima se responde 503 (backpressure).
+    :param max_upload: Tamaño máximo del cuerpo de una petición.
+    :param result_ttl: Segundos que se guarda un resultado no descargado.
+    """
+    workers = workers or os.cpu_count() or 1
+    base_config = dict(config or load_config())
+    if base_config.get("image_workers") is None:
+        base_config["image_workers"] = 1
+    return {
+        "config": base_config,
+        "workers": workers,
+        "max_queue": max_queue,
+        "max_upload": max_upload,
+        "result_ttl": result_ttl,
+        "work_dir": work_dir or tempfile.mkdtemp(prefix="docs2scorm-"),
+        "executor": ProcessPoolExecutor(max_workers=workers),
+        "slots": asyncio.Semaphore(workers),
+        "jobs": {},
+        "started": time.time(),
+        "completed": 0,
+        "failed": 0,
+    }
+
+
+def _job_status(job):
+    return {key: job[key] for key in ("id", "kind", "status", "created", "started", "finished",
+                                      "seconds", "output_size", "error")}
+
+
+def _active_jobs(app):
+    return sum(1 for job in app["jobs"].values() if job["status"] in ("queued", "running"))
+
+
+def _remove_job(app, job_id):
+    job = app["jobs"].pop(job_id, None)
+    if job:
+        shutil.rmtree(job["dir"], ignore_errors=True)
+
+
+def _expire_jobs(app):
+    now = time.time()
+    for job_id, job in list(app["jobs"].items()):
+        if job["finished"] and now - job["finished"] > app["result_ttl"]:
+            _remove_job(app, job_id)
+
+
+async def _run_job(app, job, func, *args):
+    async with app["slots"]:
+        job["status"] = "running"
+        job["started"] = time.time()
+        loop = asyncio.get_running_loop()
+        executor = app["executor"]
+        try:
+            result = await loop.run_in_executor(executor, func, *args)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and app["executor"] is executor:
+                # Un proceso del pool murió (memoria, fallo en lxml o Pillow...) y el pool ya no
+                # admite trabajos: se sustituye por uno nuevo y sólo fallan los que estaban en él
+                app["executor"] = ProcessPoolExecutor(max_workers=app["workers"])
+                executor.shutdown(wait=False)
+            result = {"ok": False, "seconds": None, "output_size": None, "error": f"{type(e).__name__}: {e}"}
+
+    job["finished"] = time.time()
+    job["seconds"] = result.get("seconds")
+    job["output_size"] = result.get("output_size")
+    job["error"] = result.get("error")
+    job["status"] = "done" if result.get("ok") else "failed"
+    app["completed" if result.get("ok") else "failed"] += 1
+
+
+def _apply_overrides(config, overrides):
+    """Aplica las claves de configuración de una petición (sólo las de REQUEST_CONFIG_KEYS)."""
+    if not isinstance(overrides, dict):
+        raise HTTPError(400, "config debe ser un objeto JSON")
+    rejected = sorted(set(overrides) - REQUEST_CONFIG_KEYS)
+    if rejected:
+        raise HTTPError(400, f"Claves de config no permitidas: {', '.join(rejected)} "
+                             f"(admitidas: {', '.join(sorted(REQUEST_CONFIG_KEYS))})")
+    config.update(overrides)
+
+
+def _request_config(app, query):
+    config = dict(app["config"])
+    if "config" in query:
+        try:
+            overrides = json.loads(query["config"])
+        except ValueError as e:
+            raise HTTPError(400, f"config no es JSON válido: {e}")
+        _apply_overrides(config, overrides)
+    if "course_title" in query:
+        config["course_title"] = query["course_title"]
+    return config
+
+
+def submit_job(app, kind, query, body):
+    """
+    Registra y encola un trabajo. kind: "doc" (.docx/.dotx/.odt), "html" o "wrapper".
+    Devuelve el estado inicial del trabajo; lanza HTTPError(503) si la cola está llena.
+    """
+    _expire_jobs(app)
+    if _active_jobs(app) >= app["workers"] + app["max_queue"]:
+        raise HTTPError(503, "Cola de conversión llena, reintentar más tarde", {"Retry-After": "5"})
+
+    config = _request_config(app, query)
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(app["work_dir"], job_id)
+    output_zip = os.path.join(job_dir, "scorm.zip")
+
+    if kind == "wrapper":
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"Cuerpo JSON no válido: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+        curso_id = payload.get("curso_id") or query.get("curso_id")
+        if not curso_id:
+            raise HTTPError(400, "Falta curso_id")
+        extra_params = payload.get("extra_params") or {}
+        if not isinstance(extra_params, dict):
+            raise HTTPError(400, "extra_params debe ser un objeto JSON")
+        _apply_overrides(config, payload.get("config") or {})
+        func, args = build_wrapper_file, (output_zip, str(curso_id), config, extra_params)
+    else:
+        filename = os.path.basename(query.get("filename", "") or ("documento.html" if kind == "html" else ""))
+        if kind == "html" and not filename.lower().endswith((".html", ".htm")):
+            filename += ".html"
+        if not filename.lower().endswith(INPUT_EXTENSIONS):
+            raise HTTPError(400, "Indica ?filename= con extensión .docx, .dotx, .odt o .html")
+        if not body:
+            raise HTTPError(400, "Cuerpo vacío: envía el documento como cuerpo de la petición")
+        input_path = os.path.join(job_dir, filename)
+        func, args = convert_file, (input_path, output_zip, config)
+
+    os.makedirs(job_dir)
+    if kind != "wrapper":
+        with open(args[0], "wb") as f:
+            f.write(body)
+
+    job = {
+        "id": job_id, "kind": kind, "status": "queued", "dir": job_dir, "output": output_zip,
+        "created": time.time(), "started": None, "finished": None,
+        "seconds": None, "output_size": None, "error": None,
+    }
+    app["jobs"][job_id] = job
+    job["task"] = asyncio.get_running_loop().create_task(_run_job(app, job, func, *args))
+    return job
+
+
+# ==========================================
+# HTTP/1.1 MÍNIMO SOBRE asyncio (una petición por conexión)
+# ==========================================
+
+async def _read_request(reader, max_upload):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Línea de petición no válida")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(400, "Demasiadas cabeceras")
+
+    body = b""
+    if method == "POST":
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Envía Content-Length (no se admite chunked)")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Content-Length no válido")
+        if length > max_upload:
+            raise HTTPError(413, f"El documento supera el límite de {max_upload} bytes")
+        body = await reader.readexactly(length)
+
+    url = urlsplit(target)
+    return method, url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), body
+
+
+async def _send(writer, status, body=b"", content_type="application/json", headers=None):
+    if not isinstance(body, bytes):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = [f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def _send_file(writer, path, download_name):
+    """Envía el ZIP por bloques: la memoria no depende del tamaño del paquete."""
+    size = os.path.getsize(path)
+    head = ["HTTP/1.1 200 OK",
+            "Content-Type: application/zip",
+            f"Content-Length: {size}",
+            f'Content-Disposition: attachment; filename="{download_name}"',
+            "Connection: close"]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+
+
+def _health(app):
+    jobs = app["jobs"].values()
+    return {
+        "status": "ok",
+        "workers": app["workers"],
+        "max_queue": app["max_queue"],
+        "running": sum(1 for job in jobs if job["status"] == "running"),
+        "queued": sum(1 for job in jobs if job["status"] == "queued"),
+        "completed": app["completed"],
+        "failed": app["failed"],
+        "uptime": round(time.time() - app["started"], 1),
+    }
+
+
+async def handle_request(app, method, path, query, body, writer):
+    """
+    Rutas:
+        GET  /health                 Estado del servicio y de la cola
+        POST /jobs/doc?filename=...  Documento .docx/.dotx/.odt como cuerpo (doc_to_scorm)
+        POST /jobs/html              HTML como cuerpo (html_to_scorm)
+        POST /jobs/wrapper           JSON {"curso_id", "extra_params", "config"} (build_scorm_wrapper)
+        GET  /jobs/<id>              Estado del trabajo
+        GET  /jobs/<id>/result       ZIP generado (?wait=1 espera a que termine)
+        DELETE /jobs/<id>            Descarta el trabajo y sus archivos
+    Las peticiones POST admiten ?course_title= y ?config=<json> para sobrescribir la configuración
+    (sólo las claves de REQUEST_CONFIG_KEYS; cualquier otra responde 400).
+    """
+    parts = path.strip("/").split("/")
+
+    if path == "/health":
+        if method != "GET":
+            raise HTTPError(405, "Método no permitido")
+        return await _send(writer, 200, _health(app))
+
+    if parts[0] != "jobs" or len(parts) < 2 or len(parts) > 3:
+        raise HTTPError(404, "Ruta no encontrada")
+
+    if method == "POST" and len(parts) == 2:
+        if parts[1] not in ("doc", "html", "wrapper"):
+            raise HTTPError(404, "Tipo de trabajo desconocido (doc, html, wrapper)")
+        job = submit_job(app, parts[1], query, body)
+        return await _send(writer, 202, _job_status(job), headers={"Location": f"/jobs/{job['id']}"})
+
+    job = app["jobs"].get(parts[1])
+    if job is None:
+        raise HTTPError(404, "Trabajo no encontrado")
+
+    if len(parts) == 2:
+        if method == "GET":
+            return await _send(writer, 200, _job_status(job))
+        if method == "DELETE":
+            if job["status"] in ("queued", "running"):
+                raise HTTPError(409, "El trabajo todavía no ha terminado")
+            _remove_job(app, job["id"])
+            return await _send(writer, 200, {"id": job["id"], "status": "deleted"})
+        raise HTTPError(405, "Método no permitido")
+
+    if parts[2] != "result" or method != "GET":
+        raise HTTPError(404, "Ruta no encontrada")
+    if query.get("wait") in ("1", "true") and not job["finished"]:
+        await asyncio.shield(job["task"])
+    if job["status"] == "failed":
+        raise HTTPError(500, job["error"] or "La conversión falló")
+    if job["status"] != "done":
+        raise HTTPError(409, f"El trabajo está en estado '{job['status']}'")
+    await _send_file(writer, job["output"], f"scorm_{job['id']}.zip")
+    # Resultado entregado: se liberan los archivos del trabajo
+    _remove_job(app, job["id"])
+
+
+async def _handle_connection(app, reader, writer):
+    try:
+        try:
+            request = await _read_request(reader, app["max_upload"])
+            if request is not None:
+                await handle_request(app, *request, writer)
+        except HTTPError as e:
+            await _send(writer, e.status, {"error": str(e)}, headers=e.headers)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            print(f"❌ Error atendiendo la petición: {e}")
+            await _send(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **app_options):
+    """Arranca el servicio y atiende peticiones hasta que se cancela (Ctrl+C)."""
+    app = create_app(**app_options)
+    server = await asyncio.start_server(lambda r, w: _handle_connection(app, r, w), host, port)
+    print(f"🚀 docs2scorm escuchando en http://{host}:{port} ({app['workers']} procesos, cola {app['max_queue']})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        app["executor"].shutdown(wait=False)
+        shutil.rmtree(app["work_dir"], ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="docs2scorm-server", description="Servicio HTTP de conversión a SCORM.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Dirección de escucha (por defecto: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Puerto (por defecto: {DEFAULT_PORT})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Conversiones simultáneas (por defecto: todos los núcleos)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="Trabajos en espera antes de responder 503")
+    parser.add_argument("--max-upload", type=int, default=DEFAULT_MAX_UPLOAD, help="Tamaño máximo de un documento (bytes)")
+    parser.add_argument("--result-ttl", type=int, default=DEFAULT_RESULT_TTL, help="Segundos que se guarda un resultado no descargado")
+    parser.add_argument("-c", "--config", help="Archivo JSON con la configuración base (ver config.py)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(
+            args.host, args.port,
+            config=load_config(args.config),
+            workers=args.workers,
+            max_queue=args.max_queue,
+            max_upload=args.max_upload,
+            result_ttl=args.result_ttl,
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
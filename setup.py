@@ -14,7 +14,8 @@ setup(
     install_requires=requirements,
     entry_points={
         "console_scripts": [
-            "docs2scorm=docs2scorm.cli:main"
+            "docs2scorm=docs2scorm.cli:main",
+            "docs2scorm-server=docs2scorm.server:main"
         ]
     },
     package_data={
@@ -24,7 +25,16 @@ setup(
     description="Convierte documentos .docx/.odt en paquetes SCORM.",
     classifiers=[
         "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: 3.12",
+        "Programming Language :: Python :: 3.13",
         "License :: GPL-3.0"
     ],
-    python_requires='>=3.7',
+    # incremental.write_raw_zip_entry (copia de entradas ya comprimidas y escritura en paralelo)
+    # usa atributos internos de zipfile.ZipFile: el límite superior es la última versión en la
+    # que se ha pasado tests/test_incremental.py. Para admitir una nueva, pasar las pruebas y subirlo.
+    python_requires='>=3.8,<3.14',
 )
@@ -0,0 +1,20 @@
+import os
+import sys
+import importlib.util
+
+# La raíz del repositorio es el propio paquete docs2scorm (no hay un directorio docs2scorm/
+# dentro): para las pruebas se importa desde aquí con ese nombre, sin necesidad de instalarlo.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_package():
+    """Importa la raíz del repositorio como el paquete docs2scorm y lo devuelve."""
+    module = sys.modules.get("docs2scorm")
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(
+        "docs2scorm", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["docs2scorm"] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,169 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _package import load_package  # noqa: E402
+
+load_package()
+
+
+def make_image(width=120, height=80, color=(40, 120, 200)):
+    """PNG determinista (degradado horizontal) para las pruebas."""
+    from PIL import Image
+    image = Image.new("RGB", (width, height), color)
+    for x in range(width):
+        for y in range(0, height, 4):
+            image.putpixel((x, y), (x * 2 % 256, color[1], color[2]))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _add_hyperlink(paragraph, url, text):
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    r_id = paragraph.part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("r:id"), r_id)
+    run = OxmlElement("w:r")
+    t = OxmlElement("w:t")
+    t.text = text
+    run.append(t)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def _add_list_item(doc, text, style, num_id, level=0):
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    paragraph = doc.add_paragraph(text, style=style)
+    num_pr = OxmlElement("w:numPr")
+    ilvl = OxmlElement("w:ilvl")
+    ilvl.set(qn("w:val"), str(level))
+    num = OxmlElement("w:numId")
+    num.set(qn("w:val"), str(num_id))
+    num_pr.append(ilvl)
+    num_pr.append(num)
+    paragraph._p.get_or_add_pPr().append(num_pr)
+    return paragraph
+
+
+def make_rich_docx(path):
+    """
+    .docx con encabezados, runs con formato, hipervínculos, listas con viñetas y numeradas,
+    imágenes (sueltas y junto a texto) y tablas (normal y de una sola celda).
+    """
+    from docx import Document
+    from docx.shared import Inches
+
+    doc = Document()
+    doc.add_heading("Introducción", 1)
+    paragraph = doc.add_paragraph("Texto normal, ")
+    paragraph.add_run("negrita").bold = True
+    paragraph.add_run(", ")
+    paragraph.add_run("cursiva").italic = True
+    paragraph.add_run(" y ")
+    both = paragraph.add_run("ambas")
+    both.bold = both.italic = True
+    paragraph.add_run(".")
+
+    paragraph = doc.add_paragraph("Más información en ")
+    _add_hyperlink(paragraph, "https://example.com/docs", "la documentación")
+    paragraph.add_run(" del proyecto.")
+
+    doc.add_heading("Listas", 2)
+    for index in range(3):
+        _add_list_item(doc, f"Elemento {index + 1}", "List Bullet", 1)
+    for index in range(2):
+        item = _add_list_item(doc, f"Paso {index + 1} ", "List Number", 2)
+        item.add_run("importante").bold = True
+    doc.add_paragraph("Párrafo tras la lista.")
+
+    doc.add_heading("Imágenes", 2)
+    doc.add_picture(io.BytesIO(make_image()), width=Inches(2))
+    paragraph = doc.add_paragraph("Imagen junto a texto: ")
+    paragraph.add_run().add_picture(io.BytesIO(make_image(color=(200, 60, 60))), width=Inches(1))
+
+    doc.add_heading("Tablas", 2)
+    table = doc.add_table(rows=3, cols=3)
+    for row_index, row in enumerate(table.rows):
+        for col_index, cell in enumerate(row.cells):
+            cell.text = f"Fila {row_index + 1} col {col_index + 1}"
+    doc.add_paragraph("Entre tablas.")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "Nota en una sola celda"
+    doc.add_heading("Final", 1)
+    doc.add_paragraph("Último párrafo.")
+    doc.save(path)
+    return path
+
+
+def _add_numbering(doc, num_id, formats):
+    """Añade a numbering.xml una lista num_id con un nivel por formato (bullet, decimal...)."""
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    numbering = doc.part.numbering_part.element
+    levels = "".join(
+        f'<w:lvl w:ilvl="{level}"><w:start w:val="1"/><w:numFmt w:val="{fmt}"/>'
+        f'<w:lvlText w:val="{"•" if fmt == "bullet" else f"%{level + 1}."}"/></w:lvl>'
+        for level, fmt in enumerate(formats))
+    # Los w:abstractNum van antes que los w:num
+    numbering.insert(0, parse_xml(f'<w:abstractNum {nsdecls("w")} w:abstractNumId="{num_id}">{levels}</w:abstractNum>'))
+    numbering.append(parse_xml(f'<w:num {nsdecls("w")} w:numId="{num_id}"><w:abstractNumId w:val="{num_id}"/></w:num>'))
+
+
+def make_structures_docx(path):
+    """
+    .docx con listas anidadas (y un nivel sin definir en numbering.xml) y una tabla con celdas
+    fusionadas: w:gridSpan, w:vMerge (restart/continue) y una fila que empieza con w:gridBefore.
+    """
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    doc = Document()
+    _add_numbering(doc, 90, ["bullet", "decimal"])
+    _add_numbering(doc, 91, ["decimal", "bullet"])
+    doc.add_heading("Listas anidadas", 1)
+    _add_list_item(doc, "Uno", "List Bullet", 90)
+    _add_list_item(doc, "Uno.a", "List Bullet 2", 90, level=1)
+    _add_list_item(doc, "Uno.b", "List Bullet 2", 90, level=1)
+    _add_list_item(doc, "Dos", "List Bullet", 90)
+    _add_list_item(doc, "Paso 1", "List Number", 91)
+    _add_list_item(doc, "Paso 1.1", "List Number 2", 91, level=1)
+    # La lista 91 sólo define dos niveles: el tercero es un párrafo normal
+    _add_list_item(doc, "Sin nivel", "List Number 3", 91, level=2)
+
+    doc.add_heading("Celdas fusionadas", 1)
+    table = doc.add_table(rows=4, cols=3)
+    for row_index, row in enumerate(table.rows):
+        for col_index, cell in enumerate(row.cells):
+            cell.text = f"{row_index}{col_index}"
+    # Fila 1: las dos primeras columnas en una celda (gridSpan); la última baja hasta la fila 2 (vMerge)
+    table.cell(1, 0).merge(table.cell(1, 1)).text = "10-11"
+    table.cell(1, 2).merge(table.cell(2, 2)).text = "12-22"
+    # Formato y enlace dentro de una celda
+    paragraph = table.cell(3, 2).paragraphs[0]
+    paragraph.add_run(" subrayado").underline = True
+    paragraph.add_run(" y ")
+    _add_hyperlink(paragraph, "https://example.com/?a=1&b=2", "enlace")
+    # Fila 3: la primera columna queda vacía (gridBefore) y no tiene w:tc
+    tr = table.rows[3]._tr
+    tr.remove(tr.tc_lst[0])
+    grid_before = OxmlElement("w:gridBefore")
+    grid_before.set(qn("w:val"), "1")
+    tr.get_or_add_trPr().append(grid_before)
+    doc.add_paragraph("Tras la tabla.")
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def rich_docx(tmp_path):
+    return make_rich_docx(str(tmp_path / "rich.docx"))
@@ -0,0 +1,124 @@
+import os
+import re
+import time
+
+import pytest
+from bs4 import BeautifulSoup
+
+from docs2scorm.html_builder import _grid_value, build_html
+
+from conftest import make_structures_docx
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Los datos de las imágenes dependen de la versión de Pillow: se comparan sólo el tipo MIME y la posición
+_IMAGE_DATA = re.compile(r';base64,[^"]*')
+
+
+def _make_paragraphs_docx(path, paragraphs):
+    from docx import Document
+
+    doc = Document()
+    for index in range(paragraphs):
+        if index % 10 == 0:
+            doc.add_heading(f"Sección {index // 10 + 1}", 2)
+        paragraph = doc.add_paragraph(f"Párrafo {index} con texto ")
+        paragraph.add_run("destacado").bold = True
+        paragraph.add_run(" y una frase más para que tenga algo de longitud.")
+    doc.save(path)
+    return path
+
+
+def _best_time(path, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build_html(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_build_html_matches_previous_walker(rich_docx):
+    # Salida generada con el recorrido anterior (python-docx doc.paragraphs / doc.tables)
+    with open(os.path.join(DATA_DIR, "rich_docx_expected.html"), encoding="utf-8") as f:
+        expected = f.read()
+    assert _IMAGE_DATA.sub(";base64,IMAGEN", build_html(rich_docx)) == expected
+
+
+def test_build_html_grows_linearly(tmp_path):
+    small = _make_paragraphs_docx(str(tmp_path / "small.docx"), 500)
+    large = _make_paragraphs_docx(str(tmp_path / "large.docx"), 2000)
+    _best_time(small, repeat=1)  # calentar imports y cachés de python-docx
+
+    ratio = _best_time(large) / _best_time(small)
+    # 4x párrafos: lineal ~4, cuadrático ~16. Margen amplio para máquinas cargadas
+    assert ratio < 8, f"build_html con 4x párrafos tarda {ratio:.1f}x"
+
+
+def _table_cells(html, index=0):
+    """(tag, colspan, rowspan, texto) de cada celda, fila a fila, de la tabla index."""
+    table = BeautifulSoup(html, "html.parser").find_all("table")[index]
+    return [[(cell.name, cell.get("colspan"), cell.get("rowspan"), cell.get_text()) for cell in row.find_all(["th", "td"])]
+            for row in table.find_all("tr")]
+
+
+def test_table_merged_cells_and_cell_formatting(tmp_path):
+    html = build_html(make_structures_docx(str(tmp_path / "estructuras.docx")))
+
+    assert _table_cells(html) == [
+        [("th", None, None, "00"), ("th", None, None, "01"), ("th", None, None, "02")],
+        # gridSpan -> colspan; vMerge restart -> rowspan, sin repetir la celda en la fila 2
+        [("td", "2", None, "10-11"), ("td", None, "2", "12-22")],
+        [("td", None, None, "20"), ("td", None, None, "21")],
+        # gridBefore: la fila empieza en la segunda columna
+        [("td", None, None, "31"), ("td", None, None, "32 subrayado y enlace")],
+    ]
+    assert '32<u> subrayado</u> y <a href="https://example.com/?a=1&amp;b=2">enlace</a></td>' in html
+
+
+def test_vertical_merge_continues_after_grid_before(tmp_path):
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    doc = Document()
+    table = doc.add_table(rows=3, cols=3)
+    for row_index, row in enumerate(table.rows):
+        for col_index, cell in enumerate(row.cells):
+            cell.text = f"{row_index}{col_index}"
+    table.cell(0, 2).merge(table.cell(2, 2)).text = "02-22"
+    # Sin la primera columna, la continuación de la fusión es la segunda celda de la fila
+    tr = table.rows[2]._tr
+    tr.remove(tr.tc_lst[0])
+    grid_before = OxmlElement("w:gridBefore")
+    grid_before.set(qn("w:val"), "1")
+    tr.get_or_add_trPr().append(grid_before)
+    path = str(tmp_path / "tabla.docx")
+    doc.save(path)
+
+    assert _table_cells(build_html(path)) == [
+        [("th", None, None, "00"), ("th", None, None, "01"), ("th", None, "3", "02-22")],
+        [("td", None, None, "10"), ("td", None, None, "11")],
+        [("td", None, None, "21")],
+    ]
+
+
+def test_single_cell_table_uses_td(rich_docx):
+    html = build_html(rich_docx)
+    assert _table_cells(html, 1) == [[("td", None, None, "Nota en una sola celda")]]
+    assert _table_cells(html, 0)[0][0][0] == "th"
+
+
+@pytest.mark.parametrize("xml, expected", [
+    ('<w:tcPr {ns}><w:gridSpan w:val="3"/></w:tcPr>', 3),
+    ('<w:tcPr {ns}><w:gridSpan w:val="x"/></w:tcPr>', 1),
+    ('<w:tcPr {ns}><w:gridSpan w:val="-2"/></w:tcPr>', 0),
+    ('<w:tcPr {ns}/>', 1),
+])
+def test_grid_value(xml, expected):
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    assert _grid_value(parse_xml(xml.format(ns=nsdecls("w"))), "w:gridSpan", 1) == expected
+    assert _grid_value(None, "w:gridSpan", 1) == 1
@@ -0,0 +1,41 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from docs2scorm import cli
+
+HTML = "<html><body><h1>{title}</h1><p>Contenido de {title}.</p></body></html>"
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_main_numbers_repeated_names_and_reports_failures(tmp_path, workers):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "curso.html").write_text(HTML.format(title=folder.upper()), encoding="utf-8")
+    # Un .docx que no es un ZIP: su conversión falla sin detener el lote
+    (tmp_path / "b" / "roto.docx").write_bytes(b"no es un documento")
+    output_dir = tmp_path / "salida"
+
+    status = cli.main([str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output_dir), "-w", workers, "-q"])
+
+    assert status == 1
+    with open(output_dir / cli.REPORT_FILE, encoding="utf-8") as f:
+        report = json.load(f)
+    assert (report["total"], report["succeeded"], report["failed"]) == (3, 2, 1)
+
+    files = {os.path.relpath(entry["input"], tmp_path): entry for entry in report["files"]}
+    assert list(files) == [os.path.join("a", "curso.html"), os.path.join("b", "curso.html"), os.path.join("b", "roto.docx")]
+    first, second, broken = files.values()
+    assert first["output"] == str(output_dir / "curso.zip")
+    assert second["output"] == str(output_dir / "curso_2.zip")
+    for entry in (first, second):
+        assert entry["ok"] is True and entry["error"] is None
+        assert entry["seconds"] >= 0 and entry["output_size"] == os.path.getsize(entry["output"])
+    with zipfile.ZipFile(second["output"]) as zf:
+        assert "Contenido de B." in zf.read("sco_1.html").decode("utf-8")
+
+    assert broken["ok"] is False and broken["output"] is None and broken["error"]
+    assert isinstance(broken["seconds"], float)
+    assert sorted(os.listdir(output_dir)) == sorted([cli.REPORT_FILE, "curso.zip", "curso_2.zip"])
@@ -0,0 +1,41 @@
+from docs2scorm import conversion_cache
+from docs2scorm.converter import convert_to_tree
+
+
+def test_file_digests_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversion_cache, "MAX_FILE_DIGESTS", 3)
+    conversion_cache.clear_memory_cache()
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"subida_{index}.docx"
+        path.write_bytes(b"documento %d" % index)
+        paths.append(str(path))
+        conversion_cache.file_digest(paths[-1])
+
+    assert len(conversion_cache._file_digests) == 3
+    # Se conservan los más recientes y el resultado no depende de la caché
+    assert conversion_cache.file_digest(paths[0]) == conversion_cache.file_digest(paths[0])
+    assert len(conversion_cache._file_digests) == 3
+
+
+def test_cached_docx_conversion_reuses_read(rich_docx):
+    conversion_cache.clear_memory_cache()
+    settings = conversion_cache.cache_settings({"conversion_cache": True})
+    first_store, second_store = {}, {}
+    first = convert_to_tree(rich_docx, ["h1", "h2"], image_store=first_store, cache=settings)
+    second = convert_to_tree(rich_docx, ["h1", "h2"], image_store=second_store, cache=settings)
+
+    assert [node["title"] for node in first[0]] == [node["title"] for node in second[0]]
+    assert first_store == second_store and len(first_store) == 2
+
+
+def test_streaming_docx_skips_the_cache(rich_docx, capsys):
+    conversion_cache.clear_memory_cache()
+    settings = conversion_cache.cache_settings({"conversion_cache": True})
+    image_store = {}
+    convert_to_tree(rich_docx, ["h1", "h2"], image_store=image_store, streaming=True, cache=settings)
+
+    # Nada en la caché y las imágenes siguen siendo funciones de carga (no sus bytes)
+    assert not conversion_cache._memory
+    assert len(image_store) == 2 and all(callable(value) for value in image_store.values())
+    assert "streaming_docx" in capsys.readouterr().out
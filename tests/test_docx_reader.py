@@ -0,0 +1,38 @@
+import pytest
+
+from docs2scorm.converter import convert_to_tree
+from docs2scorm.images import image_bytes
+
+from conftest import make_structures_docx
+
+
+def _shape(nodes):
+    return [(node['title'], node['level'], node['content'], _shape(node['children'])) for node in nodes]
+
+
+def _convert(path, streaming, external_images):
+    image_store = {} if external_images else None
+    nodes, resources = convert_to_tree(path, ["h1", "h2"], image_store=image_store, parser="html.parser",
+                                       streaming=streaming)
+    images = {name: image_bytes(value) for name, value in (image_store or {}).items()}
+    return _shape(nodes), resources, images
+
+
+@pytest.mark.parametrize("external_images", [False, True])
+def test_streaming_matches_mammoth_on_rich_docx(rich_docx, external_images):
+    streamed = _convert(rich_docx, True, external_images)
+    assert streamed == _convert(rich_docx, False, external_images)
+    assert len(streamed[2]) == (2 if external_images else 0)
+
+
+@pytest.mark.parametrize("external_images", [False, True])
+def test_streaming_matches_mammoth_on_nested_lists_and_merged_cells(tmp_path, external_images):
+    path = make_structures_docx(str(tmp_path / "estructuras.docx"))
+    streamed = _convert(path, True, external_images)
+    assert streamed == _convert(path, False, external_images)
+
+    lists, table = [content for _, _, content, _ in streamed[0]]
+    assert "<ul><li>Uno<ol><li>Uno.a</li><li>Uno.b</li></ol></li><li>Dos</li></ul>" in lists
+    # Un nivel que no existe en numbering.xml no abre una lista
+    assert lists.endswith("</ol><p>Sin nivel</p>")
+    assert '<td colspan="2"><p>10-11</p></td><td rowspan="2"><p>12-22</p></td>' in table
@@ -0,0 +1,77 @@
+from bs4 import BeautifulSoup
+
+from docs2scorm.scorm_builder import (_mark_splitter_containers, html_to_hierarchical_tree,
+                                      process_pagination_titles)
+from docs2scorm.tree import TreeNode
+
+NESTED_HTML = (
+    "<html><head><style>p { color: red; }</style></head><body>"
+    "<p>Presentación</p>"
+    "<div class='envoltorio'><h1>Tema 1</h1><p>Uno</p>"
+    "<section><h2>Apartado</h2><p>Dos</p></section></div>"
+    "<aside><p>Sin encabezados</p></aside>"
+    "<h2>Apartado</h2><p>Tres</p>"
+    "<h1>Tema 2</h1><script>var x = 1;</script><p>Cuatro</p>"
+    "</body></html>"
+)
+
+
+def _shape(nodes):
+    return [(node['title'], node['level'], node['content'], _shape(node['children'])) for node in nodes]
+
+
+def test_nested_document_tree():
+    nodes, resources = html_to_hierarchical_tree(NESTED_HTML, ['h1', 'h2'], parser="html.parser")
+
+    assert _shape(nodes) == [
+        ("Introducción", 1, "<p>Presentación</p>", []),
+        ("Tema 1", 1, "<h1>Tema 1</h1><p>Uno</p>", [
+            # Los dos "Apartado" consecutivos del mismo padre se numeran
+            ("Apartado (1/2)", 2, "<h2>Apartado</h2><p>Dos</p><aside><p>Sin encabezados</p></aside>", []),
+            ("Apartado (2/2)", 2, "<h2>Apartado</h2><p>Tres</p>", []),
+        ]),
+        ("Tema 2", 1, "<h1>Tema 2</h1><p>Cuatro</p>", []),
+    ]
+    assert resources == {"css": "<style>p { color: red; }</style>\n", "js": "<script>var x = 1;</script>\n"}
+
+
+def test_splitter_containers_are_the_ancestors_of_headers():
+    soup = BeautifulSoup(NESTED_HTML, "html.parser")
+    containers = _mark_splitter_containers(soup, ['h1', 'h2'])
+
+    marked = {element.name for element in soup.find_all(True) if id(element) in containers}
+    assert marked == {"html", "body", "div", "section"}
+    assert id(soup) in containers and id(soup.aside) not in containers
+
+
+def test_pagination_titles_are_numbered_per_sibling_list():
+    children = [TreeNode("Sub", 2), TreeNode("Sub", 2), TreeNode("Otro", 2), TreeNode("Sub", 2)]
+    nodes = [TreeNode("Tema", 1), TreeNode("Tema", 1, children=children), TreeNode("Tema", 1)]
+    process_pagination_titles(nodes)
+
+    assert [node['title'] for node in nodes] == ["Tema (1/3)", "Tema (2/3)", "Tema (3/3)"]
+    # Sólo se agrupan los consecutivos: el último "Sub" va solo
+    assert [node['title'] for node in children] == ["Sub (1/2)", "Sub (2/2)", "Otro", "Sub"]
+
+
+def test_deeply_nested_headers_do_not_hit_recursion_limit():
+    depth = 2000
+    html = ("<div>" * depth + "<h1>Fondo</h1><p>Texto</p>" + "</div>" * depth
+            + "<h1>Final</h1>")
+    nodes, _ = html_to_hierarchical_tree(html, ['h1'], parser="html.parser")
+    assert _shape(nodes) == [
+        ("Fondo", 1, "<h1>Fondo</h1><p>Texto</p>", []),
+        ("Final", 1, "<h1>Final</h1>", []),
+    ]
+
+
+def test_deep_pagination_titles_do_not_hit_recursion_limit():
+    root = leaf = TreeNode("Nivel", 1)
+    for _ in range(2000):
+        child = TreeNode("Nivel", 2)
+        leaf['children'].extend([child, TreeNode("Nivel", 2)])
+        leaf = child
+    process_pagination_titles([root])
+
+    assert root['title'] == "Nivel"
+    assert leaf['title'] == "Nivel (1/2)" and root['children'][1]['title'] == "Nivel (2/2)"
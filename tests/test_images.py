@@ -0,0 +1,18 @@
+import pytest
+
+from docs2scorm.images import add_image, transcode_image
+
+from conftest import make_image
+
+
+@pytest.mark.parametrize("image_format, mime_type, extension", [
+    ("JPEG", "image/jpeg", "jpg"),
+    ("png", "image/png", "png"),
+    ("GIF", "image/gif", "gif"),
+    ("BMP", "image/bmp", "bmp"),
+    ("TIFF", "image/tiff", "tiff"),
+])
+def test_transcode_image_mime_type_matches_format(image_format, mime_type, extension):
+    image_data, result_mime = transcode_image(make_image(), image_format=image_format)
+    assert result_mime == mime_type
+    assert add_image({}, image_data, result_mime).endswith("." + extension)
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = ("docx", "mammoth", "lxml", "PIL", "bs4", "jinja2")
+
+# Presupuesto holgado: el import del paquete tarda unos 30 ms; con las dependencias pesadas,
+# unos 300 ms más
+IMPORT_BUDGET_SECONDS = 1.0
+
+_PROBE = f"""
+import json, sys, time
+sys.path.insert(0, {TESTS_DIR!r})
+started = time.perf_counter()
+import _package
+docs2scorm = _package.load_package()
+docs2scorm.build_scorm_wrapper
+elapsed = time.perf_counter() - started
+loaded = sorted(name for name in {HEAVY_MODULES!r}
+                if any(module == name or module.startswith(name + ".") for module in sys.modules))
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def test_import_does_not_load_heavy_dependencies():
+    # En un proceso nuevo: en el de pytest otras pruebas ya han cargado las dependencias
+    result = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe["loaded"] == []
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS, f"import docs2scorm tarda {probe['seconds']:.3f} s"
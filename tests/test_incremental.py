@@ -0,0 +1,98 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from docs2scorm.incremental import copy_zip_entry, state_path_for
+from docs2scorm.instrumentation import traced
+from docs2scorm.scorm_builder import build_scorm_package, html_to_hierarchical_tree
+from conftest import make_image
+
+SECTIONS = ["Introducción", "Desarrollo", "Conclusiones"]
+
+
+def _write_html(path, changed=None):
+    body = "".join(
+        f"<h2>{title}</h2><p>Contenido de {title.lower()}{' (revisado)' if title == changed else ''}.</p>"
+        for title in SECTIONS)
+    path.write_text(f"<html><body>{body}</body></html>", encoding="utf-8")
+    return str(path)
+
+
+def test_copy_zip_entry_keeps_entries_valid():
+    source = io.BytesIO()
+    with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("a.txt", "texto repetido " * 200)
+        zf.writestr("b.bin", bytes(range(256)) * 10, compress_type=zipfile.ZIP_STORED)
+        # Entrada escrita en streaming: lleva descriptor de datos tras los datos comprimidos
+        with zf.open("c.txt", "w") as f:
+            f.write(b"streaming " * 1000)
+
+    target = io.BytesIO()
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(target, "w") as dst:
+        for name in src.namelist():
+            copy_zip_entry(src, dst, name)
+        dst.writestr("d.txt", "entrada normal después de las copiadas")
+
+    with zipfile.ZipFile(target) as copied, zipfile.ZipFile(source) as src:
+        assert copied.testzip() is None
+        for name in src.namelist():
+            assert copied.read(name) == src.read(name)
+            assert copied.getinfo(name).compress_type == src.getinfo(name).compress_type
+        assert copied.read("d.txt") == b"entrada normal despu\xc3\xa9s de las copiadas"
+
+
+def _build(tmp_path, changed=None, **options):
+    """Compila el curso (3 SCOs y 2 imágenes) en modo incremental; devuelve la traza y las entradas."""
+    with open(_write_html(tmp_path / "curso.html", changed), encoding="utf-8") as f:
+        tree_data = html_to_hierarchical_tree(f.read(), ["h2"], parser="html.parser")
+    image_store = {"images/azul.png": make_image(), "images/rojo.png": make_image(color=(200, 40, 40))}
+    output = str(tmp_path / "curso.zip")
+    traces = []
+    with traced({"trace_callback": traces.append}, "prueba"):
+        build_scorm_package(tree_data, output, course_title="Curso", image_store=image_store,
+                            incremental=True, **options)
+    with zipfile.ZipFile(output) as zf:
+        assert zf.testzip() is None
+        entries = {info.filename: (info.compress_type, zf.read(info.filename)) for info in zf.infolist()}
+    return traces[0]["stages"], entries
+
+
+def _calls(stages, name):
+    return stages.get(name, {}).get("calls", 0)
+
+
+def test_incremental_rebuild_copies_unchanged_entries(tmp_path):
+    stages, first = _build(tmp_path)
+    assert _calls(stages, "render") == 3 and _calls(stages, "zip_copy") == 0
+
+    stages, second = _build(tmp_path, changed="Desarrollo")
+    # Sólo se renderiza el SCO editado; los otros dos y las imágenes se copian ya comprimidos
+    assert _calls(stages, "render") == 1
+    assert _calls(stages, "zip_copy") == 4
+    # Se escriben de nuevo el SCO editado y el manifest (identificadores nuevos en cada compilación)
+    assert _calls(stages, "zip_write") == 2
+
+    assert second.keys() == first.keys()
+    changed = {name for name in first if first[name] != second[name]} - {"imsmanifest.xml"}
+    assert len(changed) == 1 and b"(revisado)" in second[changed.pop()][1]
+    with open(state_path_for(str(tmp_path / "curso.zip")), encoding="utf-8") as f:
+        assert set(json.load(f)["entries"]) == set(second)
+
+
+@pytest.mark.parametrize("options, rewritten", [
+    # Las PNG pasan a comprimirse: se reescriben las imágenes (y el manifest, que cambia siempre)
+    ({"stored_extensions": []}, {"images/azul.png", "images/rojo.png", "imsmanifest.xml"}),
+    # Otro nivel de deflate: se reescriben las entradas comprimidas, no las PNG guardadas
+    ({"compresslevel": 1}, {"sco_1.html", "sco_2.html", "sco_3.html", "imsmanifest.xml"}),
+])
+def test_incremental_rebuild_rewrites_entries_with_new_compression(tmp_path, options, rewritten):
+    _, first = _build(tmp_path)
+    stages, second = _build(tmp_path, **options)
+
+    assert _calls(stages, "zip_copy") == len(first) - len(rewritten)
+    assert _calls(stages, "zip_write") == len(rewritten)
+    assert all(second[name][0] == zipfile.ZIP_DEFLATED for name in rewritten)
+    unchanged = first.keys() - rewritten
+    assert {name: second[name] for name in unchanged} == {name: first[name] for name in unchanged}
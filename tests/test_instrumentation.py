@@ -0,0 +1,28 @@
+from docs2scorm.instrumentation import finish_trace, stage, start_trace
+
+
+def test_stages_without_trace_do_not_share_records():
+    with stage("outer") as outer:
+        outer["items"] = 3
+        with stage("inner") as inner:
+            inner["items"] = 5
+        assert outer == {"items": 3}
+    assert inner == {"items": 5}
+
+
+def test_nested_stages_are_accumulated_separately():
+    trace = start_trace("prueba")
+    try:
+        with stage("outer", items=1) as outer:
+            with stage("inner") as inner:
+                inner["bytes_out"] = 10
+            outer["bytes_out"] = 2
+        with stage("inner") as inner:
+            inner["bytes_out"] = 5
+    finally:
+        finish_trace(trace)
+
+    stages = trace["stages"]
+    assert stages["outer"]["calls"] == 1
+    assert stages["outer"]["items"] == 1 and stages["outer"]["bytes_out"] == 2
+    assert stages["inner"]["calls"] == 2 and stages["inner"]["bytes_out"] == 15
@@ -0,0 +1,120 @@
+import io
+from xml.etree import ElementTree
+
+import pytest
+
+from docs2scorm.scorm_builder import (NS_ADLCP, NS_IMSCP, SHARED_RESOURCE_ID, SPA_LAUNCH_FILE, SPA_SECTIONS_DIR,
+                                      render_imsmanifest, write_imsmanifest)
+from docs2scorm.tree import TreeNode
+
+CP = f"{{{NS_IMSCP}}}"
+SCORMTYPE = f"{{{NS_ADLCP}}}scormtype"
+
+
+def _tree():
+    # Tema 1 (sco_1) > Apartado (sco_2); Tema 2 (sco_3)
+    return [
+        TreeNode("Salud & <Seguridad> \"2024\"", 1, children=[TreeNode("Apartado", 2, filename="sco_2.html")],
+                 filename="sco_1.html"),
+        TreeNode("Tema 2", 1, filename="sco_3.html"),
+    ]
+
+
+def _parse(**kwargs):
+    out = io.StringIO()
+    write_imsmanifest(out, kwargs.pop("course_title", "Curso & <Prueba>"), kwargs.pop("tree_nodes", _tree()), **kwargs)
+    return ElementTree.fromstring(out.getvalue().encode("utf-8"))
+
+
+def _items(parent):
+    """(título, identifierref, parameters, hijos) de los items de parent, en orden."""
+    return [(item.find(f"{CP}title").text, item.get("identifierref"), item.get("parameters"), _items(item))
+            for item in parent.findall(f"{CP}item")]
+
+
+def _resources(manifest):
+    return {res.get("identifier"): res for res in manifest.find(f"{CP}resources")}
+
+
+def _check_layout(manifest):
+    """Estructura común de un manifest SCORM 1.2; devuelve la organización."""
+    assert manifest.tag == f"{CP}manifest" and manifest.get("version") == "1.1"
+    assert [child.tag for child in manifest] == [f"{CP}metadata", f"{CP}organizations", f"{CP}resources"]
+    assert manifest.findtext(f"{CP}metadata/{CP}schema") == "ADL SCORM"
+    assert manifest.findtext(f"{CP}metadata/{CP}schemaversion") == "1.2"
+    organizations = manifest.find(f"{CP}organizations")
+    assert organizations.get("default") == "ORG-1"
+    [organization] = organizations
+    assert organization.tag == f"{CP}organization" and organization.get("identifier") == "ORG-1"
+    return organization
+
+
+def test_manifest_follows_tree_and_escapes_text():
+    manifest = _parse(extra_files=['images/a&b<"c">.png'])
+    organization = _check_layout(manifest)
+
+    # sanitize_title quita < > y "; el & se escapa y vuelve intacto al parsear
+    assert organization.findtext(f"{CP}title") == "Curso & Prueba"
+    items = _items(organization)
+    assert [(title, [child[0] for child in children]) for title, _, _, children in items] == [
+        ("Salud & Seguridad 2024", ["Apartado"]), ("Tema 2", [])]
+
+    resources = _resources(manifest)
+    refs = [items[0][1], items[0][3][0][1], items[1][1]]
+    assert len(set(refs)) == 3
+    for ref, filename in zip(refs, ["sco_1.html", "sco_2.html", "sco_3.html"]):
+        resource = resources[ref]
+        assert (resource.get("type"), resource.get(SCORMTYPE), resource.get("href")) == ("webcontent", "sco", filename)
+        assert [file.get("href") for file in resource] == [filename]
+    [asset] = [res for res in resources.values() if res.get(SCORMTYPE) == "asset"]
+    # En los atributos se escapan también < > y "
+    assert asset.get("href") == 'images/a&b<"c">.png'
+    assert [file.get("href") for file in asset] == ['images/a&b<"c">.png']
+    assert len(resources) == 4
+
+
+def test_empty_tree():
+    text = render_imsmanifest("Vacío", [])
+    manifest = ElementTree.fromstring(text.encode("utf-8"))
+    organization = _check_layout(manifest)
+    assert organization.findtext(f"{CP}title") == "Vacío" and _items(organization) == []
+    assert list(manifest.find(f"{CP}resources")) == []
+    # Sin resources no se declara el espacio de nombres adlcp
+    assert "xmlns:adlcp" not in text
+
+
+def test_single_page_items_share_one_sco():
+    manifest = _parse(single_page=True)
+    items = _items(_check_layout(manifest))
+    [spa_id] = {items[0][1], items[0][3][0][1], items[1][1]}
+    assert [items[0][2], items[0][3][0][2], items[1][2]] == ["?section=sco_1.html", "?section=sco_2.html",
+                                                             "?section=sco_3.html"]
+
+    [resource] = _resources(manifest).values()
+    assert resource.get("identifier") == spa_id
+    assert (resource.get(SCORMTYPE), resource.get("href")) == ("sco", SPA_LAUNCH_FILE)
+    assert [file.get("href") for file in resource] == [SPA_LAUNCH_FILE] + [
+        f"{SPA_SECTIONS_DIR}/sco_{index}.html" for index in (1, 2, 3)]
+
+
+def test_shared_files_are_a_dependency_of_every_sco():
+    manifest = _parse(shared_files=["course.css", "course.js"])
+    _check_layout(manifest)
+    resources = _resources(manifest)
+
+    shared = resources.pop(SHARED_RESOURCE_ID)
+    assert (shared.get(SCORMTYPE), shared.get("href")) == ("asset", "course.css")
+    assert [file.get("href") for file in shared] == ["course.css", "course.js"]
+    assert len(resources) == 3
+    for resource in resources.values():
+        assert resource.get(SCORMTYPE) == "sco"
+        assert [dep.get("identifierref") for dep in resource.findall(f"{CP}dependency")] == [SHARED_RESOURCE_ID]
+
+
+@pytest.mark.parametrize("indent", ["  ", None])
+def test_reproducible_ids_do_not_depend_on_layout(indent):
+    first = _parse(reproducible=True, indent=indent)
+    second = _parse(reproducible=True)
+    ids = [element.get("identifier") for element in first.iter() if element.get("identifier")]
+    assert ids == [element.get("identifier") for element in second.iter() if element.get("identifier")]
+    assert len(set(ids)) == len(ids)
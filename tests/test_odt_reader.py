@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import zipfile
+
+from docs2scorm.images import image_bytes
+from docs2scorm.odt_reader import iter_odt_blocks
+
+from conftest import make_image
+
+NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0" '
+    'xmlns:svg="urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" office:version="1.2"'
+)
+
+# Como en LibreOffice: "Heading" es negrita y los Heading N heredan de él
+STYLES = (
+    '<office:styles>'
+    '<style:style style:name="Heading" style:family="paragraph">'
+    '<style:text-properties fo:font-weight="bold"/></style:style>'
+    '<style:style style:name="Heading_20_1" style:family="paragraph" style:parent-style-name="Heading"/>'
+    '<style:style style:name="Heading_20_2" style:family="paragraph" style:parent-style-name="Heading">'
+    '<style:text-properties fo:font-style="italic"/></style:style>'
+    '</office:styles>'
+)
+
+AUTOMATIC_STYLES = (
+    '<office:automatic-styles>'
+    '<style:style style:name="B" style:family="text"><style:text-properties fo:font-weight="bold"/></style:style>'
+    '<style:style style:name="I" style:family="text"><style:text-properties fo:font-style="italic"/></style:style>'
+    '<style:style style:name="BI" style:family="text" style:parent-style-name="B">'
+    '<style:text-properties fo:font-style="italic"/></style:style>'
+    '<style:style style:name="Sup" style:family="text"><style:text-properties style:text-position="super 58%"/></style:style>'
+    '<style:style style:name="Empty" style:family="text"><style:text-properties style:text-position=""/></style:style>'
+    '<text:list-style style:name="L1"><text:list-level-style-number text:level="1"/>'
+    '<text:list-level-style-bullet text:level="2"/></text:list-style>'
+    '</office:automatic-styles>'
+)
+
+
+def _make_odt(path, body, pictures=None):
+    content = (f'<?xml version="1.0" encoding="UTF-8"?><office:document-content {NAMESPACES}>{AUTOMATIC_STYLES}'
+               f'<office:body><office:text>{body}</office:text></office:body></office:document-content>')
+    styles = f'<?xml version="1.0" encoding="UTF-8"?><office:document-styles {NAMESPACES}>{STYLES}</office:document-styles>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mimetype", "application/vnd.oasis.opendocument.text")
+        zf.writestr("content.xml", content)
+        zf.writestr("styles.xml", styles)
+        for name, data in (pictures or {}).items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def _blocks(tmp_path, body):
+    return [(tag, html) for tag, html, _ in iter_odt_blocks(_make_odt(tmp_path / "doc.odt", body))]
+
+
+def test_heading_style_bold_is_not_repeated(tmp_path):
+    blocks = _blocks(tmp_path, (
+        '<text:h text:style-name="Heading_20_1" text:outline-level="1">Capítulo</text:h>'
+        '<text:h text:style-name="Heading_20_2" text:outline-level="2">Apartado</text:h>'
+        '<text:h text:style-name="Heading_20_1" text:outline-level="1">Con <text:span text:style-name="B">'
+        'negrita</text:span></text:h>'
+    ))
+    assert blocks[0] == ("h1", "<h1>Capítulo</h1>")
+    # Sólo se descarta la negrita del estilo: el resto del formato se mantiene
+    assert blocks[1] == ("h2", "<h2><em>Apartado</em></h2>")
+    assert blocks[2] == ("h1", "<h1>Con <strong>negrita</strong></h1>")
+
+
+def test_empty_text_position_is_ignored(tmp_path):
+    blocks = _blocks(tmp_path, (
+        '<text:p>x<text:span text:style-name="Sup">2</text:span> '
+        '<text:span text:style-name="Empty">normal</text:span></text:p>'
+    ))
+    assert blocks == [("p", "<p>x<sup>2</sup> normal</p>")]
+
+
+RICH_BODY = (
+    '<text:h text:outline-level="1">Tema</text:h>'
+    '<text:p>Texto <text:span text:style-name="B">negrita</text:span>, <text:span text:style-name="I">cursiva</text:span>'
+    ' y <text:span text:style-name="BI">ambas</text:span>. Ver <text:a xlink:type="simple"'
+    ' xlink:href="https://example.com/?a=1&amp;b=2">el <text:span text:style-name="B">enlace</text:span></text:a>.</text:p>'
+    # Lista numerada (nivel 1 de L1) con una sublista de viñetas (nivel 2)
+    '<text:list text:style-name="L1"><text:list-item><text:p>Primero</text:p><text:list><text:list-item>'
+    '<text:p>Sub</text:p></text:list-item></text:list></text:list-item>'
+    '<text:list-item><text:p>Segundo</text:p></text:list-item></text:list>'
+    '<table:table><table:table-column table:number-columns-repeated="3"/>'
+    '<table:table-header-rows><table:table-row>'
+    '<table:table-cell table:number-columns-spanned="2"><text:p>Cabecera</text:p></table:table-cell>'
+    '<table:covered-table-cell/><table:table-cell><text:p>C</text:p></table:table-cell>'
+    '</table:table-row></table:table-header-rows>'
+    '<table:table-row><table:table-cell table:number-columns-repeated="2"><text:p>x</text:p></table:table-cell>'
+    '<table:table-cell><text:p>y</text:p></table:table-cell></table:table-row></table:table>'
+    '<text:p><draw:frame draw:name="Imagen"><draw:image xlink:href="Pictures/foto.png"/>'
+    '<svg:desc>Foto</svg:desc></draw:frame></text:p>'
+)
+
+
+def test_rich_document_blocks(tmp_path):
+    png = make_image()
+    path = _make_odt(tmp_path / "doc.odt", RICH_BODY, {"Pictures/foto.png": png})
+
+    def blocks(image_store=None):
+        return [(tag, html) for tag, html, _ in iter_odt_blocks(path, image_store=image_store)]
+
+    expected = [
+        ("h1", "<h1>Tema</h1>"),
+        ("p", '<p>Texto <strong>negrita</strong>, <em>cursiva</em> y <strong><em>ambas</em></strong>. Ver '
+              '<a href="https://example.com/?a=1&amp;b=2">el <strong>enlace</strong></a>.</p>'),
+        ("ol", "<ol><li>Primero<ul><li>Sub</li></ul></li><li>Segundo</li></ol>"),
+        # La celda tapada por la fusión no se emite; la repetida, sí (dos veces)
+        ("table", '<table><tr><th colspan="2"><p>Cabecera</p></th><th><p>C</p></th></tr>'
+                  '<tr><td><p>x</p></td><td><p>x</p></td><td><p>y</p></td></tr></table>'),
+    ]
+    image_src = f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}"
+    assert blocks() == expected + [("p", f'<p><img alt="Foto" src="{image_src}"/></p>')]
+
+    image_store = {}
+    image_name = f"images/{hashlib.sha256(png).hexdigest()}.png"
+    assert blocks(image_store) == expected + [("p", f'<p><img alt="Foto" src="{image_name}"/></p>')]
+    assert list(image_store) == [image_name] and image_bytes(image_store[image_name]) == png
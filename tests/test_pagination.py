@@ -0,0 +1,66 @@
+import zipfile
+
+import pytest
+from bs4 import BeautifulSoup
+
+from docs2scorm import html_to_scorm, pagination
+from docs2scorm.pagination import SLIDE_PAGE_CLASS, paginate_content
+
+# Con la ventana por defecto (1280x720) el área útil es de 1000x492 px y se llena hasta el 90%
+# (442.8 px). Un párrafo de 100 caracteres ocupa una línea: 24 px + 16 de margen = 40 px.
+PARAGRAPH = "<p>" + "x" * 99 + "{}</p>"
+
+
+def _pages(html):
+    soup = BeautifulSoup(html, "html.parser")
+    assert all(page.name == "div" and page["class"] == [SLIDE_PAGE_CLASS] for page in soup.contents)
+    return [[child.name for child in page.children] for page in soup.contents]
+
+
+def test_paragraphs_are_grouped_by_height():
+    content = "".join(PARAGRAPH.format(index % 10) for index in range(25))
+    assert [len(page) for page in _pages(paginate_content(content))] == [11, 11, 3]
+
+
+def test_heading_stays_with_next_block():
+    content = "".join(PARAGRAPH.format(index) for index in range(10)) + "<h2>Apartado</h2>" + PARAGRAPH.format("x")
+    assert _pages(paginate_content(content)) == [["p"] * 10, ["h2", "p"]]
+
+
+@pytest.mark.parametrize("image", ['<img src="a.png" width="800" height="2000">', '<img src="a.png">'])
+def test_oversized_or_unknown_image_gets_own_slide(image):
+    content = PARAGRAPH.format(1) + image + PARAGRAPH.format(2)
+    assert _pages(paginate_content(content)) == [["p"], ["img"], ["p"]]
+
+
+def test_slide_pages_keep_content_in_order():
+    content = "<h2>Título</h2>" + "".join(PARAGRAPH.format(index) for index in range(30))
+    html = paginate_content(content)
+    soup = BeautifulSoup(html, "html.parser")
+    unwrapped = "".join(str(child) for page in soup.contents for child in page.children)
+    assert unwrapped == str(BeautifulSoup(content, "html.parser"))
+
+
+def test_lxml_parser_gives_same_slides():
+    content = "<h2>Título</h2>" + "".join(PARAGRAPH.format(index) for index in range(30))
+    assert paginate_content(content, parser="lxml") == paginate_content(content, parser="html.parser")
+
+
+@pytest.mark.parametrize("configured, expected", [("html.parser", "html.parser"), (None, "lxml")])
+def test_build_passes_configured_parser(tmp_path, monkeypatch, configured, expected):
+    used = []
+
+    def recording_paginate(content, viewport=pagination.DEFAULT_VIEWPORT, parser=None):
+        used.append(parser)
+        return paginate_content(content, viewport, parser)
+
+    monkeypatch.setattr(pagination, "paginate_content", recording_paginate)
+    source = tmp_path / "curso.html"
+    source.write_text("<h2>Uno</h2><p>Texto.</p><h2>Dos</h2><p>Más texto.</p>", encoding="utf-8")
+    output = str(tmp_path / "curso.zip")
+    config = {"split_tags": ["h2"], "prepaginate": True, "html_parser": configured}
+    assert html_to_scorm([str(source)], output, config)
+
+    assert used == [expected, expected]
+    with zipfile.ZipFile(output) as zf:
+        assert f'<div class="{SLIDE_PAGE_CLASS}">' in zf.read("sco_1.html").decode("utf-8")
@@ -0,0 +1,202 @@
+import re
+import zlib
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from docs2scorm import build_scorm_wrapper, doc_to_scorm, html_to_scorm
+from docs2scorm.scorm_builder import NS_IMSCP, REPRODUCIBLE_DATE_TIME, compression_policy, write_entries_parallel
+
+from conftest import make_image
+
+SAMPLE_HTML = """<!DOCTYPE html>
+<html><head><style>p { color: #333; }</style></head><body>
+<h2>Primera sección</h2><p>Contenido de la primera sección.</p>
+<h2>Segunda sección</h2><p>Contenido de la <strong>segunda</strong> sección.</p>
+<h3>Apartado</h3><p>Más contenido.</p>
+</body></html>
+"""
+
+
+def _write_html(tmp_path):
+    path = tmp_path / "curso.html"
+    path.write_text(SAMPLE_HTML, encoding="utf-8")
+    return str(path)
+
+
+def test_single_page_shell_uses_course_title(tmp_path):
+    output = str(tmp_path / "spa.zip")
+    config = {"course_title": "Curso de prueba", "split_tags": ["h2", "h3"], "single_page": True}
+    assert html_to_scorm([_write_html(tmp_path)], output, config)
+
+    with zipfile.ZipFile(output) as zf:
+        shell = zf.read("index.html").decode("utf-8")
+    assert re.search(r"<title>\s*Curso de prueba\s*</title>", shell)
+
+
+def test_parallel_entries_pass_testzip(tmp_path):
+    asset = tmp_path / "extra.css"
+    asset.write_text("body { margin: 0; }\n" * 100, encoding="utf-8")
+    items = [(f"sco_{index}.html", lambda index=index: f"<p>Sección {index}</p>" * 200) for index in range(20)]
+    items += [("images/imagen.png", lambda: make_image()), ("assets/extra.css", str(asset))]
+
+    output = tmp_path / "parallel.zip"
+    with zipfile.ZipFile(output, "w") as zf:
+        write_entries_parallel(zf, items, compression_policy(None, None), workers=4)
+
+    with zipfile.ZipFile(output) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == [arcname for arcname, _ in items]
+        assert zf.read("sco_3.html").decode("utf-8") == "<p>Sección 3</p>" * 200
+        assert zf.read("images/imagen.png") == make_image()
+        assert zf.read("assets/extra.css") == asset.read_bytes()
+
+
+def test_parallel_build_matches_serial(tmp_path, rich_docx):
+    packages = {}
+    for workers in (1, 4):
+        output = str(tmp_path / f"curso_{workers}.zip")
+        config = {"course_title": "Curso", "split_tags": ["h1", "h2"], "external_images": True,
+                  "build_workers": workers}
+        assert doc_to_scorm(rich_docx, output, config)
+        with zipfile.ZipFile(output) as zf:
+            assert zf.testzip() is None
+            packages[workers] = {name: zf.read(name) for name in zf.namelist()}
+
+    assert list(packages[4]) == list(packages[1])
+    # Fuera del modo reproducible el manifest lleva identificadores nuevos en cada compilación
+    for name in packages[1]:
+        if name != "imsmanifest.xml":
+            assert packages[4][name] == packages[1][name], name
+
+
+def _reproducible_build(tmp_path, name, build, workers):
+    output = str(tmp_path / f"{name}_{workers}.zip")
+    assert build(output, workers)
+    # Fechas fijas: sin esto dos compilaciones en el mismo segundo coincidirían por casualidad
+    with zipfile.ZipFile(output) as zf:
+        assert {info.date_time for info in zf.infolist()} == {REPRODUCIBLE_DATE_TIME}
+    with open(output, "rb") as f:
+        return f.read()
+
+
+def test_reproducible_docx_package_is_byte_identical(tmp_path, rich_docx):
+    def build(output, workers):
+        config = {"course_title": "Curso", "split_tags": ["h1", "h2"], "reproducible": True,
+                  "build_workers": workers}
+        return doc_to_scorm(rich_docx, output, config)
+
+    first = _reproducible_build(tmp_path, "a", build, 1)
+    assert _reproducible_build(tmp_path, "b", build, 1) == first
+    assert _reproducible_build(tmp_path, "c", build, 4) == first
+    assert _reproducible_build(tmp_path, "d", build, None) == first
+
+
+def test_reproducible_html_package_is_byte_identical(tmp_path):
+    html_path = _write_html(tmp_path)
+
+    def build(output, workers):
+        config = {"course_title": "Curso", "split_tags": ["h2", "h3"], "reproducible": True,
+                  "external_images": True, "build_workers": workers}
+        return html_to_scorm([html_path], output, config)
+
+    first = _reproducible_build(tmp_path, "a", build, 1)
+    assert _reproducible_build(tmp_path, "b", build, 1) == first
+    assert _reproducible_build(tmp_path, "c", build, 4) == first
+
+
+
+@pytest.mark.parametrize("level", [1, 9])
+def test_reproducible_entries_use_configured_compresslevel(tmp_path, level):
+    # El asset se escribe con ZipFile.open(zinfo, "w"): el nivel tiene que ir en el zinfo
+    asset = tmp_path / "datos.txt"
+    asset.write_bytes(bytes(range(256)) * 4 + b"texto repetido " * 500)
+    output = str(tmp_path / "curso.zip")
+    config = {"course_title": "Curso", "split_tags": ["h2", "h3"], "reproducible": True, "zip_compresslevel": level}
+    assert html_to_scorm([_write_html(tmp_path)], output, config, assets=[str(asset)])
+
+    with zipfile.ZipFile(output) as zf:
+        for name in ("datos.txt", "sco_1.html"):
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            data = zf.read(name)
+            assert zf.getinfo(name).compress_size == len(compressor.compress(data) + compressor.flush()), name
+
+SHARED_HTML = """<html><head><style>.caja {{ color: red; }}</style><link rel="stylesheet" href="estilos.css"></head>
+<body><h2>{title}</h2><p class="caja">Contenido de {title}.</p>
+<script>document.addEventListener('DOMContentLoaded', function() {{ console.log("hola"); }});</script>
+</body></html>
+"""
+
+
+def test_shared_resources_are_written_once(tmp_path):
+    inputs = []
+    for title in ("Uno", "Dos"):
+        path = tmp_path / f"{title}.html"
+        path.write_text(SHARED_HTML.format(title=title), encoding="utf-8")
+        inputs.append(str(path))
+    output = str(tmp_path / "compartido.zip")
+    config = {"course_title": "Curso", "split_tags": ["h2"], "shared_resources": True}
+    assert html_to_scorm(inputs, output, config)
+
+    with zipfile.ZipFile(output) as zf:
+        # Los dos archivos traen el mismo <style> y <script>: una sola copia en los comunes
+        assert zf.read("course.css").decode("utf-8") == ".caja { color: red; }\n"
+        assert zf.read("course.js").decode("utf-8") == 'function setupInteractividad() {\n    console.log("hola");\n};\n'
+        for name in ("sco_1.html", "sco_2.html"):
+            sco = zf.read(name).decode("utf-8")
+            assert ".caja { color: red; }" not in sco and 'console.log("hola")' not in sco
+            assert 'href="course.css"' in sco and 'src="course.js"' in sco
+            assert 'href="estilos.css"' in sco
+        manifest = ElementTree.fromstring(zf.read("imsmanifest.xml"))
+
+    resources = manifest.findall(f"{{{NS_IMSCP}}}resources/{{{NS_IMSCP}}}resource")
+    shared = [resource for resource in resources if resource.get("identifier") == "RES-SHARED"]
+    assert len(shared) == 1
+    assert [file.get("href") for file in shared[0]] == ["course.css", "course.js"]
+    for resource in resources:
+        if resource.get("href", "").startswith("sco_"):
+            dependencies = resource.findall(f"{{{NS_IMSCP}}}dependency")
+            assert [dependency.get("identifierref") for dependency in dependencies] == ["RES-SHARED"]
+
+
+def test_single_page_shell_keeps_document_scripts(tmp_path):
+    source = tmp_path / "curso.html"
+    source.write_text(
+        '<html><head><script src="https://cdn.example.com/lib.js"></script></head><body>'
+        '<h2>Uno</h2><p>Texto.</p><h2>Dos</h2><p>Más.</p>'
+        '<script>var datos = {"total": 2};\n'
+        "document.addEventListener('DOMContentLoaded', function() { console.log(\"hola\"); });</script>"
+        '</body></html>', encoding="utf-8")
+    output = str(tmp_path / "spa.zip")
+    assert html_to_scorm([str(source)], output, {"split_tags": ["h2"], "single_page": True})
+
+    with zipfile.ZipFile(output) as zf:
+        shell = zf.read("index.html").decode("utf-8")
+    assert '<script src="https://cdn.example.com/lib.js"></script>' in shell
+    assert 'var datos = {"total": 2};' in shell
+    # El manejador DOMContentLoaded sólo se ejecuta como setupInteractividad, tras cargar cada sección
+    assert shell.count('console.log("hola")') == 1
+    assert "addEventListener('DOMContentLoaded'" not in shell
+
+
+def test_wrapper_fresh_ids_leave_title_untouched(tmp_path):
+    title = "Curso RES-" + "0123456789abcdef" * 2
+    manifests = []
+    for name, reproducible in (("a", True), ("b", False), ("c", False)):
+        output = str(tmp_path / f"{name}.zip")
+        assert build_scorm_wrapper("42", output, {"course_title": title, "reproducible": reproducible})
+        with zipfile.ZipFile(output) as zf:
+            manifests.append(ElementTree.fromstring(zf.read("imsmanifest.xml")))
+
+    ns = {"cp": NS_IMSCP}
+    ids = []
+    for manifest in manifests:
+        assert [element.text for element in manifest.iter(f"{{{NS_IMSCP}}}title")] == [title, title]
+        item = manifest.find(".//cp:item", ns)
+        resource = manifest.find(".//cp:resource", ns)
+        # La referencia del item sigue apuntando a su resource
+        assert item.get("identifierref") == resource.get("identifier")
+        ids.append((manifest.get("identifier"), item.get("identifier"), resource.get("identifier")))
+    # Fuera del modo reproducible, identificadores nuevos en cada wrapper
+    assert len({identifier for group in ids for identifier in group}) == 9
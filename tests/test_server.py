@@ -0,0 +1,64 @@
+import os
+import json
+import asyncio
+
+import pytest
+
+from docs2scorm.server import HTTPError, create_app, submit_job, _request_config, _run_job
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(config={"course_title": "Curso"}, workers=1, work_dir=str(tmp_path))
+    yield app
+    app["executor"].shutdown(wait=True)
+
+
+def _crash_worker():
+    os._exit(1)
+
+
+def _ok_job():
+    return {"ok": True, "seconds": 0.0, "output_size": 0, "error": None}
+
+
+def _new_job(job_id):
+    return {"id": job_id, "status": "queued", "started": None, "finished": None,
+            "seconds": None, "output_size": None, "error": None}
+
+
+def test_request_config_accepts_presentation_keys(app):
+    config = _request_config(app, {"config": json.dumps({"split_tags": ["h1"], "single_page": True})})
+    assert config["split_tags"] == ["h1"] and config["single_page"] is True
+    assert config["course_title"] == "Curso"
+
+
+@pytest.mark.parametrize("key", ["trace_file", "conversion_cache_dir", "image_cache_dir", "image_workers",
+                                 "build_workers", "trace_callback"])
+def test_request_config_rejects_server_keys(app, key):
+    with pytest.raises(HTTPError) as error:
+        _request_config(app, {"config": json.dumps({key: "/tmp/x"})})
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("body", [b'["curso"]', b'{"curso_id": "1", "config": {"trace_file": "/tmp/x"}}',
+                                  b'{"curso_id": "1", "extra_params": [1]}'])
+def test_wrapper_rejects_invalid_payload(app, body):
+    with pytest.raises(HTTPError) as error:
+        submit_job(app, "wrapper", {}, body)
+    assert error.value.status == 400
+
+
+def test_broken_pool_is_replaced(app):
+    async def run():
+        crashed, following = _new_job("crash"), _new_job("next")
+        await _run_job(app, crashed, _crash_worker)
+        await _run_job(app, following, _ok_job)
+        return crashed, following
+
+    broken_executor = app["executor"]
+    crashed, following = asyncio.run(run())
+    assert crashed["status"] == "failed" and "BrokenProcessPool" in crashed["error"]
+    assert following["status"] == "done"
+    assert app["executor"] is not broken_executor
+    assert app["failed"] == 1 and app["completed"] == 1
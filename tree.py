@@ -0,0 +1,98 @@
+# Modelo de nodo del árbol de secciones del curso.
+#
+# Cada sección es un TreeNode con __slots__ (sin __dict__ por nodo). Mientras se construye el
+# árbol, el contenido es la lista de fragmentos HTML que entrega el separador; al leerlo se une
+# una vez y el nodo guarda sólo esa cadena. Acepta el acceso de dict (node['content'],
+# node.get('children'), node['filename'] = ...) que usa el resto del paquete.
+
+_FIELDS = ("title", "level", "content", "children", "filename", "prev", "next")
+
+
+class TreeNode:
+    __slots__ = ("title", "level", "children", "filename", "prev", "next", "_content", "_extra")
+
+    def __init__(self, title, level, fragments=None, children=None, filename=""):
+        self.title = title
+        self.level = level
+        self.children = [] if children is None else children
+        self.filename = filename
+        self.prev = None
+        self.next = None
+        # Lista de fragmentos mientras se construye, cadena una vez unido
+        self._content = [] if fragments is None else fragments
+        self._extra = None
+
+    @property
+    def content(self):
+        if not isinstance(self._content, str):
+            self._content = "".join(self._content)
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    @property
+    def fragments(self):
+        """Fragmentos HTML del contenido, en orden (la lista se puede ampliar con append)."""
+        if isinstance(self._content, str):
+            self._content = [self._content]
+        return self._content
+
+    # --- Acceso compatible con dict ---
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in _FIELDS or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(_FIELDS) + list(self._extra or ())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Copia del nodo y sus descendientes como dicts."""
+        data = {key: value for key, value in self.items() if key != "children"}
+        data["children"] = [child.to_dict() if isinstance(child, TreeNode) else dict(child) for child in self.children]
+        return data
+
+    def __repr__(self):
+        return f"TreeNode({self.title!r}, level={self.level}, children={len(self.children)})"
+
+
+def iter_tree(nodes):
+    """
+    Recorre el árbol en preorden sin recursión (admite anidamientos muy profundos).
+    Genera (nodo, profundidad), con profundidad 0 para los nodos de primer nivel.
+    Sirve tanto para TreeNode como para nodos dict.
+    """
+    pending = [iter(nodes)]
+    while pending:
+        node = next(pending[-1], None)
+        if node is None:
+            pending.pop()
+            continue
+        yield node, len(pending) - 1
+        children = node.get("children")
+        if children:
+            pending.append(iter(children))